@@ -29,7 +29,7 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Import all models to register them with Base.metadata
-from app.db.models import User, Bookmark, Review, Analytics
+from app.db.models import User, Bookmark, Review, Analytics, AnalyticsRollup, AnalyticsSketch, Concert, Venue
 
 # Set target metadata for autogenerate
 target_metadata = Base.metadata
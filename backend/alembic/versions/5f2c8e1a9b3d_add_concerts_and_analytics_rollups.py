@@ -0,0 +1,61 @@
+"""Add concerts catalog and analytics rollups
+
+Revision ID: 5f2c8e1a9b3d
+Revises: d19ab5709db7
+Create Date: 2025-12-08 14:02:37.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c8e1a9b3d'
+down_revision: Union[str, Sequence[str], None] = 'd19ab5709db7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('concerts',
+    sa.Column('mt20id', sa.String(length=20), nullable=False),
+    sa.Column('prfnm', sa.String(length=300), nullable=False),
+    sa.Column('prfpdfrom', sa.Date(), nullable=True),
+    sa.Column('prfpdto', sa.Date(), nullable=True),
+    sa.Column('fcltynm', sa.String(length=300), nullable=True),
+    sa.Column('poster', sa.String(length=500), nullable=True),
+    sa.Column('genrenm', sa.String(length=50), nullable=True),
+    sa.Column('area', sa.String(length=50), nullable=True),
+    sa.Column('openrun', sa.Boolean(), nullable=False),
+    sa.Column('prfstate', sa.String(length=20), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('mt20id')
+    )
+    op.create_index(op.f('ix_concerts_prfpdfrom'), 'concerts', ['prfpdfrom'], unique=False)
+    op.create_index(op.f('ix_concerts_prfpdto'), 'concerts', ['prfpdto'], unique=False)
+    op.create_index(op.f('ix_concerts_updated_at'), 'concerts', ['updated_at'], unique=False)
+    op.create_table('analytics_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('concert_id', sa.String(length=50), nullable=True),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('day', 'event_type', 'concert_id', name='uq_rollup_day_event_concert')
+    )
+    op.create_index(op.f('ix_analytics_rollups_day'), 'analytics_rollups', ['day'], unique=False)
+    op.create_index(op.f('ix_analytics_rollups_id'), 'analytics_rollups', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analytics_rollups_id'), table_name='analytics_rollups')
+    op.drop_index(op.f('ix_analytics_rollups_day'), table_name='analytics_rollups')
+    op.drop_table('analytics_rollups')
+    op.drop_index(op.f('ix_concerts_updated_at'), table_name='concerts')
+    op.drop_index(op.f('ix_concerts_prfpdto'), table_name='concerts')
+    op.drop_index(op.f('ix_concerts_prfpdfrom'), table_name='concerts')
+    op.drop_table('concerts')
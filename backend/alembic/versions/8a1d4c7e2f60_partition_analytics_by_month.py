@@ -0,0 +1,118 @@
+"""Partition analytics by month and match indexes to query shapes
+
+Revision ID: 8a1d4c7e2f60
+Revises: 5f2c8e1a9b3d
+Create Date: 2025-12-10 09:41:12.530871
+
+PostgreSQL: analytics becomes a RANGE (created_at) partitioned table with
+one partition per month (see app/db/partitions.py) and a DEFAULT
+partition. Existing rows are copied over in one pass; the id sequence
+is kept so ids stay unique.
+
+SQLite has no partitioning: the table stays as is and only the indexes
+change.
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a1d4c7e2f60'
+down_revision: Union[str, Sequence[str], None] = '5f2c8e1a9b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = "id, user_id, event_type, concert_id, event_data, created_at"
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_analytics_id', table_name='analytics')
+    op.drop_index('ix_analytics_event_type', table_name='analytics')
+    op.drop_index('ix_analytics_concert_id', table_name='analytics')
+
+    if op.get_bind().dialect.name != 'postgresql':
+        op.create_index('ix_analytics_concert_created', 'analytics', ['concert_id', 'created_at'], unique=False)
+        op.create_index('ix_analytics_user_created', 'analytics', ['user_id', 'created_at'], unique=False)
+        return
+
+    op.drop_index('ix_analytics_created_at', table_name='analytics')
+    op.execute("ALTER TABLE analytics RENAME TO analytics_legacy")
+    op.execute("ALTER TABLE analytics_legacy RENAME CONSTRAINT analytics_pkey TO analytics_legacy_pkey")
+    op.execute("ALTER TABLE analytics_legacy RENAME CONSTRAINT analytics_user_id_fkey TO analytics_legacy_user_id_fkey")
+
+    op.execute("""
+        CREATE TABLE analytics (
+            id BIGINT NOT NULL DEFAULT nextval('analytics_id_seq'),
+            user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+            event_type VARCHAR(50) NOT NULL,
+            concert_id VARCHAR(50),
+            event_data JSON,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT analytics_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE analytics_id_seq AS BIGINT OWNED BY analytics.id")
+
+    # One partition per month from the oldest event to MONTHS_AHEAD ahead
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM analytics_legacy")).scalar()
+    current = datetime.utcnow().date().replace(day=1)
+    month = (oldest.date() if oldest else current).replace(day=1)
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        name = f"analytics_y{month.year:04d}m{month.month:02d}"
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF analytics "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute("CREATE TABLE analytics_default PARTITION OF analytics DEFAULT")
+
+    op.execute(f"INSERT INTO analytics ({COLUMNS}) SELECT {COLUMNS} FROM analytics_legacy")
+    op.execute("DROP TABLE analytics_legacy")
+
+    # Built after the copy (faster than maintaining them row by row)
+    op.create_index('ix_analytics_concert_created', 'analytics', ['concert_id', 'created_at'], unique=False)
+    op.create_index('ix_analytics_user_created', 'analytics', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_analytics_created_at', 'analytics', ['created_at'], unique=False, postgresql_using='brin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analytics_user_created', table_name='analytics')
+    op.drop_index('ix_analytics_concert_created', table_name='analytics')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_analytics_created_at', table_name='analytics')
+        op.execute("ALTER TABLE analytics RENAME TO analytics_partitioned")
+        op.execute("ALTER TABLE analytics_partitioned RENAME CONSTRAINT analytics_pkey TO analytics_partitioned_pkey")
+        op.execute("""
+            CREATE TABLE analytics (
+                id INTEGER NOT NULL DEFAULT nextval('analytics_id_seq'),
+                user_id INTEGER REFERENCES users (id) ON DELETE SET NULL,
+                event_type VARCHAR(50) NOT NULL,
+                concert_id VARCHAR(50),
+                event_data JSON,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                CONSTRAINT analytics_pkey PRIMARY KEY (id)
+            )
+        """)
+        op.execute("ALTER SEQUENCE analytics_id_seq AS INTEGER OWNED BY analytics.id")
+        op.execute(f"INSERT INTO analytics ({COLUMNS}) SELECT {COLUMNS} FROM analytics_partitioned")
+        op.execute("DROP TABLE analytics_partitioned CASCADE")
+        op.create_index(op.f('ix_analytics_created_at'), 'analytics', ['created_at'], unique=False)
+
+    op.create_index(op.f('ix_analytics_concert_id'), 'analytics', ['concert_id'], unique=False)
+    op.create_index(op.f('ix_analytics_event_type'), 'analytics', ['event_type'], unique=False)
+    op.create_index(op.f('ix_analytics_id'), 'analytics', ['id'], unique=False)
@@ -0,0 +1,37 @@
+"""Add analytics sketches
+
+Revision ID: b3e7f5a2c914
+Revises: 8a1d4c7e2f60
+Create Date: 2025-12-11 16:20:48.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7f5a2c914'
+down_revision: Union[str, Sequence[str], None] = '8a1d4c7e2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('analytics_sketches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('kind', 'key', 'day', name='uq_sketch_kind_key_day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('analytics_sketches')
@@ -0,0 +1,41 @@
+"""Add venues
+
+Revision ID: c6f1a8d3e5b7
+Revises: b3e7f5a2c914
+Create Date: 2025-12-12 11:05:37.214659
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1a8d3e5b7'
+down_revision: Union[str, Sequence[str], None] = 'b3e7f5a2c914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('venues',
+    sa.Column('mt10id', sa.String(length=20), nullable=False),
+    sa.Column('fcltynm', sa.String(length=300), nullable=False),
+    sa.Column('sidonm', sa.String(length=50), nullable=True),
+    sa.Column('gugunnm', sa.String(length=50), nullable=True),
+    sa.Column('adres', sa.String(length=500), nullable=True),
+    sa.Column('lat', sa.Float(), nullable=True),
+    sa.Column('lng', sa.Float(), nullable=True),
+    sa.Column('seatscale', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('mt10id')
+    )
+    op.create_index(op.f('ix_venues_fcltynm'), 'venues', ['fcltynm'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_venues_fcltynm'), table_name='venues')
+    op.drop_table('venues')
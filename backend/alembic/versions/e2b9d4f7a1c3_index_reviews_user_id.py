@@ -0,0 +1,32 @@
+"""Index reviews.user_id
+
+PostgreSQL does not index referencing columns, so deleting a user (ON
+DELETE CASCADE) or purging their reviews scanned the whole table.
+bookmarks.user_id is already covered by uq_user_concert.
+
+Revision ID: e2b9d4f7a1c3
+Revises: c6f1a8d3e5b7
+Create Date: 2025-12-19 15:42:08.531907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b9d4f7a1c3'
+down_revision: Union[str, Sequence[str], None] = 'c6f1a8d3e5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_reviews_user_id'), 'reviews', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_reviews_user_id'), table_name='reviews')
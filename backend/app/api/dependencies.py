@@ -1,27 +1,91 @@
 """API dependencies for authentication and other shared functionality"""
 
+import hmac
 from typing import Optional
-from fastapi import Header, HTTPException
+from fastapi import Header, HTTPException, Query, Request
 
-from app.core.security import decode_token
+from app.core.config import settings
+from app.core.security import VERIFIED_TOKEN_KEY, decode_token
+from app.core.tracing import span
 
 
 # Re-export for use in routes
-__all__ = ["get_current_user_id"]
+__all__ = ["get_current_user_id", "get_stream_token_payload", "require_export_token", "require_metrics_token"]
 
 
-def get_current_user_id(authorization: Optional[str] = Header(None)) -> int:
+def get_current_user_id(request: Request, authorization: Optional[str] = Header(None)) -> int:
     """
     Extract and return current user ID from JWT token
     """
-    if not authorization or not authorization.lower().startswith("bearer "):
-        raise HTTPException(status_code=401, detail="Missing Bearer token")
+    payload = request.scope.get(VERIFIED_TOKEN_KEY)
+    if payload is None:
+        if not authorization or not authorization.lower().startswith("bearer "):
+            raise HTTPException(status_code=401, detail="Missing Bearer token")
 
-    token = authorization.split(" ", 1)[1].strip()
-    payload = decode_token(token)
+        token = authorization.split(" ", 1)[1].strip()
+        with span("auth"):
+            payload = decode_token(token)
     user_id = payload.get("sub")
 
-    if not user_id:
+    # Anonymous /api/token tokens carry sub="anon"
+    if not str(user_id or "").isdigit():
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
     return int(user_id)
+
+
+def get_stream_token_payload(
+    authorization: Optional[str] = Header(None),
+    token: Optional[str] = Query(None),
+) -> dict:
+    """
+    JWT payload of a user for long-lived streams
+
+    Browsers' EventSource cannot send headers, so the token may also come
+    as `?token=`. Keep such URLs out of access logs (serve.py disables them).
+    """
+    if authorization and authorization.lower().startswith("bearer "):
+        token = authorization.split(" ", 1)[1].strip()
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing Bearer token")
+
+    with span("auth"):
+        payload = decode_token(token)
+    if not str(payload.get("sub", "")).isdigit():
+        raise HTTPException(status_code=401, detail="User token required")
+    return payload
+
+
+def require_export_token(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Require one of the configured EXPORT_TOKENS as Bearer token
+
+    Bulk exports are for partners and the data team, not for anonymous
+    /api/token holders. Exports are disabled when no token is configured.
+    """
+    tokens = settings.get_export_tokens()
+    if not tokens:
+        raise HTTPException(status_code=403, detail="Exports are disabled")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing Bearer token")
+
+    token = authorization.split(" ", 1)[1].strip().encode()
+    if not any(hmac.compare_digest(token, t.encode()) for t in tokens):
+        raise HTTPException(status_code=403, detail="Invalid export token")
+
+
+def require_metrics_token(authorization: Optional[str] = Header(None)) -> None:
+    """
+    Require METRICS_TOKEN as Bearer token (Prometheus `authorization` config)
+
+    Metrics expose traffic per route, upstream quota and pool internals, so
+    they are not public. /metrics is disabled when no token is configured.
+    """
+    if not settings.metrics_token:
+        raise HTTPException(status_code=403, detail="Metrics are disabled (no METRICS_TOKEN)")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing Bearer token")
+
+    token = authorization.split(" ", 1)[1].strip().encode()
+    if not hmac.compare_digest(token, settings.metrics_token.encode()):
+        raise HTTPException(status_code=403, detail="Invalid metrics token")
@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from app.api.routes import auth, concerts, users
+from app.api.routes import analytics, auth, batch, concerts, exports, metrics, posters, users
 
 # Create main API router
 api_router = APIRouter()
@@ -11,5 +11,10 @@ api_router = APIRouter()
 api_router.include_router(auth.router)
 api_router.include_router(concerts.router)
 api_router.include_router(users.router)
+api_router.include_router(posters.router)
+api_router.include_router(exports.router)
+api_router.include_router(analytics.router)
+api_router.include_router(batch.router)
+api_router.include_router(metrics.router)
 
 __all__ = ["api_router"]
@@ -0,0 +1,93 @@
+"""Analytics routes (approximate view statistics)"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+
+from app.api.schemas import ViewCreate
+from app.core.security import get_token_payload, verify_bearer
+from app.db import database
+from app.db.database import get_read_db
+from app.services.analytics import analytics_service
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+ANALYTICS_UNAVAILABLE = "Analytics storage is not configured"
+
+
+def get_analytics_db(request: Request):
+    """get_read_db for the statistics routes: 503 without a database"""
+    if database.SessionLocal is None:
+        raise HTTPException(status_code=503, detail=ANALYTICS_UNAVAILABLE)
+    yield from get_read_db(request)
+
+
+@router.post("/views", status_code=204)
+def record_concert_view(
+    view: ViewCreate,
+    request: Request,
+    payload: dict = Depends(get_token_payload),
+):
+    """
+    공연 조회 기록 (상세 화면을 열 때 호출)
+
+    조회 통계, 인기 공연, 캘린더 순위는 이 요청으로만 집계됩니다. 캐시되는
+    포스터 이미지 요청은 집계하지 않습니다.
+    IP당 분당 120회로 요청이 제한되며 Bearer 토큰이 필요합니다.
+    로그인 사용자는 사용자별로, 익명 토큰은 IP별로 순 방문자를 셉니다.
+
+    요청 본문:
+        concert_id: KOPIS 공연 ID
+    """
+    sub = str(payload.get("sub", ""))
+    # Anonymous tokens are reissued every few minutes; key them by address instead
+    visitor = f"user:{sub}" if sub.isdigit() else f"anon:{request.client.host if request.client else ''}"
+    analytics_service.record_view(view.concert_id, visitor)
+    return Response(status_code=204, headers={"Cache-Control": "no-store"})
+
+
+@router.get("/concerts/{concert_id}")
+def get_concert_analytics(
+    concert_id: str,
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(get_analytics_db),
+    _: bool = Depends(verify_bearer),
+):
+    """
+    공연별 조회 통계 (근사값)
+
+    HyperLogLog(순 방문자)와 Count-Min(조회수) 스케치로 계산하므로 원본
+    이벤트를 스캔하지 않습니다. 순 방문자 수의 오차는 약 1.6%이며,
+    워커별로 모은 값은 ANALYTICS_SKETCH_FLUSH_INTERVAL초마다 반영됩니다.
+
+    파라미터:
+        concert_id: KOPIS 공연 ID
+        days: 오늘(KST)부터 거슬러 올라간 집계 기간 (기본값: 7, 최대: 90)
+
+    반환값:
+        concert_id, days, unique_viewers (순 방문자), views (조회수)
+
+    데이터베이스가 설정되지 않았으면 503을 반환합니다.
+    """
+    return analytics_service.get_concert_analytics(db, concert_id, days)
+
+
+@router.get("/trending")
+def get_trending_concerts(
+    days: int = Query(7, ge=1, le=90),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_analytics_db),
+    _: bool = Depends(verify_bearer),
+):
+    """
+    조회수 상위 공연 (근사값)
+
+    파라미터:
+        days: 집계 기간 (기본값: 7, 최대: 90)
+        limit: 최대 공연 수 (기본값: 10, 최대: 100)
+
+    반환값:
+        조회수 내림차순 [{concert_id, views}]
+
+    데이터베이스가 설정되지 않았으면 503을 반환합니다.
+    """
+    return analytics_service.get_trending_concerts(db, limit, days)
@@ -1,9 +1,13 @@
 """Authentication routes"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.api.dependencies import require_metrics_token
 from app.core.security import issue_token
 from app.core.config import settings
+from app.db.database import replica_status
+from app.services.kopis import kopis_service
+from app.services.snapshot import catalog_snapshot
 
 router = APIRouter(prefix="/api", tags=["auth"])
 
@@ -24,8 +28,24 @@ def get_token():
 
 @router.get("/health")
 def health():
-    """서버 상태 확인"""
+    """서버 상태 확인 (공개, 상세 정보는 /api/health/details)"""
     return {
         "ok": True,
+        "status": "ok",
         "message": "Backend running successfully"
     }
+
+
+@router.get("/health/details")
+def health_details(_: None = Depends(require_metrics_token)):
+    """
+    KOPIS 회로/동시성/키별 할당량, 읽기 복제본, 카탈로그 스냅샷 상태
+
+    /metrics와 같은 내부 정보이므로 METRICS_TOKEN을 Bearer 토큰으로 보내야 합니다.
+    """
+    return {
+        "ok": True,
+        "upstream": {"kopis": kopis_service.status()},
+        "replicas": replica_status(),
+        "catalog_snapshot": catalog_snapshot.status(),
+    }
@@ -0,0 +1,96 @@
+"""Request batching route"""
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+
+from app.api.schemas import BatchRequest
+from app.core.batch import (
+    SUBREQUEST_HEADERS, ResponseBudget, check_path, dispatch, excluded_path, render, sub_headers,
+)
+from app.core.config import settings
+from app.core.responses import RenderedJSONResponse
+from app.core.security import decode_token
+from app.core.tracing import span
+
+router = APIRouter(prefix="/api", tags=["batch"])
+
+
+@router.post("/batch", response_class=RenderedJSONResponse)
+async def batch(request: Request, body: BatchRequest, authorization: Optional[str] = Header(None)):
+    """
+    여러 GET 요청을 한 번의 왕복으로 처리
+
+    모바일에서 토큰 발급 후 목록, 북마크, 내 정보 등을 차례로 요청하면
+    요청마다 왕복 지연이 생기므로, 이 엔드포인트로 묶어서 보낼 수 있습니다.
+    하위 요청은 서버 안에서 동시에 실행되며 각 경로의 일반 요청과 같은
+    응답을 돌려줍니다.
+
+    요청 본문:
+        requests: 하위 요청 목록 (최대 BATCH_MAX_REQUESTS개)
+        - id: 응답과 짝을 맞출 식별자 (생략 시 순서 번호)
+        - method: "GET"만 가능
+        - path: 쿼리 문자열을 포함한 /api/ 경로 (예: "/api/users/me/bookmarks")
+        - headers: 하위 요청 헤더 (If-None-Match만 허용)
+
+    반환값:
+        JSON 응답:
+        - responses: 요청 순서대로 {id, status, headers, body}
+          (headers는 ETag, Cache-Control, Retry-After만 포함)
+
+    Bearer 토큰은 묶음 전체에 대해 한 번만 검증되며 모든 하위 요청에
+    적용됩니다 (없거나 잘못되면 묶음 전체가 401).
+    레이트 리밋은 묶음 자체(IP당 분당 20회)와 하위 요청 각각의 경로에
+    대해 따로 계산되며, 한도를 넘은 하위 요청만 429를 받습니다.
+    이벤트 스트림, 내보내기, 포스터 이미지 경로는 묶을 수 없고(403), 하위 응답
+    본문 합계가 BATCH_MAX_RESPONSE_BYTES를 넘으면 넘친 응답은 413이 됩니다.
+    """
+    items = body.requests
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    if len(items) > settings.batch_max_requests:
+        raise HTTPException(
+            status_code=400, detail=f"At most {settings.batch_max_requests} requests per batch"
+        )
+
+    ids = [item.id if item.id is not None else str(i) for i, item in enumerate(items)]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=400, detail="Duplicate request ids")
+    for request_id, item in zip(ids, items):
+        problem = check_path(item.path)
+        if problem is None and not SUBREQUEST_HEADERS.issuperset(name.lower() for name in item.headers):
+            problem = f"only {', '.join(sorted(SUBREQUEST_HEADERS))} headers are allowed"
+        if problem is None and not all(value.isascii() for value in item.headers.values()):
+            problem = "header values must be ASCII"
+        if problem is not None:
+            raise HTTPException(status_code=400, detail=f"Request {request_id}: {problem}")
+        excluded = excluded_path(item.path)
+        if excluded is not None:
+            raise HTTPException(status_code=403, detail=f"Request {request_id}: {excluded} cannot be batched")
+
+    # One token check for the whole batch; sub-requests reuse the payload
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise HTTPException(status_code=401, detail="Missing Bearer token")
+    with span("auth"):
+        payload = decode_token(authorization.split(" ", 1)[1].strip())
+
+    parent_request_id = request.headers.get("x-request-id")
+    budget = ResponseBudget(settings.batch_max_response_bytes)
+    with span("batch"):
+        responses = await asyncio.gather(*(
+            dispatch(
+                request.app,
+                request.scope,
+                item.path,
+                sub_headers(
+                    request.scope,
+                    item.headers,
+                    f"{parent_request_id}.{i}" if parent_request_id else None,
+                ),
+                payload,
+                budget,
+            )
+            for i, item in enumerate(items)
+        ))
+    return RenderedJSONResponse(render(list(zip(ids, responses))))
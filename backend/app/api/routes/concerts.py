@@ -1,19 +1,43 @@
 """Concert-related routes"""
 
-from fastapi import APIRouter, Depends
+from typing import Optional
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from app.core.compression import negotiate_encoding
+from app.core.config import settings
+from app.core.http_cache import CONCERTS_CACHE_CONTROL, ENCODED_VARY, content_etag, not_modified, set_cache_headers
+from app.core.responses import RenderedJSONResponse, dumps
 from app.core.security import verify_bearer
+from app.db import database
+from app.db.database import get_read_db
+from app.services.concert_calendar import concert_calendar
 from app.services.kopis import kopis_service
+from app.services.snapshot import catalog_snapshot
+from app.services.venues import nearby_index
+from app.services.warmer import query_tracker
 
 router = APIRouter(prefix="/api", tags=["concerts"])
 
+CATALOG_UNAVAILABLE = "Local concert catalog is not configured"
+
+
+def get_catalog_db(request: Request):
+    """get_read_db for routes served from the local catalog: 503 without a database"""
+    if database.SessionLocal is None:
+        raise HTTPException(status_code=503, detail=CATALOG_UNAVAILABLE)
+    yield from get_read_db(request)
+
 
-@router.get("/concerts")
+@router.get("/concerts", response_class=RenderedJSONResponse)
 def get_concerts(
+    request: Request,
     stdate: str,
     eddate: str,
     cpage: int = 1,
     rows: int = 20,
+    on: Optional[str] = None,
     _: bool = Depends(verify_bearer),
 ):
     """
@@ -27,17 +51,196 @@ def get_concerts(
         eddate: 종료일 YYYYMMDD 형식 (예: "20250131")
         cpage: 페이지 번호 (기본값: 1)
         rows: 페이지당 결과 수 (기본값: 20, 최대: 100)
+        on: 이 날짜(YYYYMMDD)에 공연 중인 항목만 조회 (선택, 기간 안의 날짜)
 
     반환값:
         JSON 응답:
-        - meta: 요청 메타데이터 (페이지, 행 수, 날짜, 장르)
-        - raw: KOPIS의 전체 XML-to-JSON 응답
+        - meta: 요청 메타데이터 (페이지, 행 수, 날짜, 장르, 전체 건수)
+        - raw: 해당 페이지의 KOPIS XML-to-JSON 형식 응답
         - items: 프론트엔드 사용을 위해 정규화된 공연 항목
+
+    기간은 월 단위 구간으로 나뉘어 구간별로 캐시되므로, 겹치는 기간의
+    요청은 KOPIS를 다시 호출하지 않습니다. 4개 구간(월)보다 긴 기간이나
+    구간이 LISTING_SEGMENT_MAX_PAGES에서 잘린 경우에는 해당 페이지를 KOPIS에서 직접 조회하며,
+    이때 meta.total은 null입니다. 날짜 형식이 잘못되면 400을 반환합니다.
+
+    sync_catalog.py로 동기화된 기간은 카탈로그 스냅샷에서 바로 응답합니다
+    (이때 정렬은 시작일 순).
+
+    응답에는 ETag가 포함되며, If-None-Match가 일치하면 304를 반환합니다.
+    """
+    # Request frequency decides which queries the cache warmer keeps fresh
+    query_tracker.record(stdate, eddate, rows)
+
+    # Synced ranges are answered from the mmap'ed catalog snapshot
+    entry = catalog_snapshot.get_concerts_entry(stdate, eddate, cpage, rows, on)
+    if entry is None:
+        entry = kopis_service.get_concerts_entry(
+            stdate=stdate,
+            eddate=eddate,
+            cpage=cpage,
+            rows=rows,
+            shcate="CCCD",  # Currently hardcoded to popular music
+            on=on,
+        )
+
+    cached = not_modified(request, entry.etag, CONCERTS_CACHE_CONTROL, vary=ENCODED_VARY)
+    if cached is not None:
+        return cached
+
+    # The body is serialized (and compressed) once per cache entry and
+    # reused on every hit
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if encoding and len(entry.body) >= settings.compression_min_size:
+        response = RenderedJSONResponse(
+            content=entry.encoded(encoding),
+            headers={"Content-Encoding": encoding},
+        )
+    else:
+        response = RenderedJSONResponse(content=entry.body)
+
+    set_cache_headers(response, entry.etag, CONCERTS_CACHE_CONTROL, vary=ENCODED_VARY)
+    return response
+
+
+@router.get("/concerts/facets", response_class=RenderedJSONResponse)
+def get_concert_facets(
+    request: Request,
+    stdate: str,
+    eddate: str,
+    _: bool = Depends(verify_bearer),
+):
+    """
+    기간 내 공연의 장르/지역별 건수
+
+    카탈로그 스냅샷에서 계산하므로 DB나 KOPIS를 호출하지 않습니다.
+
+    파라미터:
+        stdate: 시작일 YYYYMMDD 형식
+        eddate: 종료일 YYYYMMDD 형식
+
+    반환값:
+        JSON 응답:
+        - total: 기간 내 공연 수
+        - genrenm: 장르별 건수 (많은 순)
+        - area: 지역별 건수 (많은 순)
+
+    날짜 형식이 잘못되면 400, 스냅샷이 없거나 CATALOG_SNAPSHOT_MAX_AGE보다
+    오래되었거나 동기화된 기간 밖이면 503을 반환합니다.
+    """
+    try:
+        payload = catalog_snapshot.facets(stdate, eddate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if payload is None:
+        raise HTTPException(status_code=503, detail="No current catalog snapshot covers this range")
+
+    body = dumps(payload)
+    etag = content_etag(body)
+    cached = not_modified(request, etag, CONCERTS_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    response = RenderedJSONResponse(content=body)
+    set_cache_headers(response, etag, CONCERTS_CACHE_CONTROL)
+    return response
+
+
+@router.get("/concerts/calendar", response_class=RenderedJSONResponse)
+def get_concert_calendar(
+    request: Request,
+    month: str,
+    top: int = Query(3, ge=0, le=10),
+    db: Session = Depends(get_catalog_db),
+    _: bool = Depends(verify_bearer),
+):
     """
-    return kopis_service.get_concerts(
-        stdate=stdate,
-        eddate=eddate,
-        cpage=cpage,
-        rows=rows,
-        shcate="CCCD"  # Currently hardcoded to popular music
-    )
+    월간 공연 캘린더 (날짜별 공연 수와 인기 공연)
+
+    로컬 공연 카탈로그(sync_catalog.py로 동기화)의 공연 기간으로 만든
+    인터벌 인덱스에서 계산하므로 KOPIS를 호출하지 않습니다.
+
+    파라미터:
+        month: 조회할 달 YYYYMM 형식 (예: "202510")
+        top: 날짜별로 함께 반환할 공연 수 (기본값: 3, 최대: 10, 0이면 생략)
+
+    반환값:
+        JSON 응답:
+        - month: 요청한 달
+        - total: 그 달에 하루라도 공연하는 공연 수
+        - days: 날짜별 {date, count, top}, top은 최근 7일 조회수 순
+          (같으면 종료일이 빠른 순)
+
+    형식이 잘못된 month는 400, 데이터베이스가 설정되지 않았으면 503을
+    반환합니다. 응답에는 ETag가 포함됩니다.
+    """
+    try:
+        payload = concert_calendar.month(db, month, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    body = dumps(payload)
+    etag = content_etag(body)
+    cached = not_modified(request, etag, CONCERTS_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    response = RenderedJSONResponse(content=body)
+    set_cache_headers(response, etag, CONCERTS_CACHE_CONTROL)
+    return response
+
+
+@router.get("/concerts/nearby", response_class=RenderedJSONResponse)
+def get_nearby_concerts(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    stdate: str = Query(...),
+    eddate: str = Query(...),
+    radius: Optional[float] = Query(None, gt=0, le=settings.nearby_max_radius_km),
+    on: Optional[str] = None,
+    venues: int = Query(20, ge=1, le=100),
+    _: bool = Depends(verify_bearer),
+):
+    """
+    주변 공연장의 공연 조회 (가까운 순)
+
+    sync_catalog.py --venues로 동기화한 공연장 좌표의 격자 인덱스에서
+    찾으므로 KOPIS를 호출하지 않습니다. 공연은 로컬 카탈로그에서 공연장
+    이름으로 연결됩니다.
+
+    파라미터:
+        lat, lng: 기준 위치 (위도, 경도)
+        stdate: 시작일 YYYYMMDD 형식
+        eddate: 종료일 YYYYMMDD 형식
+        radius: 검색 반경 km (선택, 최대 NEARBY_MAX_RADIUS_KM). 없으면
+            기간 내 공연이 있는 가장 가까운 공연장 `venues`곳
+        on: 이 날짜(YYYYMMDD)에 공연 중인 항목만 조회 (선택, 기간 안의 날짜)
+        venues: 반환할 최대 공연장 수 (기본값: 20, 최대: 100)
+
+    반환값:
+        JSON 응답:
+        - total: 반환된 공연 수
+        - venues: 공연장별 {mt10id, fcltynm, adres, lat, lng, distance_km,
+          concerts}, 기간 내 공연이 있는 공연장만 포함
+
+    날짜 형식이 잘못되면 400, 데이터베이스가 설정되지 않았으면 503을
+    반환합니다. 응답에는 ETag가 포함됩니다.
+    """
+    # The index is built from the local catalog and venues
+    if database.SessionLocal is None:
+        raise HTTPException(status_code=503, detail=CATALOG_UNAVAILABLE)
+    try:
+        payload = nearby_index.nearby(lat, lng, stdate, eddate, radius=radius, on=on, venues=venues)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    body = dumps(payload)
+    etag = content_etag(body)
+    cached = not_modified(request, etag, CONCERTS_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    response = RenderedJSONResponse(content=body)
+    set_cache_headers(response, etag, CONCERTS_CACHE_CONTROL)
+    return response
@@ -0,0 +1,119 @@
+"""Bulk export routes (streaming NDJSON / CSV)"""
+
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.api.dependencies import require_export_token
+from app.services.exports import EXPORTS, MEDIA_TYPES, ExportSpec, ExportUnavailable, open_session, stream_export
+
+router = APIRouter(
+    prefix="/api/export",
+    tags=["exports"],
+    dependencies=[Depends(require_export_token)],
+)
+
+Format = Literal["ndjson", "csv"]
+
+
+def _export_response(
+    spec: ExportSpec,
+    format: str,
+    after: Optional[str],
+    since: Optional[date],
+    until: Optional[date],
+    limit: Optional[int],
+    gzip: bool,
+) -> StreamingResponse:
+    try:
+        after_key = spec.parse_after(after) if after is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor for {spec.name}: {after!r}")
+
+    # Once streaming starts the status is already 200: fail here instead
+    try:
+        db = open_session()
+    except ExportUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    filename = f"{spec.name}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(db, spec, format, after_key, since, until, limit, gzip),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            # Field to pass back as ?after= to resume
+            "X-Export-Key": spec.key,
+        },
+        # Also closes the session when the body was never iterated
+        background=BackgroundTask(db.close),
+    )
+
+
+@router.get("/concerts")
+def export_concerts(
+    format: Format = "ndjson",
+    after: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    gzip: bool = False,
+):
+    """
+    공연 카탈로그 전체 내보내기 (NDJSON 또는 CSV 스트리밍)
+
+    EXPORT_TOKENS에 설정된 Bearer 토큰이 필요하며, 요청 제한 대상이 아닙니다.
+    DB 커서에서 바로 스트리밍하므로 행 수와 관계없이 메모리를 일정하게 사용합니다.
+    데이터베이스가 없거나 커넥션을 얻지 못하면 스트리밍 전에 503을 반환합니다.
+
+    파라미터:
+        format: ndjson (기본값) 또는 csv
+        after: 이어받기 커서 - 마지막으로 받은 행의 mt20id
+        since, until: updated_at 기준 기간 (until은 미포함)
+        limit: 최대 행 수
+        gzip: true이면 gzip 파일로 응답
+    """
+    return _export_response(EXPORTS["concerts"], format, after, since, until, limit, gzip)
+
+
+@router.get("/analytics/events")
+def export_analytics_events(
+    format: Format = "ndjson",
+    after: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    gzip: bool = False,
+):
+    """
+    분석 이벤트 원본 내보내기 (NDJSON 또는 CSV 스트리밍)
+
+    파라미터:
+        after: 이어받기 커서 - 마지막으로 받은 행의 id
+        since, until: created_at 기준 기간 (until은 미포함)
+        나머지는 /api/export/concerts와 동일
+    """
+    return _export_response(EXPORTS["events"], format, after, since, until, limit, gzip)
+
+
+@router.get("/analytics/rollups")
+def export_analytics_rollups(
+    format: Format = "ndjson",
+    after: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    gzip: bool = False,
+):
+    """
+    일별 분석 집계 내보내기 (NDJSON 또는 CSV 스트리밍)
+
+    파라미터:
+        after: 이어받기 커서 - 마지막으로 받은 행의 id
+        since, until: day 기준 기간 (until은 미포함)
+        나머지는 /api/export/concerts와 동일
+    """
+    return _export_response(EXPORTS["rollups"], format, after, since, until, limit, gzip)
@@ -0,0 +1,31 @@
+"""Metrics routes"""
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.api.dependencies import require_metrics_token
+from app.core.config import settings
+from app.core.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(_: None = Depends(require_metrics_token)):
+    """
+    Prometheus 형식의 서비스 메트릭
+
+    라우트별 요청 수/지연시간, KOPIS 호출, 캐시 적중률,
+    DB 커넥션 풀 대기시간, 레이트 리밋 거부, 스레드풀 사용량을 포함합니다.
+
+    METRICS_TOKEN을 Bearer 토큰으로 보내야 하며, 토큰이 없으면 401,
+    틀리거나 METRICS_TOKEN이 설정되지 않았으면 403을 반환합니다.
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    # Rendered on the event loop so threadpool gauges can be read
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,47 @@
+"""Poster image proxy routes"""
+
+from typing import Literal
+
+from fastapi import APIRouter, Request
+from fastapi.responses import FileResponse
+
+from app.core.http_cache import POSTER_CACHE_CONTROL, not_modified
+from app.services.posters import FORMATS, SIZES, poster_service
+
+router = APIRouter(prefix="/api/posters", tags=["posters"])
+
+
+@router.get("/{mt20id}", response_class=FileResponse)
+def get_poster(
+    mt20id: str,
+    request: Request,
+    size: Literal["sm", "md", "lg"] = "md",
+):
+    """
+    공연 포스터 이미지 (리사이즈 및 캐시)
+
+    KOPIS 포스터를 한 번만 받아와 크기별 WebP/JPEG로 변환해 디스크에
+    캐시합니다. Accept 헤더에 image/webp가 있으면 WebP, 없으면 JPEG를
+    반환합니다. <img> 태그에서 바로 쓸 수 있도록 인증이 필요 없습니다.
+
+    파라미터:
+        mt20id: KOPIS 공연 ID
+        size: sm (240px), md (480px), lg (960px) (기본값: md)
+
+    반환값:
+        이미지 파일 (1년간 캐시 가능한 immutable 헤더 포함)
+        목록/북마크에서 본 적 없는 공연이면 404
+
+    브라우저/CDN 캐시 때문에 요청 수가 실제 조회 수와 다르므로 조회 통계에는
+    집계하지 않습니다 (POST /api/analytics/views 사용).
+    """
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    path, etag = poster_service.get(mt20id, SIZES[size], fmt)
+
+    cached = not_modified(request, etag, POSTER_CACHE_CONTROL, vary="Accept")
+    if cached is not None:
+        return cached
+
+    headers = {"ETag": etag, "Cache-Control": POSTER_CACHE_CONTROL, "Vary": "Accept"}
+    # FileResponse streams from disk (zero-copy where the server supports it)
+    return FileResponse(path, media_type=FORMATS[fmt], headers=headers)
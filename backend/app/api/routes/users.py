@@ -1,19 +1,29 @@
 """User-related routes"""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.api.dependencies import get_current_user_id
+from app.api.dependencies import get_current_user_id, get_stream_token_payload
 from app.api.schemas import UserCreate, UserLogin, UserResponse, TokenResponse, BookmarkCreate, BookmarkResponse
-from app.db.database import get_db
+from app.db.database import client_key, get_db, get_read_db
 from app.db.models import User, Bookmark
 from app.core.security import issue_token
 from app.core.config import settings
+from app.core.http_cache import USER_CACHE_CONTROL, make_etag, not_modified, set_cache_headers
+from app.core.responses import RenderedJSONResponse
+from app.services.accounts import delete_account, export_user_data
+from app.services.events import BOOKMARKS_CHANGED, event_hub
 import hashlib
 
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+# Serializes bookmark lists straight to JSON bytes in pydantic-core
+bookmark_list_adapter = TypeAdapter(List[BookmarkResponse])
+
 
 def hash_password(password: str) -> str:
     """Simple password hashing (for demo - use bcrypt in production)"""
@@ -25,6 +35,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return hash_password(plain_password) == hashed_password
 
 
+def bookmark_set_etag(db: Session, user_id: int) -> str:
+    """
+    Version a user's bookmark set with one aggregate query
+
+    Rows are never updated in place, so deletes lower the count and
+    inserts raise the newest created_at. max(id) alone is not enough:
+    SQLite reuses the highest rowid after that row is deleted, so
+    "delete newest, add another" would repeat (count, max id).
+    """
+    count, max_id, newest = db.query(
+        func.count(Bookmark.id), func.max(Bookmark.id), func.max(Bookmark.created_at)
+    ).filter(Bookmark.user_id == user_id).one()
+    return make_etag("bookmarks", user_id, count, max_id, newest)
+
+
 @router.post("/register", response_model=TokenResponse)
 def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     """
@@ -90,29 +115,98 @@ def login_user(login_data: UserLogin, db: Session = Depends(get_db)):
 
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(
+    request: Request,
+    response: Response,
     user_id: int = Depends(get_current_user_id),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     현재 인증된 사용자 정보 조회
+
+    응답에는 ETag가 포함되며, If-None-Match가 일치하면 304를 반환합니다.
     """
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    etag = make_etag("user", user.id, user.updated_at.isoformat())
+    cached = not_modified(request, etag, USER_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
+    set_cache_headers(response, etag, USER_CACHE_CONTROL)
     return UserResponse.model_validate(user)
 
 
-@router.get("/me/bookmarks", response_model=List[BookmarkResponse])
-def get_my_bookmarks(
+@router.delete("/me", status_code=204)
+def delete_my_account(
     user_id: int = Depends(get_current_user_id),
     db: Session = Depends(get_db)
+):
+    """
+    회원 탈퇴 (계정과 북마크, 리뷰 삭제)
+
+    분석 이벤트는 통계용으로 남기되 사용자와의 연결(user_id)을 지웁니다.
+    행을 하나씩 불러와 지우지 않고 테이블별로 묶어서 삭제하며, 한 트랜잭션에서
+    PURGE_BATCH_SIZE행까지만 처리해 다른 요청을 오래 막지 않습니다.
+    이미 발급된 토큰은 만료될 때까지 남지만 사용자 조회는 404가 됩니다.
+    """
+    if db.query(User.id).filter(User.id == user_id).first() is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    delete_account(db, user_id)
+    return None
+
+
+@router.get("/me/export")
+def export_my_data(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
+):
+    """
+    내 데이터 내려받기 (NDJSON 스트리밍)
+
+    한 줄에 하나씩 {"type": ..., "data": {...}} 형식으로 프로필(user),
+    북마크(bookmark), 리뷰(review), 분석 이벤트(event)를 차례로 보냅니다.
+    DB 커서에서 바로 스트리밍하므로 데이터 양과 관계없이 메모리를 일정하게 사용합니다.
+    """
+    if db.query(User.id).filter(User.id == user_id).first() is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return StreamingResponse(
+        export_user_data(user_id, client_key(request)),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="findyourstage-user-{user_id}.ndjson"'},
+    )
+
+
+@router.get(
+    "/me/bookmarks",
+    response_model=List[BookmarkResponse],
+    response_class=RenderedJSONResponse,
+)
+def get_my_bookmarks(
+    request: Request,
+    user_id: int = Depends(get_current_user_id),
+    db: Session = Depends(get_read_db)
 ):
     """
     현재 사용자의 북마크 목록 조회
+
+    응답에는 ETag가 포함되며, If-None-Match가 일치하면
+    북마크를 조회하지 않고 304를 반환합니다.
     """
+    etag = bookmark_set_etag(db, user_id)
+    cached = not_modified(request, etag, USER_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+
     bookmarks = db.query(Bookmark).filter(Bookmark.user_id == user_id).all()
-    return [BookmarkResponse.model_validate(b) for b in bookmarks]
+    models = bookmark_list_adapter.validate_python(bookmarks, from_attributes=True)
+    response = RenderedJSONResponse(content=bookmark_list_adapter.dump_json(models))
+    set_cache_headers(response, etag, USER_CACHE_CONTROL)
+    return response
 
 
 @router.post("/me/bookmarks", response_model=BookmarkResponse, status_code=201)
@@ -145,6 +239,7 @@ def add_bookmark(
     db.commit()
     db.refresh(bookmark)
 
+    event_hub.publish(BOOKMARKS_CHANGED, {"action": "added", "concert_id": bookmark.concert_id}, user_id)
     return BookmarkResponse.model_validate(bookmark)
 
 
@@ -168,4 +263,34 @@ def remove_bookmark(
     db.delete(bookmark)
     db.commit()
 
+    event_hub.publish(BOOKMARKS_CHANGED, {"action": "removed", "concert_id": concert_id}, user_id)
     return None
+
+
+@router.get("/me/events")
+async def stream_my_events(payload: dict = Depends(get_stream_token_payload)):
+    """
+    현재 사용자의 실시간 알림 스트림 (Server-Sent Events)
+
+    북마크 목록과 공연 목록을 주기적으로 다시 조회하는 대신 이 스트림을 열어 두면
+    다음 이벤트를 받습니다:
+
+    - bookmarks_changed: 다른 기기에서 북마크가 추가/삭제됨
+    - starts_soon: 북마크한 공연이 내일 시작함 (연결마다 공연당 한 번)
+    - catalog_updated: 공연 카탈로그가 갱신됨 (목록 다시 조회)
+    - resync: 이벤트를 제때 받지 못해 연결을 닫음 (북마크/목록 다시 조회)
+
+    EventSource는 헤더를 보낼 수 없으므로 `?token=`으로도 인증할 수 있습니다.
+    주기적인 하트비트 주석(`: ping`)이 전송되며, 이벤트 없이 오래 유지된 연결과
+    토큰이 만료된 연결은 서버가 닫습니다 (새 토큰으로 재연결).
+    """
+    try:
+        sub = event_hub.subscribe(int(payload["sub"]))
+    except OverflowError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return StreamingResponse(
+        event_hub.stream(sub, expires_at=payload.get("exp")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
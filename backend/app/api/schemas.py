@@ -1,8 +1,8 @@
 """Pydantic schemas for request/response validation"""
 
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, EmailStr
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, EmailStr, Field
 
 
 # User Schemas
@@ -75,6 +75,23 @@ class ReviewResponse(BaseModel):
         from_attributes = True
 
 
+# Analytics Schemas
+class ViewCreate(BaseModel):
+    concert_id: str = Field(pattern=r"^[A-Za-z0-9]{1,20}$")  # KOPIS mt20id
+
+
+# Batch Schemas
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None  # defaults to the item's index
+    method: Literal["GET"] = "GET"
+    path: str  # e.g. "/api/concerts?stdate=20250101&eddate=20250131"
+    headers: Dict[str, str] = {}  # only If-None-Match
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem]
+
+
 # Token Schema
 class TokenResponse(BaseModel):
     access_token: str
@@ -0,0 +1,174 @@
+"""In-process sub-requests for POST /api/batch
+
+Each sub-request is a GET dispatched straight into the ASGI app, through
+the same middleware stack as a network request (rate limits, metrics and
+tracing see it under its own path), with the response collected in
+memory instead of written to a socket. The batch's sub-requests run
+concurrently, and their JSON bodies are spliced into the batch response
+as-is rather than parsed and re-serialized.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlsplit
+
+from starlette.types import ASGIApp, Message, Scope
+
+from app.core.responses import dumps
+from app.core.security import VERIFIED_TOKEN_KEY
+
+logger = logging.getLogger(__name__)
+
+# Batch request headers every sub-request inherits. Accept-Encoding is
+# left out: bodies are embedded in the batch response, which is
+# compressed as a whole.
+INHERITED_HEADERS = (b"authorization", b"user-agent", b"accept-language")
+
+# Headers a sub-request may set itself
+SUBREQUEST_HEADERS = frozenset({"if-none-match"})
+
+# Sub-response headers echoed back in the batch response
+RESPONSE_HEADERS = ("etag", "cache-control", "retry-after")
+
+# Streams and non-JSON bodies cannot be embedded in a batch response
+EXCLUDED_PATHS = ("/api/batch", "/api/users/me/events", "/api/users/me/export", "/api/export", "/api/posters")
+
+
+def check_path(path: str) -> Optional[str]:
+    """Why `path` is malformed as a sub-request path, or None if it is not"""
+    url = urlsplit(path)
+    # Check the decoded path: it is what dispatch() routes on
+    decoded = unquote(url.path)
+    if url.scheme or url.netloc or url.fragment or not decoded.startswith("/api/"):
+        return "path must be an /api/ path with an optional query string"
+    if any(segment in (".", "..") for segment in decoded.split("/")):
+        return "path must not contain . or .. segments"
+    return None
+
+
+def excluded_path(path: str) -> Optional[str]:
+    """The decoded path if it is one of EXCLUDED_PATHS (or below one), else None"""
+    decoded = unquote(urlsplit(path).path)
+    if any(decoded == p or decoded.startswith(p + "/") for p in EXCLUDED_PATHS):
+        return decoded
+    return None
+
+
+class ResponseBudget:
+    """Body bytes the sub-responses of one batch may still use"""
+
+    def __init__(self, limit: int):
+        self.remaining = limit
+
+    def take(self, size: int) -> bool:
+        if size > self.remaining:
+            return False
+        self.remaining -= size
+        return True
+
+
+@dataclass
+class SubResponse:
+    status: int = 500
+    headers: Dict[str, str] = field(default_factory=dict)
+    content_type: str = ""
+    body: bytearray = field(default_factory=bytearray)
+    too_large: bool = False
+
+
+async def dispatch(
+    app: ASGIApp,
+    parent: Scope,
+    path: str,
+    headers: List[Tuple[bytes, bytes]],
+    token_payload: Dict[str, Any],
+    budget: ResponseBudget,
+) -> SubResponse:
+    """Run GET `path` against `app` in-process, with the batch's client and verified token"""
+    url = urlsplit(path)
+    scope = {
+        "type": "http",
+        "asgi": parent.get("asgi", {"version": "3.0"}),
+        "http_version": parent.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": parent.get("scheme", "http"),
+        "server": parent.get("server"),
+        # Same client as the batch, so per-IP rate limits count sub-requests
+        "client": parent.get("client"),
+        "root_path": parent.get("root_path", ""),
+        "path": unquote(url.path),
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "state": dict(parent.get("state") or {}),
+        VERIFIED_TOKEN_KEY: token_payload,
+    }
+    response = SubResponse()
+    finished = asyncio.Event()
+    body_sent = False
+
+    async def receive() -> Message:
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response.status = message["status"]
+            for name, value in message.get("headers", ()):
+                name = name.decode("latin-1").lower()
+                if name == "content-type":
+                    response.content_type = value.decode("latin-1")
+                elif name in RESPONSE_HEADERS:
+                    response.headers[name] = value.decode("latin-1")
+        elif message["type"] == "http.response.body" and not response.too_large:
+            chunk = message.get("body", b"")
+            if budget.take(len(chunk)):
+                response.body += chunk
+            else:
+                response.too_large = True
+                response.body.clear()
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # ServerErrorMiddleware has sent its 500 and re-raises for the server to log
+        logger.exception("Batch sub-request GET %s failed", path)
+        response.status = 500
+    finally:
+        finished.set()
+    return response
+
+
+def sub_headers(parent: Scope, own: Dict[str, str], request_id: Optional[str]) -> List[Tuple[bytes, bytes]]:
+    """Headers of one sub-request: inherited from the batch plus its own allowed ones"""
+    headers = [(name, value) for name, value in parent["headers"] if name in INHERITED_HEADERS]
+    headers += [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in own.items()]
+    if request_id:
+        headers.append((b"x-request-id", request_id.encode("latin-1")))
+    return headers
+
+
+def _body_json(response: SubResponse) -> bytes:
+    if response.too_large:
+        return dumps({"detail": "Response exceeds the batch size limit"})
+    if not response.body:
+        return b"null"
+    if response.content_type.startswith("application/json"):
+        return bytes(response.body)
+    return dumps(response.body.decode("utf-8", "replace"))
+
+
+def render(results: Sequence[Tuple[str, SubResponse]]) -> bytes:
+    """Batch response body: {"responses": [{id, status, headers, body}, ...]} in request order"""
+    parts = []
+    for request_id, response in results:
+        status = 413 if response.too_large else response.status
+        head = dumps({"id": request_id, "status": status, "headers": response.headers})
+        parts.append(head[:-1] + b',"body":' + _body_json(response) + b"}")
+    return b'{"responses":[' + b",".join(parts) + b"]}"
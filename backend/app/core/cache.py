@@ -1,9 +1,74 @@
-"""Redis caching utilities (will be implemented in step 6)"""
+"""Caching utilities: in-process TTL cache and Redis cache manager (step 6)"""
 
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional, Any
 import json
 
 
+class LocalCache:
+    """Thread-safe in-process TTL cache with LRU eviction
+
+    Used for hot, small payloads (e.g. KOPIS listing pages) that are
+    shared by every request in a worker. Sync routes run in a threadpool,
+    so all access goes through a lock.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a fresh value, or None if missing/expired"""
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None:
+                return None
+            expires_at, value = hit
+            if expires_at < time.monotonic():
+                # Expired entries are kept (until LRU eviction) for get_stale
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """Get a value even if expired (fallback when the source is down)"""
+        with self._lock:
+            hit = self._data.get(key)
+            return hit[1] if hit is not None else None
+
+    def ttl_remaining(self, key: str) -> Optional[float]:
+        """Seconds until the entry expires (negative if expired), None if missing"""
+        with self._lock:
+            hit = self._data.get(key)
+            return hit[0] - time.monotonic() if hit is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set value with TTL (seconds), evicting least recently used entries"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        """Delete key from cache"""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 class CacheManager:
     """Redis cache manager (placeholder for now)"""
 
@@ -0,0 +1,177 @@
+"""Response compression (brotli/gzip negotiation with a size threshold)"""
+
+import gzip
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+
+# Levels for cached bodies, compressed once per entry and reused on every hit
+CACHED_GZIP_LEVEL = 9
+CACHED_BROTLI_QUALITY = 9
+
+# Streams are never held back; images and gzip files are already compressed
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "application/gzip")
+
+
+def _accepted_codings(accept_encoding: str) -> dict:
+    """Parse Accept-Encoding into {coding: q}"""
+    codings = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[name.strip().lower()] = q
+    return codings
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best supported content coding ('br', 'gzip') or None"""
+    if not accept_encoding:
+        return None
+    codings = _accepted_codings(accept_encoding)
+    wildcard = codings.get("*", 0.0)
+    if brotli is not None and codings.get("br", wildcard) > 0:
+        return "br"
+    if codings.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body at cache-entry quality"""
+    if encoding == "br":
+        return brotli.compress(body, quality=CACHED_BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=CACHED_GZIP_LEVEL)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class _ExcludedTypesMixin:
+    """Pass EXCLUDED_CONTENT_TYPES through (Starlette only skips event streams)"""
+
+    async def send_with_compression(self, message: Message) -> None:
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.content_type_is_excluded = content_type.startswith(EXCLUDED_CONTENT_TYPES)
+
+
+class _GZipResponder(_ExcludedTypesMixin, GZipResponder):
+    pass
+
+
+class BrotliResponder(_ExcludedTypesMixin, IdentityResponder):
+    """Brotli counterpart of Starlette's GZipResponder"""
+
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        chunk = self.compressor.process(body)
+        if more_body:
+            return chunk + self.compressor.flush()
+        return chunk + self.compressor.finish()
+
+
+class _CoalescingSend:
+    """
+    Merge leading body chunks until minimum_size is reached
+
+    The responders compress any body sent in more than one message as a
+    stream, whatever its size, so short StreamingResponses (NDJSON exports
+    of a few rows) would be compressed too. Event streams and images
+    (EXCLUDED_CONTENT_TYPES) are passed through unbuffered.
+    """
+
+    def __init__(self, send: Send, minimum_size: int) -> None:
+        self.send = send
+        self.minimum_size = minimum_size
+        self.buffer = bytearray()
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            self.passthrough = content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        more_body = message.get("more_body", False)
+        self.buffer += message.get("body", b"")
+        if more_body and len(self.buffer) < self.minimum_size:
+            return
+
+        self.passthrough = True
+        await self.send({"type": "http.response.body", "body": bytes(self.buffer), "more_body": more_body})
+
+
+class CompressionMiddleware:
+    """
+    Negotiate brotli or gzip for responses above minimum_size
+
+    Responses that already carry Content-Encoding (e.g. precompressed
+    cached listings) and EXCLUDED_CONTENT_TYPES pass through untouched. Strong
+    ETags are weakened when the body is re-encoded, as in nginx.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def coalesced_app(scope: Scope, receive: Receive, send: Send) -> None:
+            await self.app(scope, receive, _CoalescingSend(send, self.minimum_size))
+
+        if encoding == "br":
+            responder = BrotliResponder(coalesced_app, self.minimum_size, self.brotli_quality)
+        else:
+            responder = _GZipResponder(coalesced_app, self.minimum_size, self.gzip_level)
+
+        async def send_with_weak_etag(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and "content-encoding" in headers and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+            await send(message)
+
+        await responder(scope, receive, send_with_weak_etag)
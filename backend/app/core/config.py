@@ -7,22 +7,118 @@ class Settings(BaseSettings):
 
     # KOPIS API
     kopis_api_key: str
+    kopis_base_url: str = "http://www.kopis.or.kr/openApi/restful"
+    kopis_api_keys: str = ""  # extra comma-separated keys to rotate across
+
+    # KOPIS daily quota per key (0 = unlimited)
+    kopis_daily_quota: int = 10000
+    kopis_quota_backend: str = "local"  # "local" (per process; serve.py splits the limit across workers) or "redis"
+
+    # KOPIS resilience (timeouts in seconds)
+    kopis_timeout: float = 15.0  # per attempt
+    kopis_request_budget: float = 20.0  # total per request, including retries
+    kopis_max_retries: int = 2
+    kopis_breaker_threshold: int = 5  # consecutive failures before opening
+    kopis_breaker_reset: float = 30.0  # seconds before a half-open probe
+    kopis_max_concurrency: int = 32
+    kopis_slot_timeout: float = 0.25  # longest wait for a concurrency slot before failing with 503
+    kopis_latency_target: float = 2.0  # slower calls shrink the concurrency limit
 
     # JWT Configuration
     jwt_secret: str
     jwt_alg: str = "HS256"
     jwt_ttl_min: int = 10
 
+    # Rate limiting (disable for local load tests)
+    rate_limit_enabled: bool = True
+
     # CORS Configuration
     allowed_origins: str = ""
     allowed_origin_regex: str = r"https://.*\.vercel\.app$"
 
     # Database (optional for now, will be used in step 3)
-    database_url: str = ""
+    database_url: str = ""  # primary (writes)
+    database_read_urls: str = ""  # comma-separated read replicas
+    read_your_writes_seconds: int = 5  # pin a client to the primary after it writes
+    read_your_writes_backend: str = "local"  # "local" (per worker) or "redis" (shared via REDIS_URL)
+    replica_check_interval: float = 10.0  # seconds between replica health checks
+    replica_max_lag_seconds: float = 30.0  # PostgreSQL replicas lagging more are skipped
 
     # Redis (optional for now, will be used in step 6)
     redis_url: str = "redis://localhost:6379/0"
 
+    # In-process listing cache
+    listing_cache_ttl: int = 300  # seconds
+    listing_cache_max_entries: int = 512
+    listing_segment_unit: str = "month"  # "month" or "week" upstream fetch windows
+    listing_segment_rows: int = 100  # KOPIS page size when fetching a segment
+    listing_segment_max_pages: int = 20
+
+    # Background cache warmer (every worker warms its own caches)
+    warmer_enabled: bool = True
+    warmer_interval: int = 60  # seconds between passes
+    warmer_lead: int = 90  # refresh entries expiring within this many seconds
+    warmer_pages: int = 2  # first N pages of each hot query
+    warmer_top_queries: int = 10  # most requested queries to keep warm
+    warmer_concurrency: int = 2  # parallel segment fetches
+    warmer_queries: str = "20251001-20251031:12,this-month:12"  # always warm (frontend landing query first); see parse_queries
+
+    # Catalog snapshot (mmap'ed by every worker; written by sync_catalog.py)
+    catalog_snapshot_path: str = "catalog_snapshot/catalog.snap"  # empty disables
+    catalog_snapshot_check_interval: float = 5.0  # seconds between checks for a new version
+    catalog_snapshot_max_age: int = 172800  # seconds; older snapshots are not served (0 = no limit)
+
+    # Concert calendar (interval index over the local catalog)
+    calendar_index_ttl: int = 300  # seconds before the index is rebuilt
+
+    # Nearby concerts (grid index over venue coordinates)
+    nearby_index_ttl: int = 300  # seconds before the index is rebuilt
+    nearby_grid_km: float = 2.0  # grid cell size
+    nearby_max_radius_km: float = 50.0
+
+    # Poster proxy (on-disk cache shared by workers)
+    poster_cache_dir: str = "poster_cache"
+    poster_cache_max_mb: int = 512
+    poster_workers: int = 2  # image resizing processes
+
+    # Bulk exports
+    export_tokens: str = ""  # comma-separated Bearer tokens; empty disables exports
+    export_batch_size: int = 1000  # rows per DB fetch and response chunk
+
+    # Analytics partitions (PostgreSQL monthly partitions of the analytics table)
+    analytics_partitions_ahead: int = 3  # months of partitions created ahead
+    analytics_retention_months: int = 13  # raw events kept; 0 keeps everything
+    analytics_sketch_flush_interval: float = 30.0  # seconds between view sketch flushes
+
+    # Server-sent events (/api/users/me/events)
+    events_backend: str = "local"  # "local" (per worker) or "redis" (fan out via REDIS_URL)
+    events_buffer_size: int = 64  # queued events per stream before a slow client is dropped
+    events_heartbeat_interval: float = 15.0  # seconds between keep-alive comments
+    events_idle_timeout: float = 1800.0  # close streams without events for this long
+    events_max_connections: int = 10000  # open streams per worker
+    events_max_per_user: int = 5  # open streams per user per worker
+    events_schedule_interval: float = 60.0  # seconds between "starts soon" checks
+
+    # Request batching (POST /api/batch)
+    batch_max_requests: int = 10  # sub-requests per batch
+    batch_max_response_bytes: int = 2_000_000  # total sub-response bodies per batch
+
+    # Account deletion and user purges
+    purge_batch_size: int = 5000  # rows per delete/update transaction
+
+    # Response compression
+    compression_min_size: int = 1024  # bytes
+
+    # Metrics (/metrics endpoint and request instrumentation)
+    metrics_enabled: bool = True
+    metrics_token: str = ""  # Bearer token for /metrics and /api/health/details; empty disables both
+
+    # Tracing and slow logs
+    slow_request_ms: int = 1000  # log requests slower than this
+    slow_span_ms: int = 200  # spans (SQL, KOPIS, ...) slower than this are logged
+    profiling_token: str = ""  # X-Profile header value that enables profiling
+    profile_dir: str = "profiles"
+
     # OAuth (optional for now, will be used in step 5)
     google_client_id: str = ""
     google_client_secret: str = ""
@@ -31,6 +127,17 @@ class Settings(BaseSettings):
     kakao_client_secret: str = ""
     kakao_redirect_uri: str = ""
 
+    # Production server (serve.py)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0  # 0 = CPU count
+    server_max_requests: int = 10000  # recycle a worker after this many requests; 0 = never
+    server_max_requests_jitter: int = 1000  # random extra requests per worker
+    server_graceful_timeout: int = 30  # seconds to drain in-flight requests on SIGTERM
+    server_keep_alive: int = 5  # seconds
+    server_warmup_timeout: float = 30.0  # longest a worker warms up before serving
+    background_jobs: bool = True  # partition maintenance; serve.py runs it in one worker
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -47,5 +154,19 @@ class Settings(BaseSettings):
             "https://findyourstage.vercel.app",
         ]
 
+    def get_database_read_urls(self) -> List[str]:
+        """Parse comma-separated read replica URLs"""
+        return [u.strip() for u in self.database_read_urls.split(",") if u.strip()]
+
+    def get_export_tokens(self) -> List[str]:
+        """Parse comma-separated export tokens"""
+        return [t.strip() for t in self.export_tokens.split(",") if t.strip()]
+
+    def get_kopis_api_keys(self) -> List[str]:
+        """Primary KOPIS key followed by any extra rotation keys"""
+        keys = [self.kopis_api_key]
+        keys += [k.strip() for k in self.kopis_api_keys.split(",") if k.strip()]
+        return list(dict.fromkeys(keys))
+
 
 settings = Settings()
@@ -0,0 +1,75 @@
+"""HTTP response caching helpers (ETag validators and Cache-Control headers)"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+
+# Cache-Control policies per route
+CONCERTS_CACHE_CONTROL = "private, max-age=60, must-revalidate"
+USER_CACHE_CONTROL = "private, no-cache"
+# Poster variants never change for a given poster; browsers and CDNs
+# may keep them for a year without revalidating
+POSTER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Vary for routes that pick the Content-Encoding themselves (cached
+# pre-compressed bodies) rather than through CompressionMiddleware
+ENCODED_VARY = "Authorization, Accept-Encoding"
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from version parts (ids, counters, content hashes)"""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x1f")
+    return f'"{digest.hexdigest()}"'
+
+
+def content_etag(body: bytes) -> str:
+    """Build a strong ETag from raw content bytes"""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (c.strip() for c in if_none_match.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def set_cache_headers(
+    response: Response,
+    etag: str,
+    cache_control: str,
+    vary: str = "Authorization",
+) -> None:
+    """Attach validator and caching headers to a response"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = vary
+
+
+def not_modified(
+    request: Request,
+    etag: str,
+    cache_control: str,
+    vary: str = "Authorization",
+) -> Optional[Response]:
+    """
+    Return a 304 response if the client already holds this version
+
+    Call this before building or serializing the body so repeat requests
+    cost only the version lookup. Pass the same `vary` as the 200
+    response: a 304 updates the cached response's headers.
+    """
+    if not etag_matches(request.headers.get("if-none-match"), etag):
+        return None
+
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, cache_control, vary)
+    return response
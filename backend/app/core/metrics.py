@@ -0,0 +1,287 @@
+"""Prometheus-style metrics (counters, histograms, gauges) and HTTP middleware
+
+Counters and histograms are sharded per thread: every thread writes only
+to its own preallocated cells, so the hot path takes no locks, and a
+scrape sums the shards. anyio retires idle worker threads and starts new
+ones, so when a thread exits its shard is folded into a shared total and
+dropped; the shard count tracks live threads, not every thread ever seen.
+"""
+
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Latency buckets in seconds (KOPIS calls can take up to the 15s timeout)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Owner:
+    """Thread-local sentinel; it is released when its thread exits"""
+
+    __slots__ = ("cells", "__weakref__")
+
+    def __init__(self, cells: Dict[LabelValues, list]):
+        self.cells = cells
+
+
+def _add_cells(into: Dict[LabelValues, list], shard: Dict[LabelValues, list]) -> None:
+    for labels, cells in list(shard.items()):
+        total = into.get(labels)
+        if total is None:
+            into[labels] = list(cells)
+        else:
+            for i, value in enumerate(cells):
+                total[i] += value
+
+
+class _Metric:
+    """Base class holding per-thread shards of {label values: cells}"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # Live shards by id(), so retiring never matches an equal-valued shard
+        self._shards: Dict[int, Dict[LabelValues, list]] = {}
+        # Totals folded in from threads that have exited
+        self._retired: Dict[LabelValues, list] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _cells(self) -> Dict[LabelValues, list]:
+        try:
+            return self._local.owner.cells
+        except AttributeError:
+            cells: Dict[LabelValues, list] = {}
+            owner = self._local.owner = _Owner(cells)
+            # The thread-local drops the owner when the thread exits
+            weakref.finalize(owner, self._retire, cells)
+            with self._lock:
+                self._shards[id(cells)] = cells
+            return cells
+
+    def _retire(self, cells: Dict[LabelValues, list]) -> None:
+        """Fold an exited thread's shard into the shared total"""
+        with self._lock:
+            del self._shards[id(cells)]
+            _add_cells(self._retired, cells)
+
+    def _merged(self) -> Dict[LabelValues, list]:
+        """Sum cells across all shards (scrape path only)"""
+        merged: Dict[LabelValues, list] = {}
+        with self._lock:
+            _add_cells(merged, self._retired)
+            for shard in self._shards.values():
+                _add_cells(merged, shard)
+        return merged
+
+    def collect(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    type_name = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        cells = self._cells()
+        cell = cells.get(labelvalues)
+        if cell is None:
+            cell = cells[labelvalues] = [0]
+        cell[0] += amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._merged().get(labelvalues, [0])[0]
+
+    def collect(self) -> Iterable[str]:
+        for labels, cells in sorted(self._merged().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(cells[0])}"
+
+
+class Histogram(_Metric):
+    """Histogram with preallocated buckets; cells are [bucket counts..., +Inf, sum]"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        cells = self._cells()
+        cell = cells.get(labelvalues)
+        if cell is None:
+            cell = cells[labelvalues] = [0] * (len(self.buckets) + 2)
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def collect(self) -> Iterable[str]:
+        bounds = self.buckets + (float("inf"),)
+        names = self.labelnames + ("le",)
+        for labels, cells in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, cells):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            label_str = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_str} {_format_value(cells[-1])}"
+            yield f"{self.name}_count{label_str} {cumulative}"
+
+
+class GaugeFunc(_Metric):
+    """Gauge whose samples are computed at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        func: Callable[[], Iterable[Tuple[LabelValues, float]]],
+        labelnames: Sequence[str] = (),
+    ):
+        self.func = func
+        super().__init__(name, documentation, labelnames)
+
+    def collect(self) -> Iterable[str]:
+        for labels, value in self.func():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Registry:
+    """Collection of metrics rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:  # a broken gauge must not break the scrape
+                lines.append(f"# collect failed: {_escape(str(e))}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# -----------------------------
+# Application Metrics
+# -----------------------------
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by method, route and status",
+    ("method", "route", "status"),
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route",
+    ("method", "route"),
+)
+kopis_requests_total = Counter(
+    "kopis_requests_total", "KOPIS upstream calls by endpoint and outcome",
+    ("endpoint", "status"),
+)
+kopis_request_duration = Histogram(
+    "kopis_request_duration_seconds", "KOPIS upstream latency by endpoint",
+    ("endpoint",),
+)
+cache_requests_total = Counter(
+    "cache_requests_total", "Cache lookups by tier and result",
+    ("tier", "result"),
+)
+db_pool_checkout_duration = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+rate_limit_rejections_total = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter",
+    ("route",),
+)
+
+
+def _threadpool_samples() -> Iterable[Tuple[LabelValues, float]]:
+    """Sync-route threadpool usage (must be scraped from the event loop)"""
+    stats = anyio.to_thread.current_default_thread_limiter().statistics()
+    yield ("borrowed",), stats.borrowed_tokens
+    yield ("total",), stats.total_tokens
+    yield ("waiting",), stats.tasks_waiting
+
+
+threadpool_threads = GaugeFunc(
+    "threadpool_threads", "Sync-route threadpool tokens (waiting > 0 means saturated)",
+    _threadpool_samples, ("state",),
+)
+
+
+class MetricsMiddleware:
+    """Record request counts and latency per route template"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, not raw path, to bound cardinality
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - start, method, path)
+            http_requests_total.inc(method, path, status)
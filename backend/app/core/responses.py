@@ -0,0 +1,64 @@
+"""High-performance JSON responses
+
+Uses orjson when installed (stdlib json fallback). Routes that already
+hold JSON-native data should return these responses directly, which
+skips FastAPI's jsonable_encoder pass entirely.
+"""
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Encode what the serializers leave to the caller as jsonable_encoder does"""
+    if isinstance(value, Decimal):
+        exponent = value.as_tuple().exponent
+        return int(value) if isinstance(exponent, int) and exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date, time)):  # stdlib json only
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize content to bytes, matching JSONResponse(jsonable_encoder(content))
+
+    Datetimes are ISO 8601, Decimals become int or float and non-str
+    keys become strings, so service code can dump DB rows directly.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=_default)
+        except TypeError:
+            # Non-str keys are rare; keep the option off the hot path
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RenderedJSONResponse(Response):
+    """Response for a body that was already serialized to JSON bytes"""
+
+    media_type = "application/json"
@@ -2,9 +2,15 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import jwt
-from fastapi import HTTPException, Header
+from fastapi import HTTPException, Header, Request
 
 from app.core.config import settings
+from app.core.tracing import span
+
+# Scope key carrying an already verified token payload. POST /api/batch
+# sets it on its in-process sub-requests so the batch's token is checked
+# once rather than per sub-request; clients cannot set scope keys.
+VERIFIED_TOKEN_KEY = "fys.verified_token"
 
 
 def issue_token(aud: str = "fys-frontend", sub: str = "anon") -> str:
@@ -20,23 +26,43 @@ def issue_token(aud: str = "fys-frontend", sub: str = "anon") -> str:
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_alg)
 
 
-def verify_bearer(authorization: Optional[str] = Header(None)):
-    """Verify Bearer token from Authorization header"""
+def get_token_payload(request: Request, authorization: Optional[str] = Header(None)) -> dict:
+    """Verified payload of the request's Bearer token, decoded once per request"""
+    payload = request.scope.get(VERIFIED_TOKEN_KEY)
+    if payload is not None:
+        return payload
+
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing Bearer token")
 
     token = authorization.split(" ", 1)[1].strip()
 
     try:
-        jwt.decode(
-            token,
-            settings.jwt_secret,
-            algorithms=[settings.jwt_alg],
-            audience="fys-frontend"
-        )
+        with span("auth"):
+            payload = jwt.decode(
+                token,
+                settings.jwt_secret,
+                algorithms=[settings.jwt_alg],
+                audience="fys-frontend"
+            )
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
+    request.scope[VERIFIED_TOKEN_KEY] = payload
+    return payload
+
+
+def peek_token_payload(request: Request) -> Optional[dict]:
+    """Verified payload of the request's Bearer token, or None if it has no valid one"""
+    try:
+        return get_token_payload(request, request.headers.get("authorization"))
+    except HTTPException:
+        return None
+
+
+def verify_bearer(request: Request, authorization: Optional[str] = Header(None)):
+    """Verify Bearer token from Authorization header"""
+    get_token_payload(request, authorization)
     return True
 
 
@@ -0,0 +1,256 @@
+"""Per-request tracing, slow-request logging and an opt-in sampling profiler
+
+Each request gets a Trace (request ID + spans) stored in a contextvar.
+Contextvars are copied into the threadpool that runs sync routes, so
+spans recorded in auth, cache, KOPIS and SQL code land on the request's
+trace. When nothing is being traced, span() is a cheap no-op.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter as TallyCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on spans kept per request (e.g. N+1 query loops)
+MAX_SPANS = 500
+
+# Client-supplied X-Request-ID values outside this are replaced
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class Span:
+    """A timed operation within a request"""
+
+    __slots__ = ("name", "start", "duration", "attrs")
+
+    def __init__(self, name: str, start: float, attrs: Dict[str, Any]):
+        self.name = name
+        self.start = start
+        self.duration = 0.0
+        self.attrs = attrs
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration * 1000, 2),
+            **self.attrs,
+        }
+
+
+class Trace:
+    """Spans and metadata collected for a single request"""
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        # Threads that executed code for this request (for the profiler)
+        self.threads: Set[int] = {threading.get_ident()}
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the request being handled, if any"""
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Record a timed span on the current request's trace"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    trace.threads.add(threading.get_ident())
+    current = Span(name, time.perf_counter(), attrs)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.start
+        trace.add(current)
+
+
+def record_span(name: str, start: float, duration: float, **attrs: Any) -> None:
+    """Record an already-measured span (for event-hook based timing)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.threads.add(threading.get_ident())
+    recorded = Span(name, start, attrs)
+    recorded.duration = duration
+    trace.add(recorded)
+
+
+# -----------------------------
+# Sampling Profiler
+# -----------------------------
+class SamplingProfiler:
+    """
+    Sample the stacks of the threads serving one request
+
+    Samples sys._current_frames() every interval and aggregates them as
+    collapsed stacks (flamegraph.pl / speedscope format). Only threads
+    that recorded a span for the traced request are sampled, so other
+    concurrent requests do not pollute the profile.
+    """
+
+    def __init__(self, trace: Trace, interval: float = 0.001):
+        self.trace = trace
+        self.interval = interval
+        self.stacks: TallyCounter = TallyCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fys-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in list(self.trace.threads):
+                frame = frames.get(ident)
+                if frame is None or ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, directory: str) -> str:
+        """Write collapsed stacks to <directory>/<timestamp>-<random id>.folded"""
+        os.makedirs(directory, exist_ok=True)
+        # Never derived from the client's request ID
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:12]}.folded"
+        path = os.path.join(directory, name)
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+# -----------------------------
+# Middleware
+# -----------------------------
+def _slow_log(trace: Trace, status: int, duration: float) -> None:
+    """Log only the offending spans of a slow request"""
+    span_threshold = settings.slow_span_ms / 1000
+    offending = [s for s in trace.spans if s.duration >= span_threshold]
+    slow_request = duration * 1000 >= settings.slow_request_ms
+
+    if not offending and not slow_request:
+        return
+    if not offending:
+        # Slow overall without a single culprit: show the biggest spans
+        offending = sorted(trace.spans, key=lambda s: s.duration, reverse=True)[:5]
+
+    logger.warning(json.dumps({
+        "event": "slow_request",
+        "request_id": trace.request_id,
+        "method": trace.method,
+        "path": trace.path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 2),
+        "span_count": len(trace.spans) + trace.dropped,
+        "spans": [s.to_dict(trace.start) for s in offending],
+    }, ensure_ascii=False))
+
+
+class TracingMiddleware:
+    """
+    Assign a request ID, collect spans and log slow requests
+
+    The request ID is taken from X-Request-ID when it is 1-64 characters
+    of [A-Za-z0-9._-] (otherwise generated) and echoed in the response.
+    Sending X-Profile equal to PROFILING_TOKEN samples the request's
+    stacks and writes them to PROFILE_DIR.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_id = headers.get("x-request-id") or ""
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        trace = Trace(request_id, scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+
+        profiler = None
+        if settings.profiling_token and headers.get("x-profile") == settings.profiling_token:
+            profiler = SamplingProfiler(trace)
+            profiler.start()
+
+        status = 500
+        stream_started: Optional[float] = None
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status, stream_started
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = MutableHeaders(raw=message["headers"])
+                response_headers["X-Request-ID"] = trace.request_id
+                if response_headers.get("content-type", "").startswith("text/event-stream"):
+                    stream_started = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # Event streams stay open by design; only time their setup
+            duration = (stream_started or time.perf_counter()) - trace.start
+            _current_trace.reset(token)
+            if profiler is not None:
+                path = await asyncio.to_thread(self._finish_profile, profiler)
+                logger.warning("Profile for request %s written to %s", trace.request_id, path)
+            _slow_log(trace, status, duration)
+
+    @staticmethod
+    def _finish_profile(profiler: SamplingProfiler) -> str:
+        profiler.stop()
+        return profiler.dump(settings.profile_dir)
@@ -1,43 +1,345 @@
-"""Database connection and session management"""
+"""Database connection and session management
 
-from sqlalchemy import create_engine
+Writes go to the primary (`engine` / `SessionLocal`). When
+DATABASE_READ_URLS lists replicas, read-only routes use `get_read_db`,
+which picks a healthy replica round-robin and falls back to the primary
+when none is healthy. A client that has just written is pinned to the
+primary for READ_YOUR_WRITES_SECONDS so it never reads its own write
+from a lagging replica. Clients are keyed by user id, so a refreshed
+token stays pinned. With READ_YOUR_WRITES_BACKEND=redis that marker is
+shared, so it holds whichever worker serves the next read.
+"""
+
+import hashlib
+import itertools
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
+from app.core.cache import LocalCache
 from app.core.config import settings
+from app.core.metrics import GaugeFunc, db_pool_checkout_duration
+from app.core.security import peek_token_payload
+from app.core.tracing import record_span
+
+logger = logging.getLogger(__name__)
 
 # Create SQLAlchemy engine
 engine = None
 SessionLocal = None
 
+# Read replicas (empty when not configured)
+replicas: List["Replica"] = []
+
 # Base class for models
 Base = declarative_base()
 
 
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_duration.observe(time.perf_counter() - start)
+
+
+def _pool_kwargs(database_url: str) -> dict:
+    """Use the timed pool unless SQLAlchemy needs a non-queue pool (in-memory SQLite)"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {"poolclass": TimedQueuePool}
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores REFERENCES ... ON DELETE unless enabled per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _create_engine(database_url: str) -> Engine:
+    created = create_engine(
+        database_url,
+        pool_pre_ping=True,  # Test connections before using
+        echo=False,  # Set to True for SQL query logging
+        **_pool_kwargs(database_url),
+    )
+    if created.dialect.name == "sqlite":
+        event.listen(created, "connect", _enable_sqlite_foreign_keys)
+    instrument_engine(created)
+    return created
+
+
 def init_db():
     """Initialize database connection"""
-    global engine, SessionLocal
+    global engine, SessionLocal, replicas
 
     if not settings.database_url:
         # Database not configured yet
         return None
 
-    engine = create_engine(
-        settings.database_url,
-        pool_pre_ping=True,  # Test connections before using
-        echo=False  # Set to True for SQL query logging
-    )
+    engine = _create_engine(settings.database_url)
 
     SessionLocal = sessionmaker(
         autocommit=False,
         autoflush=False,
         bind=engine
     )
+    track_writes(SessionLocal)
+
+    replicas = [
+        Replica(f"replica{i}", _create_engine(url))
+        for i, url in enumerate(settings.get_database_read_urls())
+    ]
+    if replicas:
+        replica_monitor.start()
 
     return engine
 
 
-def get_db():
+def after_fork() -> None:
+    """
+    Reset per-process database state in a forked worker
+
+    Pooled connections inherited from the parent must not be shared, and
+    the replica monitor thread does not survive fork.
+    """
+    if engine is not None:
+        engine.dispose(close=False)
+    for replica in replicas:
+        replica.engine.dispose(close=False)
+    if replicas:
+        replica_monitor.start()
+
+
+def warm_pools() -> int:
+    """Open every pooled connection up front; returns connections opened"""
+    opened = 0
+    for target in [engine] + [replica.engine for replica in replicas]:
+        if target is None or not isinstance(target.pool, QueuePool):
+            continue
+        connections = []
+        try:
+            for _ in range(target.pool.size()):
+                conn = target.connect()
+                connections.append(conn)
+                conn.execute(text("SELECT 1"))
+                opened += 1
+        finally:
+            for conn in connections:
+                conn.close()
+    return opened
+
+
+# -----------------------------
+# Read Replicas
+# -----------------------------
+class Replica:
+    """A read replica engine and its last known health"""
+
+    def __init__(self, name: str, replica_engine: Engine):
+        self.name = name
+        self.engine = replica_engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+        guard_read_only(self.SessionLocal)
+
+        @event.listens_for(replica_engine, "handle_error")
+        def _on_error(context):
+            # Fail over right away instead of waiting for the next check
+            if context.is_disconnect and self.healthy:
+                logger.warning("Replica %s disconnected; routing reads to the primary", self.name)
+                self.healthy = False
+
+    def check(self) -> None:
+        """SELECT 1 (and replication lag on PostgreSQL)"""
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                if self.engine.dialect.name == "postgresql":
+                    self.lag = conn.execute(text(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    )).scalar()
+            healthy = self.lag is None or self.lag <= settings.replica_max_lag_seconds
+        except Exception as e:
+            logger.warning("Replica %s health check failed: %s", self.name, e)
+            healthy = False
+
+        if healthy != self.healthy:
+            logger.warning("Replica %s is now %s", self.name, "healthy" if healthy else "unhealthy")
+        self.healthy = healthy
+
+
+class ReplicaMonitor:
+    """Daemon thread that health-checks replicas every REPLICA_CHECK_INTERVAL"""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fys-replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.replica_check_interval):
+            for replica in list(replicas):
+                replica.check()
+
+
+replica_monitor = ReplicaMonitor()
+_round_robin = itertools.count()
+
+
+class RedisRecentWriters:
+    """Recent-writer markers shared by all workers and instances"""
+
+    def __init__(self, redis_url: str, ttl: int):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url, socket_timeout=0.2)
+        self.ttl = ttl
+        self._errors = redis.RedisError
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"db:recent-writer:{key}"
+
+    def set(self, key: str, value: bool) -> None:
+        try:
+            self.client.set(self._key(key), 1, ex=self.ttl)
+        except self._errors as e:
+            logger.warning("Could not record recent writer: %s", e)
+
+    def get(self, key: str) -> Optional[bool]:
+        try:
+            return True if self.client.exists(self._key(key)) else None
+        except self._errors:
+            # The primary is always consistent; prefer it when unsure
+            return True
+
+
+def make_recent_writers(backend: str, redis_url: str, ttl: int):
+    """Recent-writer store for the configured backend ("local" or "redis")"""
+    if backend == "redis":
+        try:
+            return RedisRecentWriters(redis_url, ttl)
+        except ImportError:
+            logger.warning("redis is not installed; tracking recent writers per process")
+    return LocalCache(max_entries=10000, ttl=ttl)
+
+
+# Clients that wrote recently (key -> True) are pinned to the primary.
+# With several workers, only the redis backend lets the worker serving
+# the next read see a write handled by another worker.
+_recent_writers = make_recent_writers(
+    settings.read_your_writes_backend, settings.redis_url, settings.read_your_writes_seconds
+)
+
+
+def client_key(request: Request) -> str:
+    """
+    Identify a client for read-your-writes: its user id (`sub`), which
+    survives token refreshes, or its address for anonymous clients
+    """
+    payload = peek_token_payload(request) or {}
+    sub = str(payload.get("sub", ""))
+    if sub.isdigit():
+        return f"user:{sub}"
+    address = request.client.host if request.client else ""
+    return "addr:" + hashlib.blake2b(address.encode(), digest_size=12).hexdigest()
+
+
+def track_writes(factory: sessionmaker) -> None:
+    """Pin a session's client to the primary once its writes commit"""
+
+    @event.listens_for(factory, "after_flush")
+    def _after_flush(session, flush_context):
+        session.info["wrote"] = True
+
+    @event.listens_for(factory, "do_orm_execute")
+    def _on_execute(state):
+        if state.is_insert or state.is_update or state.is_delete:
+            state.session.info["wrote"] = True
+
+    @event.listens_for(factory, "after_commit")
+    def _after_commit(session):
+        key = session.info.get("client_key")
+        if session.info.pop("wrote", False) and key:
+            _recent_writers.set(key, True)
+
+
+def guard_read_only(factory: sessionmaker) -> None:
+    """Refuse to flush changes through a replica session"""
+
+    @event.listens_for(factory, "before_flush")
+    def _before_flush(session, flush_context, instances):
+        if session.new or session.dirty or session.deleted:
+            raise RuntimeError("Attempted to write through a read-replica session")
+
+
+def pick_replica() -> Optional[Replica]:
+    """Next healthy replica round-robin, or None"""
+    healthy = [r for r in replicas if r.healthy]
+    if not healthy:
+        return None
+    return healthy[next(_round_robin) % len(healthy)]
+
+
+def read_session(key: Optional[str] = None) -> Session:
+    """Session for read-only work: a healthy replica unless `key` wrote recently"""
+    if SessionLocal is None:
+        raise RuntimeError("Database not initialized. Call init_db() first.")
+    if key is None or _recent_writers.get(key) is None:
+        replica = pick_replica()
+        if replica is not None:
+            return replica.SessionLocal()
+    return SessionLocal()
+
+
+def replica_status() -> List[dict]:
+    return [{"name": r.name, "healthy": r.healthy, "lag": r.lag} for r in replicas]
+
+
+def instrument_engine(target_engine):
+    """Record every SQL statement as a span on the current request trace"""
+
+    @event.listens_for(target_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(target_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        record_span(
+            "sql",
+            start,
+            time.perf_counter() - start,
+            statement=statement[:500],
+            rows=cursor.rowcount,
+        )
+
+
+def get_db(request: Request):
     """
     Dependency to get database session
 
@@ -50,6 +352,23 @@ def get_db():
         raise RuntimeError("Database not initialized. Call init_db() first.")
 
     db = SessionLocal()
+    db.info["client_key"] = client_key(request)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """
+    Dependency for read-only routes (served from a replica when possible)
+
+    Usage:
+        @app.get("/items")
+        def get_items(db: Session = Depends(get_read_db)):
+            ...
+    """
+    db = read_session(client_key(request))
     try:
         yield db
     finally:
@@ -62,3 +381,28 @@ def create_tables():
         raise RuntimeError("Database not initialized")
 
     Base.metadata.create_all(bind=engine)
+
+
+def _pool_samples():
+    """Connection pool usage for /metrics"""
+    pool = engine.pool if engine is not None else None
+    if pool is None or not hasattr(pool, "checkedout"):
+        return
+    yield ("checked_out",), pool.checkedout()
+    yield ("idle",), pool.checkedin()
+    yield ("overflow",), max(pool.overflow(), 0)
+
+
+db_pool_connections = GaugeFunc(
+    "db_pool_connections", "DB connection pool usage", _pool_samples, ("state",),
+)
+
+
+def _replica_samples():
+    for replica in replicas:
+        yield (replica.name,), 1 if replica.healthy else 0
+
+
+db_replica_healthy = GaugeFunc(
+    "db_replica_healthy", "Read replica health (1 = serving reads)", _replica_samples, ("replica",),
+)
@@ -1,7 +1,7 @@
 """Database models"""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Date, DateTime, Boolean, Float, ForeignKey, CheckConstraint, UniqueConstraint, Index, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 
 from app.db.database import Base
@@ -20,10 +20,11 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
-    # Relationships
-    bookmarks = relationship("Bookmark", back_populates="user", cascade="all, delete-orphan")
-    reviews = relationship("Review", back_populates="user", cascade="all, delete-orphan")
-    analytics = relationship("Analytics", back_populates="user")
+    # Relationships. Deleting a user leaves children to the foreign keys'
+    # ON DELETE instead of loading them (see app/services/accounts.py)
+    bookmarks = relationship("Bookmark", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    reviews = relationship("Review", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    analytics = relationship("Analytics", back_populates="user", passive_deletes="all")
 
     def __repr__(self):
         return f"<User(id={self.id}, email='{self.email}', provider='{self.provider}')>"
@@ -57,7 +58,7 @@ class Review(Base):
     __tablename__ = "reviews"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     concert_id = Column(String(50), nullable=False, index=True)
     rating = Column(Integer, nullable=False)  # 1-5 stars
     content = Column(Text)
@@ -77,18 +78,108 @@ class Review(Base):
 
 
 class Analytics(Base):
-    """Analytics model for tracking user events"""
+    """
+    Analytics model for tracking user events
+
+    On PostgreSQL the table is range-partitioned by month on created_at
+    (primary key (id, created_at), see app/db/partitions.py); the ORM only
+    needs id to identify rows. Indexes follow the query shapes: per-concert
+    and per-user time ranges, plus created_at (BRIN on PostgreSQL) for
+    day rollups and retention.
+    """
     __tablename__ = "analytics"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    event_type = Column(String(50), nullable=False, index=True)  # 'view', 'search', 'bookmark', 'review'
-    concert_id = Column(String(50), index=True)
+    event_type = Column(String(50), nullable=False)  # 'view', 'search', 'bookmark', 'review'
+    concert_id = Column(String(50))
     event_data = Column(JSON)  # Additional event data (renamed from 'metadata' to avoid SQLAlchemy reserved word)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_analytics_concert_created', 'concert_id', 'created_at'),
+        Index('ix_analytics_user_created', 'user_id', 'created_at'),
+        # Same as the partitioning migration; B-tree where BRIN is unavailable
+        Index('ix_analytics_created_at', 'created_at', postgresql_using='brin'),
+    )
 
     # Relationships
     user = relationship("User", back_populates="analytics")
 
     def __repr__(self):
         return f"<Analytics(event_type='{self.event_type}', concert_id='{self.concert_id}')>"
+
+
+class AnalyticsRollup(Base):
+    """Daily event counts per event type and concert"""
+    __tablename__ = "analytics_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    event_type = Column(String(50), nullable=False)
+    concert_id = Column(String(50))
+    count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('day', 'event_type', 'concert_id', name='uq_rollup_day_event_concert'),
+    )
+
+    def __repr__(self):
+        return f"<AnalyticsRollup(day={self.day}, event_type='{self.event_type}', count={self.count})>"
+
+
+class AnalyticsSketch(Base):
+    """Serialized HyperLogLog / heavy-hitter sketch for one day (see app/services/sketches.py)"""
+    __tablename__ = "analytics_sketches"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(20), nullable=False)  # 'viewers' (HyperLogLog), 'popular' (Count-Min + top keys)
+    day = Column(Date, nullable=False)
+    key = Column(String(50), nullable=False, default="")  # concert ID, '' for all concerts
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('kind', 'key', 'day', name='uq_sketch_kind_key_day'),
+    )
+
+    def __repr__(self):
+        return f"<AnalyticsSketch(kind='{self.kind}', day={self.day}, key='{self.key}')>"
+
+
+class Concert(Base):
+    """Local copy of the KOPIS catalog (synced from listings)"""
+    __tablename__ = "concerts"
+
+    mt20id = Column(String(20), primary_key=True)  # KOPIS performance ID
+    prfnm = Column(String(300), nullable=False)
+    prfpdfrom = Column(Date, index=True)
+    prfpdto = Column(Date, index=True)
+    fcltynm = Column(String(300))
+    poster = Column(String(500))
+    genrenm = Column(String(50))
+    area = Column(String(50))
+    openrun = Column(Boolean, default=False, nullable=False)
+    prfstate = Column(String(20))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Concert(mt20id='{self.mt20id}', prfnm='{self.prfnm}')>"
+
+
+class Venue(Base):
+    """KOPIS facility (synced from prfplc) with coordinates for nearby lookups"""
+    __tablename__ = "venues"
+
+    mt10id = Column(String(20), primary_key=True)  # KOPIS facility ID
+    fcltynm = Column(String(300), nullable=False, index=True)
+    sidonm = Column(String(50))
+    gugunnm = Column(String(50))
+    adres = Column(String(500))
+    lat = Column(Float)  # KOPIS 'la'
+    lng = Column(Float)  # KOPIS 'lo'
+    seatscale = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Venue(mt10id='{self.mt10id}', fcltynm='{self.fcltynm}')>"
@@ -0,0 +1,210 @@
+"""Monthly partition management for the analytics table
+
+On PostgreSQL `analytics` is declaratively partitioned by RANGE
+(created_at), one partition per month named analytics_yYYYYmMM, plus a
+DEFAULT partition as a safety net. This module:
+
+- creates partitions ANALYTICS_PARTITIONS_AHEAD months ahead, so inserts
+  never land in the default partition
+- applies retention by detaching and dropping whole months older than
+  ANALYTICS_RETENTION_MONTHS, a metadata operation instead of a mass DELETE
+- deletes expired rows from the default partition, which only holds rows
+  that arrived before their month's partition existed (backfills, clock
+  skew, a maintenance outage) and so stays small
+
+SQLite (tests, local load tests) has no partitioning: the table is a
+plain heap and automatic retention skips it. A chunked DELETE is
+available as an explicit step (prune_analytics.py --delete), never run
+from the background thread.
+
+Maintenance runs at startup and then every few hours from a daemon
+thread in the worker that runs background jobs (BACKGROUND_JOBS). Every
+step is idempotent, so overlapping instances are harmless.
+"""
+
+import logging
+import re
+import threading
+from datetime import date, datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT = "analytics"
+DEFAULT_PARTITION = "analytics_default"  # created by the partitioning migration
+PARTITION_PATTERN = re.compile(r"^analytics_y(\d{4})m(\d{2})$")
+MAINTENANCE_INTERVAL = 6 * 3600  # seconds
+DELETE_CHUNK = 10000
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def is_partitioned(engine: Engine) -> bool:
+    if engine.dialect.name != "postgresql":
+        return False
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name)"
+        ), {"name": PARENT}).scalar()
+
+
+def list_partitions(engine: Engine) -> List[str]:
+    with engine.connect() as conn:
+        return list(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name ORDER BY c.relname"
+        ), {"name": PARENT}).scalars())
+
+
+def ensure_partitions(engine: Engine, months_ahead: int, today: Optional[date] = None) -> List[str]:
+    """Create monthly partitions from this month to `months_ahead` ahead"""
+    if not is_partitioned(engine):
+        return []
+    existing = set(list_partitions(engine))
+    current = month_start(today or datetime.utcnow().date())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        with engine.begin() as conn:
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} '
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+        created.append(name)
+    if created:
+        logger.info("Created analytics partitions: %s", ", ".join(created))
+    return created
+
+
+def retention_cutoff(keep_months: int, today: Optional[date] = None) -> date:
+    """First day of the oldest month kept"""
+    return add_months(month_start(today or datetime.utcnow().date()), -keep_months)
+
+
+def expired_partitions(names: Iterable[str], cutoff: date) -> List[str]:
+    """Monthly partitions whose whole month is before `cutoff`"""
+    expired = []
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if not match:
+            continue  # default partition
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def apply_retention(engine: Engine, keep_months: int, today: Optional[date] = None, drop: bool = True) -> List[str]:
+    """
+    Remove monthly partitions older than `keep_months` whole months
+
+    Partitions are detached (and dropped unless drop=False, which leaves
+    them as standalone tables for archiving); rows before the cutoff in the
+    default partition are deleted. Unpartitioned tables are left alone:
+    see delete_before. Returns the partitions removed.
+    """
+    if keep_months <= 0:
+        return []
+    cutoff = retention_cutoff(keep_months, today)
+
+    if not is_partitioned(engine):
+        logger.info("analytics is not partitioned; retention skipped (prune_analytics.py --delete)")
+        return []
+
+    names = list_partitions(engine)
+    removed = []
+    for name in expired_partitions(names, cutoff):
+        with engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"'))
+            if drop:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+        removed.append(name)
+    if removed:
+        logger.info("Analytics retention removed partitions: %s", ", ".join(removed))
+
+    if DEFAULT_PARTITION in names:
+        deleted = delete_before(engine, cutoff, table=DEFAULT_PARTITION)
+        if deleted:
+            logger.info("Analytics retention deleted %d rows from %s", deleted, DEFAULT_PARTITION)
+    return removed
+
+
+def delete_before(engine: Engine, cutoff: date, table: str = PARENT) -> int:
+    """
+    Chunked DELETE of events before `cutoff`
+
+    Used for unpartitioned tables and for the default partition. Each
+    chunk is its own transaction so locks stay short, but every row is
+    still deleted (and vacuumed) one by one; on a large unpartitioned
+    table run it deliberately. Returns the rows deleted.
+    """
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            deleted = conn.execute(text(
+                f'DELETE FROM "{table}" WHERE id IN '
+                f'(SELECT id FROM "{table}" WHERE created_at < :cutoff LIMIT {DELETE_CHUNK})'
+            ), {"cutoff": cutoff}).rowcount
+        total += deleted
+        if deleted < DELETE_CHUNK:
+            break
+    return total
+
+
+def maintain(engine: Engine) -> None:
+    """Create upcoming partitions, then apply retention"""
+    try:
+        ensure_partitions(engine, settings.analytics_partitions_ahead)
+        apply_retention(engine, settings.analytics_retention_months)
+    except Exception:
+        # Another worker may be doing the same; retry next interval
+        logger.exception("Analytics partition maintenance failed")
+
+
+class PartitionMaintainer:
+    """Daemon thread running maintain() at startup and every few hours"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, engine: Engine) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(engine,), name="fys-partitions", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, engine: Engine) -> None:
+        while True:
+            maintain(engine)
+            if self._stop.wait(MAINTENANCE_INTERVAL):
+                return
+
+
+partition_maintainer = PartitionMaintainer()
@@ -1,17 +1,56 @@
 """FindYourStage Backend - Main Application Entry Point"""
 
+import asyncio
 import time
+from contextlib import asynccontextmanager
 from typing import Dict, List
 
 from dotenv import load_dotenv
 load_dotenv()  # Load .env for local development
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, rate_limit_rejections_total
+from app.core.tracing import TracingMiddleware
+from app.core.responses import FastJSONResponse
 from app.api.routes import api_router
-from app.db.database import init_db
+from app.db import database
+from app.db.database import init_db, replica_monitor
+from app.db.partitions import partition_maintainer
+from app.services.analytics import analytics_service
+from app.services.events import event_hub, event_scheduler
+from app.services.posters import poster_service
+from app.services.warmer import cache_warmer, validate_queries
+
+# -----------------------------
+# Lifespan (background tasks)
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Caches are per process, so every worker warms its own
+    if settings.warmer_enabled:
+        cache_warmer.start()
+    # Singleton jobs: serve.py enables them in one worker only
+    if settings.background_jobs and database.engine is not None:
+        partition_maintainer.start(database.engine)
+    analytics_service.start()
+    event_hub.start()
+    event_scheduler.start()
+    yield
+    event_scheduler.stop()
+    event_hub.stop()
+    # Joins the warmer thread, which may be mid-pass: keep the loop free
+    await asyncio.to_thread(cache_warmer.stop)
+    partition_maintainer.stop()
+    analytics_service.stop()
+    poster_service.shutdown()
+    replica_monitor.stop()
+
 
 # -----------------------------
 # App Initialization
@@ -19,12 +58,18 @@ from app.db.database import init_db
 app = FastAPI(
     title="FindYourStage Backend",
     version="1.0.0",
-    description="공연 정보 검색 및 추천 서비스 API"
+    description="공연 정보 검색 및 추천 서비스 API",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # Initialize database
 init_db()
 
+# Fail at startup on a malformed WARMER_QUERIES, not on every warming pass
+if settings.warmer_enabled:
+    validate_queries(settings.warmer_queries)
+
 # -----------------------------
 # CORS Middleware
 # -----------------------------
@@ -43,36 +88,80 @@ app.add_middleware(
 RATE_LIMITS = {
     "/api/token": (10, 60),      # 10 requests / 60 seconds
     "/api/concerts": (50, 60),   # 50 requests / 60 seconds
+    "/api/analytics/views": (120, 60),  # 120 requests / 60 seconds
+    # Batch sub-requests also count against their own paths' limits
+    "/api/batch": (20, 60),      # 20 requests / 60 seconds
 }
 rate_table: Dict[str, List[float]] = {}
 
 
-@app.middleware("http")
-async def rate_limit(request: Request, call_next):
-    """Simple in-memory rate limiting by IP and route"""
-    path = request.url.path
-    limit_cfg = RATE_LIMITS.get(path)
+class RateLimitMiddleware:
+    """
+    Simple in-memory rate limiting by IP and route
+
+    Plain ASGI rather than @app.middleware("http"): that wrapper adds a
+    task group and memory stream to every response, which long-lived
+    event streams would hold for their whole lifetime.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit_cfg = None
+        if scope["type"] == "http" and settings.rate_limit_enabled:
+            limit_cfg = RATE_LIMITS.get(scope["path"])
+
+        if not limit_cfg:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        max_req, window = limit_cfg
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        key = f"{path}:{ip}"
+        now = time.time()
+        window_start = now - window
+
+        # Get timestamps for this key and filter old ones
+        timestamps = rate_table.get(key, [])
+        timestamps = [t for t in timestamps if t >= window_start]
 
-    if not limit_cfg:
-        return await call_next(request)
+        if len(timestamps) >= max_req:
+            rate_limit_rejections_total.inc(path)
+            # Exceptions raised in middleware bypass FastAPI's handlers (-> 500)
+            response = JSONResponse(status_code=429, content={"detail": "Too many requests"})
+            await response(scope, receive, send)
+            return
 
-    max_req, window = limit_cfg
-    ip = request.client.host if request.client else "unknown"
-    key = f"{path}:{ip}"
-    now = time.time()
-    window_start = now - window
+        timestamps.append(now)
+        rate_table[key] = timestamps
 
-    # Get timestamps for this key and filter old ones
-    timestamps = rate_table.get(key, [])
-    timestamps = [t for t in timestamps if t >= window_start]
+        await self.app(scope, receive, send)
 
-    if len(timestamps) >= max_req:
-        raise HTTPException(status_code=429, detail="Too many requests")
 
-    timestamps.append(now)
-    rate_table[key] = timestamps
+app.add_middleware(RateLimitMiddleware)
 
-    return await call_next(request)
+
+# -----------------------------
+# Compression Middleware
+# -----------------------------
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_min_size)
+
+
+# -----------------------------
+# Tracing Middleware
+# -----------------------------
+app.add_middleware(TracingMiddleware)
+
+
+# -----------------------------
+# Metrics Middleware
+# -----------------------------
+# Added last so latency covers every other middleware
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 
 # -----------------------------
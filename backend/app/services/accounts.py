@@ -0,0 +1,142 @@
+"""Account deletion, bulk user purges and per-user data export
+
+Users are deleted with set-based statements, never by loading their rows
+through the ORM. Each statement touches at most PURGE_BATCH_SIZE rows
+and commits on its own, so a purge never holds locks on the hot tables
+for long, and even a heavy user takes only a handful of statements:
+
+1. analytics.user_id is set to NULL (events stay for aggregate stats)
+2. bookmarks and reviews are deleted
+3. the users rows are deleted; the foreign keys' ON DELETE CASCADE /
+   SET NULL cover rows written for those users after steps 1-2
+
+Step 3 alone would be enough (database.py turns on PRAGMA foreign_keys
+for SQLite, so the ON DELETE actions hold there too), but it would
+process every child row in one transaction.
+
+The data export streams a user's rows from server-side cursors as NDJSON,
+so memory does not grow with the number of rows.
+"""
+
+import logging
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.core.tracing import span
+from app.db import database
+from app.db.models import Analytics, Bookmark, Review, User
+
+logger = logging.getLogger(__name__)
+
+# Users per statement in bulk purges (size of the IN list)
+USER_CHUNK = 500
+
+# Export sections: (line type, table, order)
+EXPORT_SECTIONS = [
+    ("bookmark", Bookmark.__table__, ("id",)),
+    ("review", Review.__table__, ("id",)),
+    # Follows ix_analytics_user_created
+    ("event", Analytics.__table__, ("created_at", "id")),
+]
+
+
+def _in_batches(db: Session, statement, batch_size: int) -> int:
+    """Run a row-limited statement until it affects fewer than `batch_size` rows; returns rows affected"""
+    total = 0
+    while True:
+        rowcount = db.execute(statement, execution_options={"synchronize_session": False}).rowcount
+        db.commit()
+        total += rowcount
+        if rowcount < batch_size:
+            return total
+
+
+def purge_users(db: Session, user_ids: Sequence[int], batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Delete users and their data; returns rows affected per table"""
+    batch_size = batch_size or settings.purge_batch_size
+    ids = sorted(set(user_ids))
+    counts = {"analytics": 0, "bookmarks": 0, "reviews": 0, "users": 0}
+
+    for i in range(0, len(ids), USER_CHUNK):
+        chunk = ids[i:i + USER_CHUNK]
+        with span("purge_users"):
+            # (id, created_at) is the partitioned table's primary key
+            events = select(Analytics.id, Analytics.created_at).where(Analytics.user_id.in_(chunk)).limit(batch_size)
+            counts["analytics"] += _in_batches(
+                db,
+                update(Analytics)
+                .where(tuple_(Analytics.id, Analytics.created_at).in_(events))
+                .values(user_id=None),
+                batch_size,
+            )
+            for name, model in (("bookmarks", Bookmark), ("reviews", Review)):
+                rows = select(model.id).where(model.user_id.in_(chunk)).limit(batch_size)
+                counts[name] += _in_batches(db, delete(model).where(model.id.in_(rows)), batch_size)
+
+            result = db.execute(delete(User).where(User.id.in_(chunk)), execution_options={"synchronize_session": False})
+            db.commit()
+            counts["users"] += result.rowcount
+
+    logger.info("Purged %d users: %s", counts["users"], counts)
+    return counts
+
+
+def delete_account(db: Session, user_id: int) -> Dict[str, int]:
+    """Delete one user and their data (see purge_users)"""
+    return purge_users(db, [user_id])
+
+
+def user_data_counts(db: Session, user_ids: Sequence[int]) -> Dict[str, int]:
+    """Rows a purge of `user_ids` would affect, per table"""
+    ids = sorted(set(user_ids))
+    counts = {"analytics": 0, "bookmarks": 0, "reviews": 0, "users": 0}
+    for i in range(0, len(ids), USER_CHUNK):
+        chunk = ids[i:i + USER_CHUNK]
+        for name, column in (
+            ("analytics", Analytics.user_id),
+            ("bookmarks", Bookmark.user_id),
+            ("reviews", Review.user_id),
+            ("users", User.id),
+        ):
+            counts[name] += db.execute(select(func.count()).where(column.in_(chunk))).scalar_one()
+    return counts
+
+
+def _user_data(row: Dict[str, Any]) -> Dict[str, Any]:
+    data = dict(row)
+    # Email users' password hash is stored in provider_id
+    if data.get("provider") == "email":
+        data.pop("provider_id", None)
+    return data
+
+
+def export_user_data(user_id: int, key: Optional[str] = None) -> Iterator[bytes]:
+    """
+    NDJSON lines {"type": ..., "data": {...}} with the user's profile, then
+    bookmarks, reviews and analytics events, batch by batch from
+    streaming cursors
+    """
+    # Own session: the stream outlives the request's dependencies
+    db = database.read_session(key)
+    try:
+        users = User.__table__
+        user = db.execute(select(users).where(users.c.id == user_id)).mappings().first()
+        if user is None:
+            return
+        yield dumps({"type": "user", "data": _user_data(user)}) + b"\n"
+
+        for kind, table, order in EXPORT_SECTIONS:
+            result = db.execute(
+                select(table)
+                .where(table.c.user_id == user_id)
+                .order_by(*(table.c[name] for name in order))
+                .execution_options(stream_results=True, yield_per=settings.export_batch_size)
+            )
+            for batch in result.mappings().partitions():
+                yield b"".join(dumps({"type": kind, "data": dict(row)}) + b"\n" for row in batch)
+    finally:
+        db.close()
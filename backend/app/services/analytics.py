@@ -1,12 +1,50 @@
-"""Analytics service for tracking user events (placeholder for future implementation)"""
+"""Analytics service for tracking user events
 
-from typing import Dict, Any, Optional
-from datetime import datetime
+Concert views are counted with sketches instead of raw rows: a
+HyperLogLog of visitors per concert per day (plus one across all
+concerts) and a Count-Min heavy-hitter sketch of views per day. Each
+worker accumulates sketches in memory and a background thread merges
+them into `analytics_sketches` every ANALYTICS_SKETCH_FLUSH_INTERVAL
+seconds. Queries over any range of days merge the stored day sketches,
+so their cost depends on the number of days, not on traffic.
+"""
+
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import Date, func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import database
+from app.db.models import Analytics, AnalyticsRollup, AnalyticsSketch
+from app.services.quota import KST
+from app.services.sketches import HeavyHitters, HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+VIEWERS = "viewers"
+POPULAR = "popular"
+ALL_CONCERTS = ""
+
+SKETCH_TYPES = {VIEWERS: HyperLogLog, POPULAR: HeavyHitters}
+
+# (kind, day, key)
+SketchKey = Tuple[str, date, str]
 
 
 class AnalyticsService:
     """Service for tracking and analyzing user events"""
 
+    def __init__(self):
+        self._pending: Dict[SketchKey, Any] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
     async def track_event(
         self,
         event_type: str,
@@ -35,15 +73,178 @@ class AnalyticsService:
         # TODO: Implement with database in step 3
         return {}
 
-    async def get_concert_analytics(self, concert_id: str) -> Dict[str, Any]:
-        """Get analytics for a specific concert"""
-        # TODO: Implement with database in step 3
-        return {}
+    def record_view(self, concert_id: str, visitor: str, day: Optional[date] = None) -> None:
+        """
+        Count a concert view in this worker's sketches (no DB access)
 
-    async def get_trending_concerts(self, limit: int = 10) -> list:
-        """Get trending concerts based on view/bookmark data"""
-        # TODO: Implement with database in step 3
-        return []
+        Args:
+            concert_id: KOPIS concert ID
+            visitor: Stable visitor key (user or client hash; anonymous traffic counts too)
+            day: Bucket (defaults to today in KST)
+        """
+        day = day or datetime.now(KST).date()
+        with self._lock:
+            self._sketch(VIEWERS, day, concert_id).add(visitor)
+            self._sketch(VIEWERS, day, ALL_CONCERTS).add(visitor)
+            self._sketch(POPULAR, day, ALL_CONCERTS).add(concert_id)
+
+    def _sketch(self, kind: str, day: date, key: str):
+        sketch = self._pending.get((kind, day, key))
+        if sketch is None:
+            sketch = self._pending[(kind, day, key)] = SKETCH_TYPES[kind]()
+        return sketch
+
+    def flush(self, db: Session) -> int:
+        """
+        Merge pending sketches into the stored ones
+
+        Rows are locked while merging (FOR UPDATE on PostgreSQL) so
+        concurrent flushes from other workers are not lost. On failure
+        the pending sketches are kept for the next flush.
+
+        Returns:
+            Number of sketches written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            for (kind, day), keys in _group(pending).items():
+                rows = {
+                    row.key: row for row in db.query(AnalyticsSketch)
+                    .filter(AnalyticsSketch.kind == kind, AnalyticsSketch.day == day, AnalyticsSketch.key.in_(keys))
+                    .with_for_update()
+                }
+                for key in keys:
+                    sketch = pending[(kind, day, key)]
+                    row = rows.get(key)
+                    if row is None:
+                        db.add(AnalyticsSketch(kind=kind, day=day, key=key, data=sketch.to_bytes()))
+                        continue
+                    stored = SKETCH_TYPES[kind].from_bytes(row.data)
+                    stored.update(sketch)
+                    row.data = stored.to_bytes()
+            db.commit()
+        except IntegrityError:
+            # Another worker inserted the same sketch first; merge next time
+            db.rollback()
+            self._restore(pending)
+            return 0
+        except Exception:
+            db.rollback()
+            self._restore(pending)
+            raise
+        return len(pending)
+
+    def _restore(self, pending: Dict[SketchKey, Any]) -> None:
+        with self._lock:
+            for sketch_key, sketch in pending.items():
+                current = self._pending.get(sketch_key)
+                if current is not None:
+                    sketch.update(current)
+                self._pending[sketch_key] = sketch
+
+    def _load(self, db: Session, kind: str, key: str, start: date, end: date):
+        """Merge of the stored sketches for days in [start, end]"""
+        merged = SKETCH_TYPES[kind]()
+        rows = db.query(AnalyticsSketch.data).filter(
+            AnalyticsSketch.kind == kind,
+            AnalyticsSketch.key == key,
+            AnalyticsSketch.day >= start,
+            AnalyticsSketch.day <= end,
+        )
+        for (data,) in rows:
+            merged.update(SKETCH_TYPES[kind].from_bytes(data))
+        return merged
+
+    def get_concert_analytics(self, db: Session, concert_id: str, days: int = 7) -> Dict[str, Any]:
+        """Approximate unique viewers and views of a concert over the last `days` days"""
+        end = datetime.now(KST).date()
+        start = end - timedelta(days=days - 1)
+        return {
+            "concert_id": concert_id,
+            "days": days,
+            "unique_viewers": self._load(db, VIEWERS, concert_id, start, end).count(),
+            "views": self._load(db, POPULAR, ALL_CONCERTS, start, end).sketch.estimate(concert_id),
+        }
+
+    def popularity(self, db: Session, days: int = 7) -> HeavyHitters:
+        """Merged view sketch of the last `days` days (estimate() / top())"""
+        end = datetime.now(KST).date()
+        return self._load(db, POPULAR, ALL_CONCERTS, end - timedelta(days=days - 1), end)
+
+    def get_trending_concerts(self, db: Session, limit: int = 10, days: int = 7) -> List[Dict[str, Any]]:
+        """Most viewed concerts over the last `days` days (approximate counts)"""
+        popular = self.popularity(db, days)
+        return [{"concert_id": key, "views": views} for key, views in popular.top(limit)]
+
+    def unique_visitors(self, db: Session, start: date, end: date) -> int:
+        """Approximate distinct visitors across all concerts in [start, end]"""
+        return self._load(db, VIEWERS, ALL_CONCERTS, start, end).count()
+
+    def start(self) -> None:
+        """Flush sketches from a daemon thread every ANALYTICS_SKETCH_FLUSH_INTERVAL seconds"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fys-sketch-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._flush_once()
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.analytics_sketch_flush_interval):
+            self._flush_once()
+
+    def _flush_once(self) -> None:
+        if database.SessionLocal is None:
+            return
+        db = database.SessionLocal()
+        try:
+            self.flush(db)
+        except Exception:
+            logger.exception("Analytics sketch flush failed")
+        finally:
+            db.close()
+
+    def rollup_day(self, db: Session, day: date) -> int:
+        """
+        (Re)compute the daily rollup rows for one day from raw events
+
+        Runs as two set-based statements (delete + INSERT ... SELECT with
+        GROUP BY), so it is safe to repeat for a day that is still filling.
+
+        Returns:
+            Number of rollup rows written
+        """
+        start = datetime.combine(day, time.min)
+        counts = (
+            select(
+                literal(day, Date).label("day"),
+                Analytics.event_type,
+                Analytics.concert_id,
+                func.count().label("count"),
+            )
+            .where(Analytics.created_at >= start, Analytics.created_at < start + timedelta(days=1))
+            .group_by(Analytics.event_type, Analytics.concert_id)
+        )
+        db.query(AnalyticsRollup).filter(AnalyticsRollup.day == day).delete(synchronize_session=False)
+        result = db.execute(
+            insert(AnalyticsRollup).from_select(["day", "event_type", "concert_id", "count"], counts)
+        )
+        db.commit()
+        return result.rowcount
+
+
+def _group(pending: Dict[SketchKey, Any]) -> Dict[Tuple[str, date], List[str]]:
+    groups: Dict[Tuple[str, date], List[str]] = {}
+    for kind, day, key in pending:
+        groups.setdefault((kind, day), []).append(key)
+    return groups
 
 
 # Global service instance
@@ -0,0 +1,112 @@
+"""Concert catalog sync: copy KOPIS listings into the concerts table
+
+The local catalog backs bulk exports and other queries that should not
+page through KOPIS. Items are read through KopisService segments with
+"sync" quota priority, so syncing shares the segment cache with
+/api/concerts and stops before user-facing calls when quota runs low.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Concert
+from app.services.concert_calendar import concert_calendar
+from app.services.kopis import KopisService, kopis_service
+from app.services.quota import KST, Priority
+from app.services.range_planner import Segment
+from app.services.snapshot import write_snapshot
+from app.services.venues import nearby_index
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_date(dotted: Optional[str]) -> Optional[date]:
+    """KOPIS dates are YYYY.MM.DD"""
+    try:
+        return datetime.strptime(dotted, "%Y.%m.%d").date() if dotted else None
+    except ValueError:
+        return None
+
+
+def concert_values(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Concert column values for a raw KOPIS listing item"""
+    return {
+        "prfnm": item.get("prfnm") or "",
+        "prfpdfrom": _parse_date(item.get("prfpdfrom")),
+        "prfpdto": _parse_date(item.get("prfpdto")),
+        "fcltynm": item.get("fcltynm"),
+        "poster": item.get("poster"),
+        "genrenm": item.get("genrenm"),
+        "area": item.get("area"),
+        "openrun": item.get("openrun") == "Y",
+        "prfstate": item.get("prfstate"),
+    }
+
+
+class CatalogService:
+    """Upsert KOPIS listing items into the local catalog"""
+
+    def __init__(self, kopis: KopisService):
+        self.kopis = kopis
+
+    def upsert(self, db: Session, items: List[Dict[str, Any]]) -> int:
+        """Insert new concerts and update changed ones; returns rows written"""
+        values = {item["mt20id"]: concert_values(item) for item in items if item.get("mt20id")}
+        if not values:
+            return 0
+
+        existing = {
+            concert.mt20id: concert
+            for concert in db.query(Concert).filter(Concert.mt20id.in_(list(values)))
+        }
+        written = 0
+        for mt20id, columns in values.items():
+            concert = existing.get(mt20id)
+            if concert is None:
+                db.add(Concert(mt20id=mt20id, **columns))
+                written += 1
+            elif any(getattr(concert, k) != v for k, v in columns.items()):
+                for k, v in columns.items():
+                    setattr(concert, k, v)
+                written += 1
+        db.commit()
+        if written:
+            concert_calendar.invalidate()
+            nearby_index.invalidate()
+        return written
+
+    def sync(self, db: Session, months: int = 3, start: Optional[date] = None) -> int:
+        """Sync `months` calendar months starting with the current one"""
+        month = (start or datetime.now(KST).date()).replace(day=1)
+        written = 0
+        for _ in range(months):
+            next_month = (month + timedelta(days=32)).replace(day=1)
+            segment = Segment(month, next_month - timedelta(days=1))
+            items = self.kopis.segment_items(segment, priority=Priority.SYNC)
+            count = self.upsert(db, items)
+            logger.info("Catalog sync %s: %d items, %d written", segment.stdate[:6], len(items), count)
+            written += count
+            month = next_month
+        return written
+
+    def write_snapshot(self, db: Session, months: int = 3, start: Optional[date] = None) -> int:
+        """
+        Write the catalog snapshot workers serve listings from; returns its version
+
+        Covers the same months as sync(), so only ranges that were just
+        synced are answered from the snapshot.
+        """
+        first = (start or datetime.now(KST).date()).replace(day=1)
+        last = first
+        for _ in range(months):
+            last = (last + timedelta(days=32)).replace(day=1)
+        concerts = db.query(Concert).yield_per(1000)
+        return write_snapshot(settings.catalog_snapshot_path, concerts, (first, last - timedelta(days=1)))
+
+
+# Global service instance
+catalog_service = CatalogService(kopis_service)
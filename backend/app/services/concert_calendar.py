@@ -0,0 +1,129 @@
+"""Concert calendar: per-day counts and top concerts from the local catalog
+
+Answers "what is on stage on each day of this month" from an in-memory
+IntervalTree over the run periods in the concerts table, instead of
+KOPIS round trips or `prfpdfrom <= d AND prfpdto >= d` scans per day.
+The tree is rebuilt from the catalog every CALENDAR_INDEX_TTL seconds
+(and right away after an in-process catalog sync), so each worker holds
+its own copy. Run sync_catalog.py to fill the catalog.
+"""
+
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.db import database
+from app.db.models import Concert
+from app.services.analytics import analytics_service
+from app.services.intervals import IntervalTree
+
+logger = logging.getLogger(__name__)
+
+# Views are ranked over this many recent days
+POPULARITY_DAYS = 7
+
+
+def parse_month(value: str) -> date:
+    """First day of a YYYYMM month (ValueError if malformed)"""
+    if len(value) != 6 or not value.isdigit():
+        raise ValueError(f"invalid month {value!r}, expected YYYYMM")
+    return date(int(value[:4]), int(value[4:]), 1)
+
+
+def _dotted(day: Optional[date]) -> Optional[str]:
+    """Same date format as KOPIS listings"""
+    return day.strftime("%Y.%m.%d") if day else None
+
+
+def concert_item(concert: Concert) -> Dict[str, Any]:
+    """Catalog row in the normalized listing item shape"""
+    return {
+        "mt20id": concert.mt20id,
+        "prfnm": concert.prfnm,
+        "prfpdfrom": _dotted(concert.prfpdfrom),
+        "prfpdto": _dotted(concert.prfpdto),
+        "fcltynm": concert.fcltynm,
+        "poster": concert.poster,
+        "genrenm": concert.genrenm,
+        "area": concert.area,
+        "openrun": "Y" if concert.openrun else "N",
+    }
+
+
+class ConcertCalendar:
+    """Interval index over catalog run periods, rebuilt on a TTL"""
+
+    def __init__(self):
+        self._tree: Optional[IntervalTree] = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._built_at = 0.0
+
+    def index(self) -> IntervalTree:
+        if time.monotonic() - self._built_at < settings.calendar_index_ttl and self._tree is not None:
+            return self._tree
+        with self._lock:
+            if time.monotonic() - self._built_at >= settings.calendar_index_ttl or self._tree is None:
+                self._tree = self._build()
+                self._built_at = time.monotonic()
+            return self._tree
+
+    def _build(self) -> IntervalTree:
+        db = database.read_session()
+        try:
+            with span("calendar_index_build"):
+                intervals = []
+                rows = db.execute(select(Concert).where(Concert.prfpdfrom.isnot(None))).scalars()
+                for concert in rows:
+                    start = concert.prfpdfrom
+                    end = concert.prfpdto if concert.prfpdto and concert.prfpdto >= start else start
+                    intervals.append((start.toordinal(), end.toordinal(), concert_item(concert)))
+                tree = IntervalTree(intervals)
+        finally:
+            db.close()
+        logger.info("Built calendar index over %d concerts", tree.size)
+        return tree
+
+    def month(self, db: Session, month: str, top: int = 3) -> Dict[str, Any]:
+        """
+        Per-day counts and the `top` most viewed concerts of each day
+
+        Raises ValueError for a malformed month.
+        """
+        first = parse_month(month)
+        last = (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        tree = self.index()
+        popular = analytics_service.popularity(db, POPULARITY_DAYS) if top else None
+
+        views: Dict[str, int] = {}
+        days: List[Dict[str, Any]] = []
+        for ordinal in range(first.toordinal(), last.toordinal() + 1):
+            day = {"date": date.fromordinal(ordinal).strftime("%Y%m%d"), "count": tree.count(ordinal)}
+            if top:
+                items = tree.stab(ordinal)
+                for item in items:
+                    if item["mt20id"] not in views:
+                        views[item["mt20id"]] = popular.sketch.estimate(item["mt20id"])
+                # Most viewed first, then closing soonest
+                items.sort(key=lambda it: (-views[it["mt20id"]], it["prfpdto"] or "", it["mt20id"]))
+                day["top"] = items[:top]
+            days.append(day)
+
+        return {
+            "month": month,
+            "total": tree.overlapping(first.toordinal(), last.toordinal()),
+            "days": days,
+        }
+
+
+# Global instance
+concert_calendar = ConcertCalendar()
@@ -0,0 +1,412 @@
+"""Server-sent events: per-user push over /api/users/me/events
+
+Clients used to poll bookmarks and listings to notice changes. Instead,
+each worker keeps an EventHub of open event streams and pushes:
+
+- bookmarks_changed: a user's bookmarks changed (to their other devices)
+- starts_soon: a bookmarked concert starts tomorrow (KST)
+- catalog_updated: a new catalog snapshot version was mapped
+- resync: the stream fell behind and is being closed; refetch
+
+An idle stream is an asyncio.Queue and a suspended generator, so one
+worker holds thousands of them. Each queue is bounded by
+EVENTS_BUFFER_SIZE; a client that does not keep up gets `resync` and is
+disconnected instead of growing memory. Heartbeat comments keep proxies
+from closing quiet streams, and streams with no events for
+EVENTS_IDLE_TIMEOUT (or whose token expires) are closed so the client
+reconnects with a fresh token, spreading connections over the workers.
+
+User events go through a bus: in-process by default, or Redis pub/sub
+(EVENTS_BACKEND=redis) so an event published by one worker reaches the
+user's streams on every worker. `starts_soon` and `catalog_updated` are
+computed by each worker for its own streams (EventScheduler), so they
+are never duplicated.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import orjson
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.metrics import GaugeFunc
+from app.db import database
+from app.db.models import Bookmark, Concert
+from app.services.quota import KST
+from app.services.snapshot import catalog_snapshot
+
+logger = logging.getLogger(__name__)
+
+BOOKMARKS_CHANGED = "bookmarks_changed"
+STARTS_SOON = "starts_soon"
+CATALOG_UPDATED = "catalog_updated"
+RESYNC = "resync"
+
+# Client reconnect delay hint (ms), sent when a stream opens
+RETRY_MS = 5000
+HEARTBEAT = b": ping\n\n"
+
+# Marks the end of a stream in a subscription queue
+_CLOSE = b""
+
+# Bookmark queries per scheduler pass are chunked by user
+USER_CHUNK = 500
+
+
+def format_event(event: str, data: Any) -> bytes:
+    """Encode one SSE frame (orjson output never contains newlines)"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class Subscription:
+    """One open event stream (touched only from the event loop)"""
+
+    __slots__ = ("user_id", "queue", "seen", "last_event")
+
+    def __init__(self, user_id: int, buffer_size: int):
+        self.user_id = user_id
+        # Two extra slots so resync + close always fit
+        self.queue: asyncio.Queue = asyncio.Queue(buffer_size + 2)
+        self.seen: Set[str] = set()  # concerts already announced as starts_soon
+        self.last_event = time.monotonic()
+
+    def push(self, frame: bytes) -> None:
+        if self.queue.qsize() >= self.queue.maxsize - 2:
+            logger.info("Event stream of user %d fell behind; closing", self.user_id)
+            self.close(format_event(RESYNC, {}))
+            return
+        self.queue.put_nowait(frame)
+
+    def close(self, final: bytes = b"") -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        if final:
+            self.queue.put_nowait(final)
+        self.queue.put_nowait(_CLOSE)
+
+
+class LocalEventBus:
+    """Deliver published events to this process only"""
+
+    def __init__(self, on_message: Callable[[bytes], None]):
+        self.on_message = on_message
+
+    def publish(self, message: bytes) -> None:
+        self.on_message(message)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class RedisEventBus:
+    """Fan events out to every worker and instance through Redis pub/sub"""
+
+    CHANNEL = "fys:events"
+
+    def __init__(self, redis_url: str, on_message: Callable[[bytes], None]):
+        import redis
+
+        self.redis_url = redis_url
+        self.on_message = on_message
+        self.client = redis.Redis.from_url(redis_url, socket_timeout=1)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def publish(self, message: bytes) -> None:
+        self.client.publish(self.CHANNEL, message)
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fys-events-redis", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+
+    def _run(self) -> None:
+        import redis
+
+        while not self._stop.is_set():
+            try:
+                pubsub = redis.Redis.from_url(self.redis_url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.on_message(message["data"])
+                pubsub.close()
+            except Exception as e:
+                # Streams stay open; events published meanwhile are lost
+                logger.warning("Event subscription to Redis failed (%s); retrying", e)
+                self._stop.wait(2.0)
+
+
+def make_bus(backend: str, redis_url: str, on_message: Callable[[bytes], None]):
+    """Event bus for the configured backend ("local" or "redis")"""
+    if backend == "redis":
+        try:
+            return RedisEventBus(redis_url, on_message)
+        except ImportError:
+            logger.warning("redis is not installed; events reach this worker's streams only")
+    return LocalEventBus(on_message)
+
+
+class EventHub:
+    """Open event streams of this worker, by user"""
+
+    def __init__(self):
+        self._subs: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()  # guards _subs for readers off the loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fresh: Set[int] = set()  # users connected since the last scheduler pass
+        self._count = 0
+        self.bus = make_bus(settings.events_backend, settings.redis_url, self._on_message)
+
+    @property
+    def connections(self) -> int:
+        return self._count
+
+    def connected_users(self) -> List[int]:
+        with self._lock:
+            return list(self._subs)
+
+    def take_fresh(self) -> List[int]:
+        with self._lock:
+            fresh, self._fresh = list(self._fresh), set()
+            return fresh
+
+    # -- streams (event loop) --
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """
+        Register a stream for `user_id`
+
+        Raises OverflowError when the worker or the user has too many
+        open streams.
+        """
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._count >= settings.events_max_connections:
+                raise OverflowError("Too many event streams on this server")
+            if len(self._subs.get(user_id, ())) >= settings.events_max_per_user:
+                raise OverflowError("Too many event streams for this user")
+            sub = Subscription(user_id, settings.events_buffer_size)
+            self._subs[user_id].add(sub)
+            self._count += 1
+            self._fresh.add(user_id)
+        event_scheduler.wake()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None and sub in subs:
+                subs.discard(sub)
+                self._count -= 1
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    async def stream(self, sub: Subscription, expires_at: Optional[float] = None):
+        """
+        SSE body for a subscription: events, heartbeats, then EOF on idle
+        timeout, token expiry (`expires_at`, epoch seconds) or shutdown
+        """
+        try:
+            yield f"retry: {RETRY_MS}\n: connected\n\n".encode()
+            while True:
+                timeout = settings.events_heartbeat_interval
+                if expires_at is not None:
+                    timeout = min(timeout, expires_at - time.time())
+                    if timeout <= 0:
+                        return
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - sub.last_event >= settings.events_idle_timeout:
+                        return
+                    yield HEARTBEAT
+                    continue
+                if not frame:  # _CLOSE
+                    return
+                sub.last_event = time.monotonic()
+                yield frame
+        finally:
+            self.unsubscribe(sub)
+
+    def close_all(self) -> None:
+        """End every stream so clients reconnect elsewhere (worker shutdown)"""
+        with self._lock:
+            subs = [sub for user_subs in self._subs.values() for sub in user_subs]
+        for sub in subs:
+            sub.close()
+
+    # -- publishing (any thread) --
+
+    def publish(self, event: str, data: Any, user_id: Optional[int] = None) -> None:
+        """
+        Send an event to one user's streams (or all streams) on every worker
+
+        Blocks on the Redis backend; call from sync code (threadpool routes).
+        """
+        message = orjson.dumps({"user": user_id, "event": event, "data": data})
+        try:
+            self.bus.publish(message)
+        except Exception as e:
+            logger.warning("Publishing %s event failed: %s", event, e)
+
+    def _on_message(self, message: bytes) -> None:
+        payload = orjson.loads(message)
+        self.deliver(payload["event"], payload["data"], payload["user"])
+
+    def deliver(self, event: str, data: Any, user_id: Optional[int] = None) -> None:
+        """Send an event to this worker's streams only (thread-safe)"""
+        if self._loop is None:
+            return  # nobody has subscribed in this process
+        frame = format_event(event, data)
+        self._loop.call_soon_threadsafe(self._push, frame, user_id)
+
+    def _push(self, frame: bytes, user_id: Optional[int]) -> None:
+        with self._lock:
+            if user_id is None:
+                subs = [sub for user_subs in self._subs.values() for sub in user_subs]
+            else:
+                subs = list(self._subs.get(user_id, ()))
+        for sub in subs:
+            sub.push(frame)
+
+    def deliver_starts_soon(self, concerts: Dict[int, List[Dict[str, Any]]]) -> None:
+        """Announce upcoming concerts per user, once per stream (thread-safe)"""
+        if self._loop is not None and concerts:
+            self._loop.call_soon_threadsafe(self._push_starts_soon, concerts)
+
+    def _push_starts_soon(self, concerts: Dict[int, List[Dict[str, Any]]]) -> None:
+        for user_id, items in concerts.items():
+            with self._lock:
+                subs = list(self._subs.get(user_id, ()))
+            for sub in subs:
+                for item in items:
+                    if item["concert_id"] not in sub.seen:
+                        sub.seen.add(item["concert_id"])
+                        sub.push(format_event(STARTS_SOON, item))
+
+    def start(self) -> None:
+        self.bus.start()
+
+    def stop(self) -> None:
+        self.bus.stop()
+        self.close_all()
+
+
+def upcoming_bookmarks(db, user_ids: Iterable[int], day) -> Dict[int, List[Dict[str, Any]]]:
+    """Bookmarked catalog concerts opening on `day`, by user"""
+    found: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    user_ids = list(user_ids)
+    for i in range(0, len(user_ids), USER_CHUNK):
+        rows = db.execute(
+            select(Bookmark.user_id, Concert.mt20id, Concert.prfnm, Concert.prfpdfrom, Concert.fcltynm)
+            .join(Concert, Concert.mt20id == Bookmark.concert_id)
+            .where(Bookmark.user_id.in_(user_ids[i:i + USER_CHUNK]), Concert.prfpdfrom == day)
+        )
+        for user_id, mt20id, name, starts, venue in rows:
+            found[user_id].append({
+                "concert_id": mt20id,
+                "name": name,
+                "venue": venue,
+                "starts_on": starts.isoformat(),
+            })
+    return found
+
+
+class EventScheduler:
+    """
+    Compute this worker's starts_soon and catalog_updated events
+
+    Runs every EVENTS_SCHEDULE_INTERVAL seconds for all connected users,
+    and shortly after new streams open for just those users (bursts of
+    connects are coalesced into one query).
+    """
+
+    # Minimum gap between passes, so connect bursts share one pass
+    COALESCE = 1.0
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._catalog_version: Optional[int] = None
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fys-events", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        last_full = float("-inf")
+        while not self._stop.is_set():
+            remaining = settings.events_schedule_interval - (time.monotonic() - last_full)
+            self._wake.wait(max(remaining, 0))
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            full = time.monotonic() - last_full >= settings.events_schedule_interval
+            users = event_hub.take_fresh()
+            if full:
+                last_full = time.monotonic()
+                users = event_hub.connected_users()
+                self._check_catalog()
+            try:
+                self.run_once(users)
+            except Exception:
+                logger.exception("Event scheduler pass failed")
+            self._stop.wait(self.COALESCE)
+
+    def run_once(self, user_ids: List[int]) -> int:
+        """Deliver starts_soon for `user_ids`; returns the number of users notified"""
+        if not user_ids or database.SessionLocal is None:
+            return 0
+        tomorrow = datetime.now(KST).date() + timedelta(days=1)
+        db = database.read_session()
+        try:
+            concerts = upcoming_bookmarks(db, user_ids, tomorrow)
+        finally:
+            db.close()
+        event_hub.deliver_starts_soon(concerts)
+        return len(concerts)
+
+    def _check_catalog(self) -> None:
+        snapshot = catalog_snapshot.current()
+        if snapshot is None:
+            return
+        if self._catalog_version is not None and snapshot.version != self._catalog_version:
+            event_hub.deliver(CATALOG_UPDATED, {"version": snapshot.version})
+        self._catalog_version = snapshot.version
+
+
+def _stream_samples():
+    yield (), event_hub.connections
+
+
+event_streams = GaugeFunc("event_streams", "Open server-sent event streams", _stream_samples)
+
+event_hub = EventHub()
+event_scheduler = EventScheduler()
@@ -0,0 +1,147 @@
+"""Uniform-grid spatial index for "near me" venue lookups
+
+Venues are bucketed into cells at least `cell_km` on each side, so a query only visits the cells around
+the query point instead of computing a haversine distance to every venue:
+
+- within(lat, lng, radius_km): the cells overlapping the radius's
+  bounding box, then an exact haversine filter
+- nearest(lat, lng, k): rings of cells around the query cell, stopping
+  once the k-th distance is closer than anything an unvisited ring can
+  hold
+
+A grid suits the venue distribution here (a few thousand points, dense
+in cities, with lookups at city scale); unlike geohash prefixes it needs
+no neighbour-cell handling at cell edges. The index is immutable;
+rebuild it when the venues change.
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+# (lat, lng, value)
+Point = Tuple[float, float, T]
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex(Generic[T]):
+    """Points bucketed into a uniform lat/lng grid"""
+
+    def __init__(self, points: Sequence[Point], cell_km: float = 2.0):
+        self.size = len(points)
+        self.cell_km = cell_km
+        self.cell_lat = cell_km / KM_PER_DEGREE_LAT
+        # Longitude degrees shrink with latitude; size cells at the widest
+        # latitude so they are never narrower than cell_km
+        max_abs_lat = max((abs(lat) for lat, _, _ in points), default=0.0)
+        self.cell_lng = cell_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(min(max_abs_lat, 89.0))), 1e-6))
+        self._cells: Dict[Tuple[int, int], List[Point]] = defaultdict(list)
+        for point in points:
+            self._cells[self._cell(point[0], point[1])].append(point)
+        self._cells = dict(self._cells)
+        if self._cells:
+            rows = [i for i, _ in self._cells]
+            cols = [j for _, j in self._cells]
+            self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_lat), math.floor(lng / self.cell_lng)
+
+    def within(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> List[Tuple[float, T]]:
+        """(distance_km, value) of points within `radius_km`, nearest first"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(min(abs(lat) + dlat, 89.0))), 1e-6))
+        i0, j0 = self._cell(lat - dlat, lng - dlng)
+        i1, j1 = self._cell(lat + dlat, lng + dlng)
+
+        found = []
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                for plat, plng, value in self._cells.get((i, j), ()):
+                    distance = haversine_km(lat, lng, plat, plng)
+                    if distance <= radius_km and (accept is None or accept(value)):
+                        found.append((distance, value))
+        found.sort(key=lambda dv: dv[0])
+        return found
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        accept: Optional[Callable[[T], bool]] = None,
+        max_km: float = math.inf,
+    ) -> List[Tuple[float, T]]:
+        """(distance_km, value) of the `k` nearest accepted points, nearest first"""
+        if k <= 0 or not self._cells:
+            return []
+        ci, cj = self._cell(lat, lng)
+        min_i, max_i, min_j, max_j = self._bounds
+        # Rings beyond this cover no occupied cell
+        last_ring = max(abs(ci - min_i), abs(ci - max_i), abs(cj - min_j), abs(cj - max_j))
+
+        # Narrowest cell side around the query; 1% slack because great
+        # circles are slightly shorter than the parallels cells follow
+        ring_km = 0.99 * min(self.cell_km, self.cell_lng * KM_PER_DEGREE_LAT * math.cos(math.radians(min(abs(lat), 89.0))))
+
+        best: List[Tuple[float, int, T]] = []  # max-heap of (-distance, tiebreak, value)
+        seq = 0
+        # Rings that miss every occupied cell are skipped
+        first_ring = max(min_i - ci, ci - max_i, min_j - cj, cj - max_j, 0)
+        for ring in range(first_ring, last_ring + 1):
+            for i, j in self._ring(ci, cj, ring, self._bounds):
+                for plat, plng, value in self._cells.get((i, j), ()):
+                    distance = haversine_km(lat, lng, plat, plng)
+                    # Distance first: `accept` may be the costlier check
+                    if distance > max_km or (len(best) == k and distance >= -best[0][0]):
+                        continue
+                    if accept is not None and not accept(value):
+                        continue
+                    seq += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, seq, value))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, seq, value))
+            # Anything outside the first `ring` rings is at least this far
+            reach = ring * ring_km
+            if reach >= max_km or (len(best) == k and -best[0][0] <= reach):
+                break
+        return [(-d, value) for d, _, value in sorted(best, key=lambda b: (-b[0], b[1]))]
+
+    @staticmethod
+    def _ring(ci: int, cj: int, ring: int, bounds: Tuple[int, int, int, int]):
+        """Cells at Chebyshev distance `ring` from (ci, cj), clipped to `bounds`"""
+        min_i, max_i, min_j, max_j = bounds
+        if ring == 0:
+            yield ci, cj
+            return
+        j_lo, j_hi = max(cj - ring, min_j), min(cj + ring, max_j)
+        for i in (ci - ring, ci + ring):
+            if min_i <= i <= max_i:
+                for j in range(j_lo, j_hi + 1):
+                    yield i, j
+        i_lo, i_hi = max(ci - ring + 1, min_i), min(ci + ring - 1, max_i)
+        for j in (cj - ring, cj + ring):
+            if min_j <= j <= max_j:
+                for i in range(i_lo, i_hi + 1):
+                    yield i, j
@@ -0,0 +1,99 @@
+"""Static interval index for "running on day X" queries
+
+Performances are closed day intervals [prfpdfrom, prfpdto], and open
+runs can span months, so "what is on stage on day d" is a stabbing
+query that a single sorted column cannot answer. IntervalTree is a
+centered interval tree over integer intervals (date ordinals):
+
+- count(d): intervals containing d, from two sorted endpoint arrays
+  (#starts <= d minus #ends < d), O(log n)
+- stab(d): the intervals containing d, O(log n + k)
+- overlapping(lo, hi): intervals overlapping [lo, hi], O(log n)
+
+The tree is immutable; rebuild it when the underlying data changes.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# (start, end, value), start <= end, both inclusive
+Interval = Tuple[int, int, T]
+
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center: int, by_start: List[Interval], by_end: List[Interval]):
+        self.center = center
+        self.by_start = by_start  # ascending start
+        self.by_end = by_end  # descending end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+class IntervalTree(Generic[T]):
+    """Centered interval tree over closed integer intervals"""
+
+    def __init__(self, intervals: Sequence[Interval]):
+        self.size = len(intervals)
+        self._starts = sorted(start for start, _, _ in intervals)
+        self._ends = sorted(end for _, end, _ in intervals)
+        self._root = self._build(list(intervals))
+
+    def _build(self, intervals: List[Interval]) -> Optional[_Node]:
+        if not intervals:
+            return None
+        endpoints = sorted(p for start, end, _ in intervals for p in (start, end))
+        center = endpoints[len(endpoints) // 2]
+
+        here, left, right = [], [], []
+        for interval in intervals:
+            if interval[1] < center:
+                left.append(interval)
+            elif interval[0] > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+
+        node = _Node(
+            center,
+            sorted(here, key=lambda iv: iv[0]),
+            sorted(here, key=lambda iv: iv[1], reverse=True),
+        )
+        node.left = self._build(left)
+        node.right = self._build(right)
+        return node
+
+    def count(self, point: int) -> int:
+        """Number of intervals containing `point`"""
+        return bisect_right(self._starts, point) - bisect_left(self._ends, point)
+
+    def overlapping(self, lo: int, hi: int) -> int:
+        """Number of intervals overlapping [lo, hi]"""
+        ends_before = bisect_left(self._ends, lo)
+        starts_after = self.size - bisect_right(self._starts, hi)
+        return self.size - ends_before - starts_after
+
+    def stab(self, point: int) -> List[T]:
+        """Values of the intervals containing `point`"""
+        found: List[T] = []
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                for start, _, value in node.by_start:
+                    if start > point:
+                        break
+                    found.append(value)
+                node = node.left
+            elif point > node.center:
+                for _, end, value in node.by_end:
+                    if end < point:
+                        break
+                    found.append(value)
+                node = node.right
+            else:
+                found.extend(value for _, _, value in node.by_start)
+                break
+        return found
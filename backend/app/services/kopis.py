@@ -1,20 +1,214 @@
 """KOPIS (Korean Performing Arts Information System) API Service"""
 
-from typing import Dict, List, Any
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 import xmltodict
 from fastapi import HTTPException
 
+from app.core.cache import LocalCache
+from app.core.compression import compress
 from app.core.config import settings
+from app.core.http_cache import content_etag
+from app.core.metrics import GaugeFunc, cache_requests_total, kopis_request_duration, kopis_requests_total
+from app.core.responses import dumps
+from app.core.tracing import span
+from app.services.quota import Priority, QuotaManager, make_store, seconds_until_reset
+from app.services.range_planner import RangeTooLong, Segment, paginate, plan_segments, stitch
+from app.services.resilience import AIMDLimiter, CircuitBreaker, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Segment fetch locks; unrelated segments share a lock only on a hash collision
+SEGMENT_LOCK_STRIPES = 64
+
+
+@dataclass
+class ListingEntry:
+    """A listing response together with its ETag validator"""
+    payload: Dict[str, Any]
+    etag: str
+    _body: Optional[bytes] = field(default=None, repr=False)
+    _encoded: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    @property
+    def body(self) -> bytes:
+        """JSON body, serialized once per cache entry"""
+        if self._body is None:
+            self._body = dumps(self.payload)
+        return self._body
+
+    def encoded(self, encoding: str) -> bytes:
+        """JSON body compressed with the given coding, once per cache entry"""
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
+
+
+@dataclass
+class SegmentData:
+    """All raw KOPIS items of one canonical date segment"""
+    items: List[Dict[str, Any]]
+    fetched_at: float  # time.monotonic()
+    truncated: bool = False  # more pages than listing_segment_max_pages
 
 
 class KopisService:
     """Service for interacting with KOPIS API"""
 
-    BASE_URL = "http://www.kopis.or.kr/openApi/restful"
-
     def __init__(self):
         self.api_key = settings.kopis_api_key
+        self.quota = QuotaManager(
+            api_keys=settings.get_kopis_api_keys(),
+            daily_limit=settings.kopis_daily_quota,
+            store=make_store(settings.kopis_quota_backend, settings.redis_url),
+        )
+        self.base_url = settings.kopis_base_url.rstrip("/")
+        # Keep-alive connections to KOPIS, one per concurrent call
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=settings.kopis_max_concurrency)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.listing_cache = LocalCache(
+            max_entries=settings.listing_cache_max_entries,
+            ttl=settings.listing_cache_ttl,
+        )
+        self.segment_cache = LocalCache(
+            max_entries=settings.listing_cache_max_entries,
+            ttl=settings.listing_cache_ttl,
+        )
+        # One upstream fetch per segment at a time (others wait for it).
+        # Striped: a fixed set of locks, however many segments are queried
+        self._segment_locks = [threading.Lock() for _ in range(SEGMENT_LOCK_STRIPES)]
+        # mt20id -> poster URL seen in fetched listings (for the poster proxy)
+        self.posters: Dict[str, str] = {}
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.kopis_breaker_threshold,
+            reset_timeout=settings.kopis_breaker_reset,
+        )
+        self.limiter = AIMDLimiter(
+            initial=max(1, settings.kopis_max_concurrency // 2),
+            max_limit=settings.kopis_max_concurrency,
+            latency_target=settings.kopis_latency_target,
+        )
+
+    def status(self) -> Dict[str, Any]:
+        """Resilience state for health checks and monitoring"""
+        return {
+            "circuit": self.breaker.snapshot(),
+            "concurrency": self.limiter.snapshot(),
+            "quota": self.quota.snapshot(),
+        }
+
+    def _request(
+        self,
+        endpoint: str,
+        params: Dict[str, str],
+        priority: str = Priority.USER,
+        path: Optional[str] = None,
+    ) -> requests.Response:
+        """
+        GET a KOPIS endpoint through the resilience layer
+
+        `path` overrides the URL path when it carries an ID
+        (e.g. prfplc/FC001247); metrics stay labelled by `endpoint`.
+
+        Connection errors, 5xx and 429 responses are retried with jittered
+        backoff while the per-request budget lasts. While the circuit is
+        open, when no concurrency slot frees up in time, or when the daily
+        quota share for `priority` is spent, this fails fast with 503
+        instead of tying up a worker thread.
+        """
+        if not self.breaker.allow():
+            kopis_requests_total.inc(endpoint, "circuit_open")
+            raise HTTPException(
+                status_code=503,
+                detail="KOPIS temporarily unavailable",
+                headers={"Retry-After": str(self.breaker.retry_after())},
+            )
+
+        url = f"{self.base_url}/{path or endpoint}"
+        deadline = time.monotonic() + settings.kopis_request_budget
+        attempt = 0
+
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                response, error = None, None
+
+                # Every attempt (including retries) is charged to a key
+                api_key = self.quota.acquire(priority)
+                if api_key is None:
+                    self.breaker.release()
+                    kopis_requests_total.inc(endpoint, "quota")
+                    logger.warning("KOPIS daily quota exhausted for %s calls", priority)
+                    raise HTTPException(
+                        status_code=503,
+                        detail="KOPIS daily quota exhausted",
+                        headers={"Retry-After": str(seconds_until_reset())},
+                    )
+
+                # Wait briefly: a saturated limiter should fail fast (callers
+                # fall back to stale data), not hold the threadpool thread
+                slot_timeout = min(settings.kopis_slot_timeout, remaining)
+                with self.limiter.slot(timeout=slot_timeout) as acquired:
+                    if not acquired:
+                        self.breaker.release()
+                        kopis_requests_total.inc(endpoint, "limited")
+                        raise HTTPException(
+                            status_code=503,
+                            detail="KOPIS concurrency limit reached",
+                            headers={"Retry-After": "1"},
+                        )
+
+                    start = time.perf_counter()
+                    try:
+                        with span("kopis", endpoint=endpoint, attempt=attempt, **params):
+                            response = self.http.get(
+                                url, params={"service": api_key, **params},
+                                timeout=min(settings.kopis_timeout, max(remaining, 0.1)),
+                            )
+                    except requests.RequestException as e:
+                        error = e
+                    latency = time.perf_counter() - start
+
+                kopis_request_duration.observe(latency, endpoint)
+                kopis_requests_total.inc(endpoint, "error" if response is None else str(response.status_code))
+
+                retriable = response is None or response.status_code >= 500 or response.status_code == 429
+                self.limiter.on_result(latency, ok=not retriable)
+                if not retriable:
+                    self.breaker.record_success()
+                    return response
+
+                self.breaker.record_failure()
+                detail = (
+                    f"KOPIS request failed: {error}" if response is None
+                    else f"KOPIS upstream returned {response.status_code}"
+                )
+                logger.warning("KOPIS %s attempt %d failed: %s", endpoint, attempt + 1, detail)
+
+                delay = backoff_delay(attempt)
+                attempt += 1
+                if (
+                    attempt > settings.kopis_max_retries
+                    or time.monotonic() + delay >= deadline
+                    or not self.breaker.allow()
+                ):
+                    raise HTTPException(status_code=502, detail=detail)
+                time.sleep(delay)
+        except HTTPException:
+            raise
+        except Exception:
+            # Not an upstream failure (a bug or a non-requests error): give
+            # back the call so a half-open circuit can send another probe
+            self.breaker.release()
+            raise
 
     def get_concerts(
         self,
@@ -22,8 +216,23 @@ class KopisService:
         eddate: str,
         cpage: int = 1,
         rows: int = 20,
-        shcate: str = "CCCD"  # CCCD = 대중음악
+        shcate: str = "CCCD",
+        priority: str = Priority.USER,
     ) -> Dict[str, Any]:
+        """Fetch concert listings (see get_concerts_entry)"""
+        return self.get_concerts_entry(stdate, eddate, cpage, rows, shcate, priority).payload
+
+    def get_concerts_entry(
+        self,
+        stdate: str,
+        eddate: str,
+        cpage: int = 1,
+        rows: int = 20,
+        shcate: str = "CCCD",  # CCCD = 대중음악
+        priority: str = Priority.USER,
+        refresh: bool = False,
+        on: Optional[str] = None,
+    ) -> ListingEntry:
         """
         Fetch concert listings from KOPIS API
 
@@ -33,65 +242,211 @@ class KopisService:
             cpage: Page number (default: 1)
             rows: Results per page (default: 20)
             shcate: Genre code (default: CCCD for popular music)
+            priority: Quota priority of the upstream call on a cache miss
+            refresh: Rebuild the page even if it is cached (cache warming)
+            on: Only performances running on this day (YYYYMMDD), which
+                must lie within [stdate, eddate]
 
         Returns:
-            Dict containing metadata, raw response, and normalized items
+            ListingEntry whose payload contains metadata, the raw KOPIS
+            items of the page, and normalized items.
+
+        The range is served from canonical segments (see range_planner):
+        each segment is fetched from KOPIS once and shared by every query
+        overlapping it. The stitched page is also cached per query until
+        its oldest segment expires. Ranges too long for segments, and
+        ranges whose segments were truncated, are fetched from KOPIS page
+        by page instead; their meta.total is None (KOPIS does not report it).
         """
-        url = f"{self.BASE_URL}/pblprfr"
+        cache_key = self.listing_key(stdate, eddate, cpage, rows, shcate, on)
+        if not refresh:
+            with span("cache", tier="memory", key=cache_key) as cache_span:
+                entry = self.listing_cache.get(cache_key)
+                if cache_span is not None:
+                    cache_span.attrs["hit"] = entry is not None
+            if entry is not None:
+                cache_requests_total.inc("memory", "hit")
+                return entry
+            cache_requests_total.inc("memory", "miss")
+
+        try:
+            try:
+                segments = plan_segments(stdate, eddate, settings.listing_segment_unit)
+            except RangeTooLong:
+                segments = []
+            if on is not None:
+                # Running on `on` = overlapping [on, on]: one segment suffices
+                segments = plan_segments(on, on, settings.listing_segment_unit)
+                if not stdate <= on <= eddate:
+                    raise ValueError("on must be within stdate and eddate")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        matched: Optional[List[Dict[str, Any]]] = None
+        try:
+            fetched = [self._get_segment(segment, shcate, priority) for segment in segments]
+            if fetched and not any(data.truncated for data in fetched):
+                with span("stitch", segments=len(segments)):
+                    matched = stitch((data.items for data in fetched), on or stdate, on or eddate)
+                    page = paginate(matched, cpage, rows)
+            else:
+                # Segments cannot answer exactly: ask KOPIS for this page
+                fetched = []
+                page = self._fetch_page(on or stdate, on or eddate, cpage, rows, shcate, priority)
+        except HTTPException:
+            # Serve the last known listing rather than an error
+            stale = self.listing_cache.get_stale(cache_key)
+            if stale is None:
+                raise
+            cache_requests_total.inc("memory", "stale")
+            return stale
+
+        payload = {
+            "meta": {
+                "cpage": cpage,
+                "rows": rows,
+                "stdate": stdate,
+                "eddate": eddate,
+                "shcate": shcate,
+                "total": len(matched) if matched is not None else None
+            },
+            # Same shape as a KOPIS XML-to-JSON page
+            "raw": {"dbs": {"db": page} if page else None},
+            "items": self._normalize_items(page)
+        }
+        if on:
+            payload["meta"]["on"] = on
+
+        # Version the entry by its content so the validator is stable
+        # across workers and cache refills of identical data
+        entry = ListingEntry(payload=payload, etag="")
+        entry.etag = content_etag(entry.body)
+
+        oldest = min((data.fetched_at for data in fetched), default=time.monotonic())
+        ttl = settings.listing_cache_ttl - (time.monotonic() - oldest)
+        self.listing_cache.set(cache_key, entry, ttl=max(ttl, 0))
+        return entry
+
+    @staticmethod
+    def listing_key(
+        stdate: str, eddate: str, cpage: int, rows: int, shcate: str = "CCCD", on: Optional[str] = None
+    ) -> str:
+        key = f"concerts:{shcate}:{stdate}:{eddate}:{cpage}:{rows}"
+        return f"{key}:{on}" if on else key
+
+    @staticmethod
+    def segment_key(segment: Segment, shcate: str = "CCCD") -> str:
+        return f"segment:{shcate}:{segment.stdate}:{segment.eddate}"
+
+    def segment_items(self, segment: Segment, shcate: str = "CCCD", priority: str = Priority.SYNC) -> List[Dict[str, Any]]:
+        """Raw KOPIS items of a segment (cached like listing segments)"""
+        return self._get_segment(segment, shcate, priority).items
+
+    def refresh_segment(self, segment: Segment, shcate: str = "CCCD", priority: str = Priority.PREFETCH) -> None:
+        """Re-fetch a segment ahead of its expiry (raises HTTPException on failure)"""
+        key = self.segment_key(segment, shcate)
+        with self._segment_lock(key):
+            self.segment_cache.set(key, self._fetch_segment(segment, shcate, priority))
+
+    def _get_segment(self, segment: Segment, shcate: str, priority: str) -> SegmentData:
+        """Cached items of a segment, fetched from KOPIS on a miss"""
+        key = self.segment_key(segment, shcate)
+        with span("cache", tier="segment", key=key) as cache_span:
+            data = self.segment_cache.get(key)
+            if cache_span is not None:
+                cache_span.attrs["hit"] = data is not None
+        if data is not None:
+            cache_requests_total.inc("segment", "hit")
+            return data
+
+        with self._segment_lock(key):
+            # Another request may have fetched it while we waited
+            data = self.segment_cache.get(key)
+            if data is not None:
+                cache_requests_total.inc("segment", "hit")
+                return data
+            cache_requests_total.inc("segment", "miss")
+
+            try:
+                data = self._fetch_segment(segment, shcate, priority)
+            except HTTPException:
+                stale = self.segment_cache.get_stale(key)
+                if stale is None:
+                    raise
+                cache_requests_total.inc("segment", "stale")
+                return stale
+
+            self.segment_cache.set(key, data)
+            return data
+
+    def _segment_lock(self, key: str) -> threading.Lock:
+        return self._segment_locks[hash(key) % SEGMENT_LOCK_STRIPES]
+
+    def _fetch_segment(self, segment: Segment, shcate: str, priority: str) -> SegmentData:
+        """Fetch every page of a segment from KOPIS"""
+        rows = settings.listing_segment_rows
+        items: List[Dict[str, Any]] = []
+        for cpage in range(1, settings.listing_segment_max_pages + 1):
+            page = self._fetch_page(segment.stdate, segment.eddate, cpage, rows, shcate, priority)
+            items.extend(page)
+            if len(page) < rows:
+                return SegmentData(items=items, fetched_at=time.monotonic())
+        # Listings over this segment fall back to per-page fetches
+        logger.warning(
+            "KOPIS segment %s-%s truncated at %d pages",
+            segment.stdate, segment.eddate, settings.listing_segment_max_pages,
+        )
+        return SegmentData(items=items, fetched_at=time.monotonic(), truncated=True)
+
+    def _fetch_page(
+        self, stdate: str, eddate: str, cpage: int, rows: int, shcate: str, priority: str
+    ) -> List[Dict[str, Any]]:
+        """Raw items of one KOPIS listing page"""
         params = {
-            "service": self.api_key,
             "stdate": stdate,
             "eddate": eddate,
             "cpage": str(cpage),
             "rows": str(rows),
             "shcate": shcate,
         }
-
-        try:
-            response = requests.get(url, params=params, timeout=15)
-        except requests.RequestException as e:
-            raise HTTPException(
-                status_code=502,
-                detail=f"KOPIS request failed: {e}"
-            )
-
+        response = self._request("pblprfr", params, priority)
         if response.status_code != 200:
+            logger.warning("KOPIS pblprfr returned %s", response.status_code)
             raise HTTPException(
                 status_code=502,
                 detail=f"KOPIS upstream returned {response.status_code}"
             )
+        page = self._extract_items(self._parse(response, "pblprfr"))
+        self.posters.update(
+            (item["mt20id"], item["poster"]) for item in page
+            if item.get("mt20id") and item.get("poster")
+        )
+        return page
+
+    def _extract_items(self, parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Raw items of a parsed KOPIS list page (pblprfr, prfplc)"""
+        # An empty page (past the last one) parses as {"dbs": None}
+        dbs = parsed.get("dbs") or {}
+        items = dbs.get("db") or []
 
+        # Handle single item case (KOPIS returns dict instead of list)
+        if isinstance(items, dict):
+            items = [items]
+        return items
+
+    def _parse(self, response: requests.Response, endpoint: str) -> Dict[str, Any]:
+        """Parse a KOPIS XML response"""
         try:
-            parsed = xmltodict.parse(response.text)
+            with span("xml_parse", bytes=len(response.content)):
+                return xmltodict.parse(response.text)
         except Exception:
+            kopis_requests_total.inc(endpoint, "parse_error")
+            logger.warning("Failed to parse KOPIS %s XML (%d bytes)", endpoint, len(response.content))
             raise HTTPException(
                 status_code=502,
                 detail="Failed to parse KOPIS XML response"
             )
 
-        # Extract items from response
-        dbs = parsed.get("dbs", {})
-        items = dbs.get("db", [])
-
-        # Handle single item case (KOPIS returns dict instead of list)
-        if isinstance(items, dict):
-            items = [items]
-
-        # Normalize items for frontend consumption
-        normalized = self._normalize_items(items)
-
-        return {
-            "meta": {
-                "cpage": cpage,
-                "rows": rows,
-                "stdate": stdate,
-                "eddate": eddate,
-                "shcate": shcate
-            },
-            "raw": parsed,
-            "items": normalized
-        }
-
     def _normalize_items(self, items: List[Dict]) -> List[Dict[str, Any]]:
         """Normalize KOPIS items to a consistent format"""
         return [
@@ -109,6 +464,21 @@ class KopisService:
             for item in items
         ]
 
+    def get_venues_page(self, cpage: int, rows: int = 100, priority: str = Priority.SYNC) -> List[Dict[str, Any]]:
+        """One page of the KOPIS facility list (prfplc, no coordinates)"""
+        response = self._request("prfplc", {"cpage": str(cpage), "rows": str(rows)}, priority)
+        if response.status_code != 200:
+            raise HTTPException(status_code=502, detail=f"KOPIS upstream returned {response.status_code}")
+        return self._extract_items(self._parse(response, "prfplc"))
+
+    def get_venue_detail(self, mt10id: str, priority: str = Priority.SYNC) -> Optional[Dict[str, Any]]:
+        """Facility detail with address and coordinates (la/lo), None if unknown"""
+        response = self._request("prfplc_detail", {}, priority, path=f"prfplc/{mt10id}")
+        if response.status_code != 200:
+            raise HTTPException(status_code=502, detail=f"KOPIS upstream returned {response.status_code}")
+        items = self._extract_items(self._parse(response, "prfplc_detail"))
+        return items[0] if items else None
+
     def get_concert_detail(self, mt20id: str) -> Dict[str, Any]:
         """
         Fetch detailed information for a specific concert
@@ -126,3 +496,31 @@ class KopisService:
 
 # Global service instance
 kopis_service = KopisService()
+
+
+def _circuit_samples():
+    state = kopis_service.breaker.state
+    for name in (CircuitBreaker.CLOSED, CircuitBreaker.HALF_OPEN, CircuitBreaker.OPEN):
+        yield (name,), 1 if name == state else 0
+
+
+def _concurrency_samples():
+    snapshot = kopis_service.limiter.snapshot()
+    yield ("limit",), snapshot["limit"]
+    yield ("inflight",), snapshot["inflight"]
+
+
+def _quota_samples():
+    for label, used in kopis_service.quota.usage().items():
+        yield (label,), used
+
+
+kopis_circuit_state = GaugeFunc(
+    "kopis_circuit_state", "KOPIS circuit breaker state (1 = current)", _circuit_samples, ("state",),
+)
+kopis_concurrency = GaugeFunc(
+    "kopis_concurrency", "KOPIS adaptive concurrency limit and in-flight calls", _concurrency_samples, ("kind",),
+)
+kopis_quota_used = GaugeFunc(
+    "kopis_quota_used", "KOPIS calls charged today per API key", _quota_samples, ("key",),
+)
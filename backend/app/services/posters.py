@@ -0,0 +1,297 @@
+"""Poster image proxy: fetch once, resize in a process pool, cache on disk
+
+KOPIS posters are large, uncompressed and served over slow HTTP. Each
+poster is downloaded once, and resized WebP/JPEG variants are written to
+a content-addressed disk cache shared by all workers:
+
+    <poster_cache_dir>/objects/ab/<sha256 of original>.orig
+    <poster_cache_dir>/objects/ab/<sha256 of original>_<width>.<format>
+    <poster_cache_dir>/refs/<mt20id>      -> sha256 of the original
+
+File mtimes double as LRU timestamps: hits touch the file, and when the
+cache grows past poster_cache_max_mb the least recently used files are
+removed. Resizing is CPU-bound, so it runs in a process pool instead of
+holding the GIL in the request threadpool.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.http_cache import make_etag
+from app.core.metrics import cache_requests_total
+from app.core.tracing import span
+from app.db import database
+from app.db.models import Bookmark
+from app.services.kopis import KopisService, kopis_service
+from app.services.snapshot import catalog_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Named sizes (max width in pixels) for the size query parameter
+SIZES = {"sm": 240, "md": 480, "lg": 960}
+
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+FETCH_TIMEOUT = 10
+RESIZE_TIMEOUT = 30
+
+MT20ID_PATTERN = re.compile(r"^[A-Za-z0-9]{1,20}$")
+
+
+def resize_image(data: bytes, width: int, fmt: str) -> bytes:
+    """Downscale to `width` (keeping aspect ratio) and encode; runs in a worker process"""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.seek(0)  # first frame of animated GIFs
+        if img.width > width:
+            img.thumbnail((width, width * 4), Image.LANCZOS)
+        out = io.BytesIO()
+        if fmt == "webp":
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+            img.save(out, "WEBP", quality=80, method=4)
+        else:
+            img.convert("RGB").save(out, "JPEG", quality=82, optimize=True, progressive=True)
+        return out.getvalue()
+
+
+class PosterStore:
+    """Content-addressed on-disk cache with LRU size-bounded eviction"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _object(self, name: str) -> Path:
+        return self.root / "objects" / name[:2] / name
+
+    def _ref(self, mt20id: str) -> Path:
+        return self.root / "refs" / mt20id
+
+    def source_hash(self, mt20id: str) -> Optional[str]:
+        try:
+            return self._ref(mt20id).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def variant(self, source_hash: str, width: int, fmt: str) -> Optional[Path]:
+        """Path of a cached variant (touched for LRU), or None"""
+        return self._touch(self._object(f"{source_hash}_{width}.{fmt}"))
+
+    def original(self, source_hash: str) -> Optional[bytes]:
+        path = self._touch(self._object(f"{source_hash}.orig"))
+        return path.read_bytes() if path is not None else None
+
+    def put_original(self, mt20id: str, data: bytes) -> str:
+        source_hash = hashlib.sha256(data).hexdigest()
+        self._write(self._object(f"{source_hash}.orig"), data)
+        self._write(self._ref(mt20id), source_hash.encode())
+        return source_hash
+
+    def put_variant(self, source_hash: str, width: int, fmt: str, data: bytes) -> Path:
+        path = self._object(f"{source_hash}_{width}.{fmt}")
+        self._write(path, data)
+        return path
+
+    @staticmethod
+    def _touch(path: Path) -> Optional[Path]:
+        try:
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: Path, data: bytes) -> None:
+        """Atomic write (readers never see partial files)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        if path.parent.parent.name == "objects":
+            self._grow(len(data))
+
+    def _grow(self, added: int) -> None:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(f.stat().st_size for f in self._files())
+            else:
+                self._size += added
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _files(self):
+        objects = self.root / "objects"
+        return [p for p in objects.glob("*/*") if not p.name.startswith(".tmp-")] if objects.exists() else []
+
+    def _evict(self) -> None:
+        """Remove least recently used objects down to 90% of max_bytes"""
+        entries = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        size = sum(e[1] for e in entries)
+        target = self.max_bytes * 0.9
+        removed = 0
+        for _, file_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= file_size
+            removed += 1
+        self._size = size
+        logger.info("Evicted %d poster cache files (%d bytes kept)", removed, size)
+
+
+class PosterService:
+    """Resolve, fetch, resize and cache KOPIS posters"""
+
+    def __init__(self, store: PosterStore, kopis: KopisService):
+        self.store = store
+        self.kopis = kopis
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # One fetch/resize per poster at a time
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=settings.poster_workers)
+            return self._pool
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(cancel_futures=True)
+                self._pool = None
+
+    def _lock(self, mt20id: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(mt20id)
+            if lock is None:
+                lock = self._locks[mt20id] = threading.Lock()
+            return lock
+
+    def get(self, mt20id: str, width: int, fmt: str) -> Tuple[Path, str]:
+        """Path and ETag of the requested variant, building it on a miss"""
+        if not MT20ID_PATTERN.match(mt20id):
+            raise HTTPException(status_code=404, detail="Poster not found")
+
+        hit = self._cached(mt20id, width, fmt)
+        if hit is not None:
+            cache_requests_total.inc("poster", "hit")
+            return hit
+
+        with self._lock(mt20id):
+            hit = self._cached(mt20id, width, fmt)
+            if hit is not None:
+                cache_requests_total.inc("poster", "hit")
+                return hit
+            cache_requests_total.inc("poster", "miss")
+
+            source_hash = self.store.source_hash(mt20id)
+            original = self.store.original(source_hash) if source_hash else None
+            if original is None:
+                original = self._download(self._resolve_url(mt20id))
+                source_hash = self.store.put_original(mt20id, original)
+
+            with span("poster_resize", width=width, format=fmt):
+                try:
+                    data = self.pool.submit(resize_image, original, width, fmt).result(RESIZE_TIMEOUT)
+                except Exception as e:
+                    logger.warning("Failed to resize poster %s: %s", mt20id, e)
+                    raise HTTPException(status_code=502, detail="Failed to process poster image")
+
+            path = self.store.put_variant(source_hash, width, fmt, data)
+            return path, make_etag("poster", source_hash, width, fmt)
+
+    def _cached(self, mt20id: str, width: int, fmt: str) -> Optional[Tuple[Path, str]]:
+        source_hash = self.store.source_hash(mt20id)
+        if source_hash is None:
+            return None
+        path = self.store.variant(source_hash, width, fmt)
+        if path is None:
+            return None
+        return path, make_etag("poster", source_hash, width, fmt)
+
+    def _resolve_url(self, mt20id: str) -> str:
+        """Poster URL from fetched listings, the catalog snapshot, then bookmarks"""
+        url = self.kopis.posters.get(mt20id)
+        if not url:
+            snapshot = catalog_snapshot.current()
+            item = snapshot.find(mt20id) if snapshot is not None else None
+            url = item["poster"] if item else None
+        # Bookmarks only as a last resort, and only when a database is configured
+        if not url and database.SessionLocal is not None:
+            db = database.read_session()
+            try:
+                url = (
+                    db.query(Bookmark.poster_url)
+                    .filter(Bookmark.concert_id == mt20id, Bookmark.poster_url.isnot(None))
+                    .limit(1)
+                    .scalar()
+                )
+            finally:
+                db.close()
+        if not url:
+            raise HTTPException(status_code=404, detail="Poster not found")
+        return url
+
+    def _download(self, url: str) -> bytes:
+        """Fetch an original poster from KOPIS (and nowhere else)"""
+        host = urlparse(url).hostname or ""
+        allowed = {urlparse(settings.kopis_base_url).hostname}
+        if not (host in allowed or host == "kopis.or.kr" or host.endswith(".kopis.or.kr")):
+            raise HTTPException(status_code=404, detail="Poster not found")
+
+        try:
+            # No redirects: the host check above must hold for the URL actually fetched
+            with span("poster_fetch", url=url), \
+                    requests.get(url, timeout=FETCH_TIMEOUT, stream=True, allow_redirects=False) as response:
+                if response.status_code != 200:
+                    raise HTTPException(
+                        status_code=502,
+                        detail=f"Poster upstream returned {response.status_code}"
+                    )
+                data = response.raw.read(MAX_DOWNLOAD_BYTES + 1, decode_content=True)
+        except requests.RequestException as e:
+            logger.warning("Poster fetch failed for %s: %s", url, e)
+            raise HTTPException(status_code=502, detail="Poster fetch failed")
+
+        if len(data) > MAX_DOWNLOAD_BYTES:
+            raise HTTPException(status_code=502, detail="Poster image too large")
+        return data
+
+
+# Global service instance
+poster_service = PosterService(
+    PosterStore(settings.poster_cache_dir, settings.poster_cache_max_mb * 1024 * 1024),
+    kopis_service,
+)
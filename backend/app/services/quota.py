@@ -0,0 +1,213 @@
+"""KOPIS API-key quota accounting
+
+KOPIS keys have a daily call quota. Every upstream call is charged to a
+key for the current KOPIS day (KST). Calls are ranked by priority and each
+priority may only spend up to its share of the remaining budget, so
+background work stops first and user-facing cache misses keep the last
+part of the quota. Once a priority's share is gone, callers fall back to
+cached data (cache-only mode).
+
+The local store counts per process; serve.py divides the daily limit by
+the worker count in that case, so N workers together stay within it.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+KST = timezone(timedelta(hours=9))
+
+
+class Priority:
+    """Upstream call priorities (highest first)"""
+    USER = "user"  # user-facing cache miss
+    SYNC = "sync"  # background catalog sync
+    PREFETCH = "prefetch"  # cache warming
+
+    ALL = (USER, SYNC, PREFETCH)
+
+
+# Fraction of each key's daily quota a priority may use
+DEFAULT_SHARES = {
+    Priority.USER: 1.0,
+    Priority.SYNC: 0.8,
+    Priority.PREFETCH: 0.5,
+}
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """KOPIS quota day (quotas reset at midnight KST)"""
+    return (now or datetime.now(KST)).astimezone(KST).strftime("%Y%m%d")
+
+
+def seconds_until_reset(now: Optional[datetime] = None) -> int:
+    """Seconds until the next KOPIS quota day starts"""
+    now = (now or datetime.now(KST)).astimezone(KST)
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+def key_label(api_key: str) -> str:
+    """Short non-secret identifier for logs, metrics and storage keys"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+class LocalQuotaStore:
+    """Per-process call counters (each worker counts its own calls)"""
+
+    def __init__(self):
+        self._counts: Dict[tuple, int] = {}
+        self._lock = threading.Lock()
+
+    def charge(self, label: str, day: str, limit: int) -> bool:
+        """Count one call unless `limit` calls were already counted"""
+        with self._lock:
+            # Only today's counters are ever read; drop older days
+            for stale in [k for k in self._counts if k[1] != day]:
+                del self._counts[stale]
+            count = self._counts.get((label, day), 0)
+            if count >= limit:
+                return False
+            self._counts[(label, day)] = count + 1
+            return True
+
+    def get(self, label: str, day: str) -> int:
+        with self._lock:
+            return self._counts.get((label, day), 0)
+
+
+class RedisQuotaStore:
+    """Call counters shared by all workers and instances"""
+
+    # Check and increment in one step, so concurrent workers cannot both
+    # take the last call of a budget
+    CHARGE_SCRIPT = """
+    local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if used >= tonumber(ARGV[1]) then
+        return 0
+    end
+    redis.call('INCR', KEYS[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    def __init__(self, redis_url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url, socket_timeout=1)
+        self._charge = self.client.register_script(self.CHARGE_SCRIPT)
+
+    @staticmethod
+    def _key(label: str, day: str) -> str:
+        return f"kopis:quota:{day}:{label}"
+
+    def charge(self, label: str, day: str, limit: int) -> bool:
+        """Count one call unless `limit` calls were already counted"""
+        return bool(self._charge(keys=[self._key(label, day)], args=[limit, 2 * 24 * 3600]))
+
+    def get(self, label: str, day: str) -> int:
+        return int(self.client.get(self._key(label, day)) or 0)
+
+
+def make_store(backend: str, redis_url: str):
+    """Quota store for the configured backend ("local" or "redis")"""
+    if backend == "redis":
+        try:
+            return RedisQuotaStore(redis_url)
+        except ImportError:
+            logger.warning("redis is not installed; counting KOPIS quota per process")
+    return LocalQuotaStore()
+
+
+class QuotaManager:
+    """
+    Pick an API key with budget left for a call of a given priority
+
+    With several keys, calls go to the key with the most remaining budget,
+    spreading load so no single key runs dry early.
+    """
+
+    def __init__(
+        self,
+        api_keys: List[str],
+        daily_limit: int,
+        store=None,
+        shares: Optional[Dict[str, float]] = None,
+    ):
+        self.api_keys = api_keys
+        self.labels = {key: key_label(key) for key in api_keys}
+        self.daily_limit = daily_limit
+        self.store = store or LocalQuotaStore()
+        self.shares = shares or DEFAULT_SHARES
+
+    def split(self, workers: int) -> None:
+        """
+        Give this process 1/workers of the daily limit when its counts are
+        not shared (local store), so the workers together stay within it
+        """
+        if workers > 1 and self.daily_limit > 0 and isinstance(self.store, LocalQuotaStore):
+            self.daily_limit = max(1, self.daily_limit // workers)
+
+    def acquire(self, priority: str = Priority.USER) -> Optional[str]:
+        """
+        Charge one call and return the key to use, or None if the budget
+        for this priority is spent (caller should serve cached data)
+        """
+        if self.daily_limit <= 0:
+            return self.api_keys[0]
+
+        # Calls are whole: a share of 7.5 calls allows 8
+        allowance = math.ceil(self.daily_limit * self.shares.get(priority, 1.0))
+        day = quota_day()
+        try:
+            used = {key: self.store.get(self.labels[key], day) for key in self.api_keys}
+        except Exception as e:
+            # Quota store down: keep serving rather than blocking users
+            logger.warning("KOPIS quota store unavailable: %s", e)
+            return self.api_keys[0]
+
+        # Least used first. The counts above may be stale by the time a
+        # key is charged (other threads and workers), so the store checks
+        # the allowance again atomically and a spent key falls through.
+        for key in sorted(self.api_keys, key=lambda k: used[k]):
+            if used[key] >= allowance:
+                break
+            try:
+                if self.store.charge(self.labels[key], day, allowance):
+                    return key
+            except Exception as e:
+                logger.warning("KOPIS quota store unavailable: %s", e)
+                return key
+        return None
+
+    def usage(self) -> Dict[str, int]:
+        """Calls charged today, per key label"""
+        day = quota_day()
+        try:
+            return {self.labels[key]: self.store.get(self.labels[key], day) for key in self.api_keys}
+        except Exception:
+            return {}
+
+    def snapshot(self) -> Dict[str, object]:
+        usage = self.usage()
+        remaining = sum(max(self.daily_limit - used, 0) for used in usage.values())
+        return {
+            "day": quota_day(),
+            "daily_limit_per_key": self.daily_limit,
+            "used": usage,
+            "remaining": remaining if self.daily_limit > 0 else None,
+            "allowed": {
+                priority: self._allowed(priority, usage) for priority in Priority.ALL
+            },
+        }
+
+    def _allowed(self, priority: str, usage: Dict[str, int]) -> bool:
+        if self.daily_limit <= 0 or not usage:
+            return True
+        allowance = self.daily_limit * self.shares.get(priority, 1.0)
+        return min(usage.values()) < allowance
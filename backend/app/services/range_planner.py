@@ -0,0 +1,112 @@
+"""Date-range planning for KOPIS listings
+
+Raw stdate/eddate pairs rarely repeat across clients, so caching per
+query hits poorly. Instead, a requested range is split into canonical,
+calendar-aligned segments (months or ISO weeks). Each segment is fetched
+in full and cached on its own; a query is answered by stitching its
+segments together, dropping duplicates (performances that run across a
+segment boundary appear in both), filtering to the requested range and
+paginating server-side. Ranges longer than MAX_SEGMENTS raise
+RangeTooLong; callers fetch those directly instead.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List
+
+# Longest range served from segments, per unit (keeps one query from
+# fanning out into a long run of upstream calls). Either unit fits a whole
+# calendar month: a month touches up to 6 ISO weeks.
+MAX_SEGMENTS = {"month": 4, "week": 6}
+
+
+class RangeTooLong(ValueError):
+    """The range spans more than MAX_SEGMENTS segments"""
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A calendar-aligned date window [start, end]"""
+    start: date
+    end: date
+
+    @property
+    def stdate(self) -> str:
+        return self.start.strftime("%Y%m%d")
+
+    @property
+    def eddate(self) -> str:
+        return self.end.strftime("%Y%m%d")
+
+
+def parse_ymd(value: str) -> date:
+    """Parse a YYYYMMDD string (ValueError if malformed)"""
+    try:
+        return datetime.strptime(value, "%Y%m%d").date()
+    except ValueError:
+        raise ValueError(f"invalid date {value!r}, expected YYYYMMDD")
+
+
+def _month_segment(day: date) -> Segment:
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return Segment(start, next_month - timedelta(days=1))
+
+
+def _week_segment(day: date) -> Segment:
+    start = day - timedelta(days=day.weekday())
+    return Segment(start, start + timedelta(days=6))
+
+
+def plan_segments(stdate: str, eddate: str, unit: str = "month") -> List[Segment]:
+    """
+    Canonical segments covering [stdate, eddate]
+
+    Raises ValueError for malformed dates or inverted ranges, and
+    RangeTooLong for ranges spanning more than MAX_SEGMENTS[unit] segments.
+    """
+    start, end = parse_ymd(stdate), parse_ymd(eddate)
+    if end < start:
+        raise ValueError("eddate must not be before stdate")
+
+    unit = "week" if unit == "week" else "month"
+    segment_of = _week_segment if unit == "week" else _month_segment
+    limit = MAX_SEGMENTS[unit]
+    segments = []
+    current = segment_of(start)
+    while current.start <= end:
+        segments.append(current)
+        if len(segments) > limit:
+            raise RangeTooLong(f"date range spans more than {limit} {unit}s")
+        current = segment_of(current.end + timedelta(days=1))
+    return segments
+
+
+def _ymd(dotted: str) -> str:
+    """KOPIS dates are YYYY.MM.DD"""
+    return (dotted or "").replace(".", "")
+
+
+def stitch(segment_items: Iterable[List[Dict[str, Any]]], stdate: str, eddate: str) -> List[Dict[str, Any]]:
+    """
+    Merge segment item lists in order, dedupe by mt20id and keep items
+    whose run overlaps [stdate, eddate] (same rule KOPIS applies)
+    """
+    seen = set()
+    merged = []
+    for items in segment_items:
+        for item in items:
+            mt20id = item.get("mt20id")
+            if mt20id is not None and mt20id in seen:
+                continue
+            if _ymd(item.get("prfpdfrom")) > eddate or _ymd(item.get("prfpdto")) < stdate:
+                continue
+            seen.add(mt20id)
+            merged.append(item)
+    return merged
+
+
+def paginate(items: List[Any], cpage: int, rows: int) -> List[Any]:
+    """1-based page of `rows` items"""
+    cpage, rows = max(cpage, 1), max(rows, 1)
+    return items[(cpage - 1) * rows:cpage * rows]
@@ -0,0 +1,146 @@
+"""Upstream resilience primitives: circuit breaker, retry backoff, AIMD limiter
+
+All primitives are thread-safe: KOPIS calls are made from sync routes
+running in the threadpool.
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    closed    -> calls pass; `failure_threshold` consecutive failures open it
+    open      -> calls fail fast until `reset_timeout` seconds have passed
+    half_open -> a single probe call is let through; success closes the
+                 circuit, failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def release(self) -> None:
+        """Give back an allowed call that produced no upstream result"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_after(self) -> int:
+        """Seconds until the next probe is allowed (for Retry-After)"""
+        if self.state != self.OPEN:
+            return 0
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at)))
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after": self.retry_after(),
+        }
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit (additive increase, multiplicative decrease)
+
+    Each fast, successful call raises the limit by 1/limit (about +1 per
+    "window" of calls); a failure or a call slower than `latency_target`
+    multiplies it by `backoff`. As upstream latency rises, fewer requests
+    are kept in flight and the rest fail fast instead of tying up threads.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target: float = 2.0,
+        backoff: float = 0.7,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.inflight = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, timeout: float) -> Iterator[bool]:
+        """Hold an in-flight slot; yields False if none freed up within timeout"""
+        deadline = time.monotonic() + max(timeout, 0)
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            acquired = self.inflight < int(self.limit)
+            if acquired:
+                self.inflight += 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with self._cond:
+                    self.inflight -= 1
+                    self._cond.notify()
+
+    def on_result(self, latency: float, ok: bool) -> None:
+        with self._cond:
+            if ok and latency <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"limit": round(self.limit, 2), "inflight": self.inflight}
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 2.0, rng: Optional[random.Random] = None) -> float:
+    """Full-jitter exponential backoff for retry `attempt` (0-based)"""
+    return (rng or random).uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,177 @@
+"""Probabilistic sketches for analytics: HyperLogLog and Count-Min
+
+Both are fixed-size, so memory and query cost do not grow with traffic,
+and both merge losslessly: sketches built by different workers or for
+different days combine into the sketch of the union (element-wise max
+for HyperLogLog registers, element-wise sum for Count-Min counters).
+
+- HyperLogLog (precision 12, 4096 registers): distinct counts with about
+  1.6% standard error. Serialized sparsely while few registers are set,
+  so the long tail of rarely viewed concerts stays small.
+- Count-Min (2048 x 4 counters): frequency estimates that never
+  undercount and overcount by at most ~0.13% of the total with 98%
+  confidence. HeavyHitters pairs it with the k keys with the largest
+  estimates, which is what "top concerts" needs.
+"""
+
+import hashlib
+import heapq
+import math
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+HLL_PRECISION = 12
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+TOP_K = 100
+
+_HLL_DENSE = 1
+_HLL_SPARSE = 2
+_MASK64 = (1 << 64) - 1
+
+
+def hash64(item: str) -> int:
+    """Stable 64-bit hash (identical across processes, unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "little")
+
+
+class HyperLogLog:
+    """Distinct-count sketch"""
+
+    def __init__(self, precision: int = HLL_PRECISION, registers: Optional[bytearray] = None):
+        self.p = precision
+        self.m = 1 << precision
+        self.registers = registers if registers is not None else bytearray(self.m)
+
+    def add(self, item: str) -> None:
+        h = hash64(item)
+        index = h >> (64 - self.p)
+        rest = (h << self.p) & _MASK64
+        rank = 64 - self.p + 1 if rest == 0 else 65 - rest.bit_length()
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, other: "HyperLogLog") -> None:
+        """Merge another sketch into this one"""
+        if other.p != self.p:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            return round(m * math.log(m / zeros))
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        set_registers = [(i, r) for i, r in enumerate(self.registers) if r]
+        if len(set_registers) * 3 < self.m:
+            body = b"".join(struct.pack("<HB", i, r) for i, r in set_registers)
+            return bytes((_HLL_SPARSE, self.p)) + body
+        return bytes((_HLL_DENSE, self.p)) + bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        encoding, precision = data[0], data[1]
+        if encoding == _HLL_DENSE:
+            return cls(precision, bytearray(data[2:]))
+        sketch = cls(precision)
+        for i, r in struct.iter_unpack("<HB", data[2:]):
+            sketch.registers[i] = r
+        return sketch
+
+
+class CountMinSketch:
+    """Frequency sketch (estimates are upper bounds)"""
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH, counters: Optional[array] = None):
+        self.width = width
+        self.depth = depth
+        self.counters = counters if counters is not None else array("I", bytes(4 * width * depth))
+
+    def _cells(self, item: str) -> List[int]:
+        # Double hashing: row i uses h1 + i * h2
+        h = hash64(item)
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        """Add and return the new estimate"""
+        cells = self._cells(item)
+        for cell in cells:
+            self.counters[cell] += count
+        return min(self.counters[cell] for cell in cells)
+
+    def estimate(self, item: str) -> int:
+        return min(self.counters[cell] for cell in self._cells(item))
+
+    def update(self, other: "CountMinSketch") -> None:
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("cannot merge Count-Min sketches of different shape")
+        self.counters = array("I", map(int.__add__, self.counters, other.counters))
+
+    def to_bytes(self) -> bytes:
+        counters = self.counters
+        if sys.byteorder != "little":
+            counters = array("I", counters)
+            counters.byteswap()
+        return struct.pack("<HH", self.width, self.depth) + counters.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        width, depth = struct.unpack_from("<HH", data)
+        counters = array("I")
+        counters.frombytes(data[4:])
+        if sys.byteorder != "little":
+            counters.byteswap()
+        return cls(width, depth, counters)
+
+
+class HeavyHitters:
+    """Count-Min sketch plus the k keys with the largest estimates"""
+
+    def __init__(self, k: int = TOP_K, sketch: Optional[CountMinSketch] = None, candidates: Iterable[str] = ()):
+        self.k = k
+        self.sketch = sketch or CountMinSketch()
+        self.candidates: Dict[str, int] = {}
+        for key in candidates:
+            self.candidates[key] = self.sketch.estimate(key)
+
+    def add(self, item: str, count: int = 1) -> None:
+        self._offer(item, self.sketch.add(item, count))
+
+    def update(self, other: "HeavyHitters") -> None:
+        self.sketch.update(other.sketch)
+        keys = set(self.candidates) | set(other.candidates)
+        self.candidates = {}
+        for key in keys:
+            self._offer(key, self.sketch.estimate(key))
+
+    def _offer(self, item: str, estimate: int) -> None:
+        if item in self.candidates or len(self.candidates) < self.k:
+            self.candidates[item] = estimate
+            return
+        smallest = min(self.candidates, key=self.candidates.get)
+        if estimate > self.candidates[smallest]:
+            del self.candidates[smallest]
+            self.candidates[item] = estimate
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        return heapq.nlargest(n, self.candidates.items(), key=lambda kv: kv[1])
+
+    def to_bytes(self) -> bytes:
+        keys = "\n".join(self.candidates).encode()
+        return struct.pack("<HI", self.k, len(keys)) + keys + self.sketch.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HeavyHitters":
+        k, length = struct.unpack_from("<HI", data)
+        keys = data[6:6 + length].decode()
+        sketch = CountMinSketch.from_bytes(data[6 + length:])
+        return cls(k, sketch, keys.split("\n") if keys else ())
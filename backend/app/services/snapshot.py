@@ -0,0 +1,349 @@
+"""Read-only columnar catalog snapshot shared by all workers through mmap
+
+sync_catalog.py writes the normalized concert fields (the same fields
+KopisService._normalize_items returns) into one file, and every worker
+maps it read-only. The page cache holds a single copy however many
+workers run, and nothing is deserialized up front: fields are decoded
+only for the rows a response returns.
+
+Layout (sections 8-byte aligned). The header is packed little-endian;
+the columns are arrays in the writer's native byte order, which
+memoryview.cast reads back as is, so a snapshot is read on hosts with
+the byte order of the one that wrote it (little-endian in practice):
+
+    header      magic, version, rows, strings, covered start/end (date ordinals)
+    columns     mt20id, prfnm, fcltynm, poster, genrenm, area: u32 string ids
+                prfpdfrom, prfpdto: i32 date ordinals
+                openrun: u8
+    by_end      u32 row numbers ordered by prfpdto
+    strings     u32 offsets (strings + 1) and the UTF-8 blob; id 0 is None
+
+Rows are ordered by (prfpdfrom, mt20id), so overlap queries bisect the
+start column or the by_end permutation, whichever leaves fewer rows to
+check. The writer replaces the file atomically (os.replace); workers
+notice the new inode within CATALOG_SNAPSHOT_CHECK_INTERVAL seconds and
+swap to it, while requests already holding the old mapping finish on it.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import LocalCache
+from app.core.config import settings
+from app.core.http_cache import content_etag
+from app.db.models import Concert
+from app.services.kopis import ListingEntry
+from app.services.range_planner import paginate, parse_ymd
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FYSCAT01"
+HEADER = struct.Struct("<8sQIIii")
+STRING_COLUMNS = ("mt20id", "prfnm", "fcltynm", "poster", "genrenm", "area")
+FACETS = ("genrenm", "area")
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _section_sizes(rows: int, strings: int, blob: int) -> List[Tuple[str, int]]:
+    return (
+        [(name, 4 * rows) for name in STRING_COLUMNS]
+        + [("prfpdfrom", 4 * rows), ("prfpdto", 4 * rows), ("openrun", rows), ("by_end", 4 * rows)]
+        + [("offsets", 4 * (strings + 1)), ("blob", blob)]
+    )
+
+
+def write_snapshot(path: str, concerts: Iterable[Concert], covers: Tuple[date, date]) -> int:
+    """
+    Write a snapshot of `concerts` atomically; returns its version
+
+    `covers` is the date range the catalog was synced for: listings for
+    ranges inside it are served from the snapshot.
+    """
+    rows = []
+    for concert in concerts:
+        if concert.prfpdfrom is None:
+            continue
+        start = concert.prfpdfrom.toordinal()
+        end = concert.prfpdto.toordinal() if concert.prfpdto and concert.prfpdto >= concert.prfpdfrom else start
+        rows.append((start, concert.mt20id, end, concert))
+    rows.sort(key=lambda row: (row[0], row[1]))
+
+    strings: Dict[Optional[str], int] = {None: 0}
+    blob = bytearray()
+    offsets = array("I", [0, 0])
+
+    def intern(value: Optional[str]) -> int:
+        if not value:
+            return 0
+        string_id = strings.get(value)
+        if string_id is None:
+            string_id = strings[value] = len(strings)
+            blob.extend(value.encode())
+            offsets.append(len(blob))
+        return string_id
+
+    columns = {name: array("I") for name in STRING_COLUMNS}
+    starts, ends, openrun = array("i"), array("i"), bytearray()
+    for start, _, end, concert in rows:
+        for name in STRING_COLUMNS:
+            columns[name].append(intern(getattr(concert, name)))
+        starts.append(start)
+        ends.append(end)
+        openrun.append(1 if concert.openrun else 0)
+    by_end = array("I", sorted(range(len(rows)), key=ends.__getitem__))
+
+    sections = dict(columns, prfpdfrom=starts, prfpdto=ends, openrun=openrun, by_end=by_end, offsets=offsets, blob=blob)
+    version = time.time_ns()
+    header = HEADER.pack(MAGIC, version, len(rows), len(strings), covers[0].toordinal(), covers[1].toordinal())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            position = len(header)
+            for name, _ in _section_sizes(len(rows), len(strings), len(blob)):
+                f.write(b"\0" * (_align(position) - position))
+                payload = bytes(sections[name])
+                f.write(payload)
+                position = _align(position) + len(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    logger.info("Wrote catalog snapshot %s: %d concerts, %d strings", path, len(rows), len(strings))
+    return version
+
+
+class CatalogSnapshot:
+    """A mapped snapshot file; all columns are zero-copy memoryviews"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, self.size, strings, covers_start, covers_end = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        self.covers = (covers_start, covers_end)
+
+        view = memoryview(self._mmap)
+        self._columns: Dict[str, memoryview] = {}
+        position = HEADER.size
+        for name, size in _section_sizes(self.size, strings, 0):
+            position = _align(position)
+            if name == "blob":
+                self._blob = view[position:]
+                break
+            section = view[position:position + size]
+            self._columns[name] = section if name == "openrun" else section.cast("i" if name in ("prfpdfrom", "prfpdto") else "I")
+            position += size
+        self._offsets = self._columns.pop("offsets")
+        self._starts = self._columns["prfpdfrom"]
+        self._ends = self._columns["prfpdto"]
+        self._by_end = self._columns["by_end"]
+        self._ids: Optional[Dict[str, int]] = None
+
+    def string(self, string_id: int) -> Optional[str]:
+        if not string_id:
+            return None
+        return str(self._blob[self._offsets[string_id]:self._offsets[string_id + 1]], "utf-8")
+
+    def item(self, row: int) -> Dict[str, Any]:
+        """Row in the normalized listing item shape"""
+        item = {name: self.string(self._columns[name][row]) for name in STRING_COLUMNS}
+        item["prfpdfrom"] = date.fromordinal(self._starts[row]).strftime("%Y.%m.%d")
+        item["prfpdto"] = date.fromordinal(self._ends[row]).strftime("%Y.%m.%d")
+        item["openrun"] = "Y" if self._columns["openrun"][row] else "N"
+        return {key: item[key] for key in ("mt20id", "prfnm", "prfpdfrom", "prfpdto", "fcltynm",
+                                           "poster", "genrenm", "area", "openrun")}
+
+    def covered(self, lo: int, hi: int) -> bool:
+        return self.covers[0] <= lo and hi <= self.covers[1]
+
+    def overlapping(self, lo: int, hi: int) -> List[int]:
+        """Rows whose run overlaps [lo, hi], in (prfpdfrom, mt20id) order"""
+        started = bisect_right(self._starts, hi)  # rows [0, started) start on or before hi
+        first_end = bisect_left(self._by_end, lo, key=self._ends.__getitem__)
+        if started <= self.size - first_end:
+            ends = self._ends
+            return [row for row in range(started) if ends[row] >= lo]
+        starts = self._starts
+        return sorted(row for row in self._by_end[first_end:] if starts[row] <= hi)
+
+    def facets(self, rows: List[int]) -> Dict[str, Dict[str, int]]:
+        result = {}
+        for name in FACETS:
+            column = self._columns[name]
+            counts = Counter(column[row] for row in rows)
+            result[name] = {self.string(string_id) or "": count for string_id, count in counts.most_common()}
+        return result
+
+    def find(self, mt20id: str) -> Optional[Dict[str, Any]]:
+        """Item by KOPIS ID (the ID map is built on first use)"""
+        if self._ids is None:
+            column = self._columns["mt20id"]
+            self._ids = {self.string(column[row]): row for row in range(self.size)}
+        row = self._ids.get(mt20id)
+        return self.item(row) if row is not None else None
+
+
+class SnapshotManager:
+    """Serve the newest snapshot at `path`, swapping when the file is replaced"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._stat: Optional[Tuple[int, int]] = None
+        self._checked_at = float("-inf")
+        self._stale_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self.cache = LocalCache(max_entries=settings.listing_cache_max_entries, ttl=settings.listing_cache_ttl)
+
+    def current(self) -> Optional[CatalogSnapshot]:
+        if not self.path:
+            return None
+        if time.monotonic() - self._checked_at < settings.catalog_snapshot_check_interval:
+            return self._snapshot
+        with self._lock:
+            if time.monotonic() - self._checked_at >= settings.catalog_snapshot_check_interval:
+                self._checked_at = time.monotonic()
+                self._reload()
+            return self._snapshot
+
+    def _reload(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return  # keep serving the mapped version, if any
+        if (stat.st_ino, stat.st_mtime_ns) == self._stat:
+            return
+        try:
+            snapshot = CatalogSnapshot(self.path)
+        except (OSError, ValueError, struct.error):
+            logger.exception("Failed to load catalog snapshot %s", self.path)
+            return
+        self._snapshot, self._stat = snapshot, (stat.st_ino, stat.st_mtime_ns)
+        logger.info("Mapped catalog snapshot version %d (%d concerts)", snapshot.version, snapshot.size)
+
+    def fresh(self) -> Optional[CatalogSnapshot]:
+        """
+        The current snapshot unless it is older than CATALOG_SNAPSHOT_MAX_AGE
+
+        A snapshot the sync stopped replacing would otherwise be served
+        forever; past the limit, listings fall back to KOPIS.
+        """
+        snapshot = self.current()
+        if snapshot is None or settings.catalog_snapshot_max_age <= 0:
+            return snapshot
+        if time.time() - snapshot.version / 1e9 <= settings.catalog_snapshot_max_age:
+            return snapshot
+        if self._stale_version != snapshot.version:
+            self._stale_version = snapshot.version
+            logger.warning("Catalog snapshot version %d is older than %ds; not serving it",
+                           snapshot.version, settings.catalog_snapshot_max_age)
+        return None
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        return {
+            "version": snapshot.version,
+            "age_seconds": int(time.time() - snapshot.version / 1e9),
+            "serving": self.fresh() is not None,
+            "concerts": snapshot.size,
+            "covers": [date.fromordinal(o).strftime("%Y%m%d") for o in snapshot.covers],
+        }
+
+    def facets(self, stdate: str, eddate: str) -> Optional[Dict[str, Any]]:
+        """
+        Genre and area counts of concerts overlapping [stdate, eddate],
+        or None when the snapshot does not cover the range
+
+        Raises ValueError for malformed or inverted dates.
+        """
+        lo, hi = parse_ymd(stdate).toordinal(), parse_ymd(eddate).toordinal()
+        if hi < lo:
+            raise ValueError("eddate must not be before stdate")
+        snapshot = self.fresh()
+        if snapshot is None or not snapshot.covered(lo, hi):
+            return None
+        matched = snapshot.overlapping(lo, hi)
+        return {"stdate": stdate, "eddate": eddate, "total": len(matched), **snapshot.facets(matched)}
+
+    def get_concerts_entry(
+        self,
+        stdate: str,
+        eddate: str,
+        cpage: int = 1,
+        rows: int = 20,
+        on: Optional[str] = None,
+    ) -> Optional[ListingEntry]:
+        """
+        Listing page in the KopisService.get_concerts_entry shape, or None
+        when there is no snapshot or it does not cover the range
+        (malformed dates also return None; the KOPIS path reports them)
+        """
+        snapshot = self.fresh()
+        if snapshot is None:
+            return None
+        try:
+            lo, hi = parse_ymd(stdate).toordinal(), parse_ymd(eddate).toordinal()
+            if on is not None:
+                day = parse_ymd(on).toordinal()
+                if not lo <= day <= hi:
+                    return None
+                lo = hi = day
+        except ValueError:
+            return None
+        if hi < lo or not snapshot.covered(lo, hi):
+            return None
+
+        cache_key = f"snapshot:{snapshot.version}:{stdate}:{eddate}:{cpage}:{rows}:{on}"
+        entry = self.cache.get(cache_key)
+        if entry is not None:
+            return entry
+
+        matched = snapshot.overlapping(lo, hi)
+        page = [snapshot.item(row) for row in paginate(matched, cpage, rows)]
+        payload = {
+            "meta": {
+                "cpage": cpage,
+                "rows": rows,
+                "stdate": stdate,
+                "eddate": eddate,
+                "shcate": "CCCD",
+                "total": len(matched)
+            },
+            "raw": {"dbs": {"db": page} if page else None},
+            "items": page,
+        }
+        if on:
+            payload["meta"]["on"] = on
+        entry = ListingEntry(payload=payload, etag="")
+        entry.etag = content_etag(entry.body)
+        self.cache.set(cache_key, entry)
+        return entry
+
+
+# Global instance
+catalog_snapshot = SnapshotManager(settings.catalog_snapshot_path)
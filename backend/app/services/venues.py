@@ -0,0 +1,280 @@
+"""Venue catalog and "concerts near me" lookups
+
+Listings only carry a facility name (`fcltynm`, e.g. "올림픽공원
+(KSPO DOME(체조경기장))"), so venues are synced separately from the KOPIS
+facility API: the prfplc list, then one prfplc/{mt10id} detail call per
+new venue for its address and coordinates (details are not re-fetched
+unless asked, since each costs a KOPIS call).
+
+Concerts are matched to venues by facility name: the listing name minus
+its trailing "(hall)" part, whitespace-normalized. NearbyIndex keeps a
+GridIndex over venue coordinates plus each venue's catalog concerts,
+rebuilt every NEARBY_INDEX_TTL seconds like the concert calendar, so a
+lookup touches only the grid cells around the query point.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tracing import span
+from app.db import database
+from app.db.models import Concert, Venue
+from app.services.concert_calendar import concert_item
+from app.services.geo import GridIndex
+from app.services.kopis import KopisService, kopis_service
+from app.services.quota import Priority
+from app.services.range_planner import parse_ymd
+
+logger = logging.getLogger(__name__)
+
+# prfplc list page size
+VENUE_PAGE_ROWS = 100
+
+# Coordinates are rounded in responses (about 1 m)
+COORD_DIGITS = 5
+
+
+def venue_key(name: Optional[str]) -> str:
+    """Facility name without its trailing "(hall)" part, for matching"""
+    if not name:
+        return ""
+    name = name.strip()
+    if name.endswith(")"):
+        depth = 0
+        for i in range(len(name) - 1, -1, -1):
+            depth += {")": 1, "(": -1}.get(name[i], 0)
+            if depth == 0:
+                if i > 0:
+                    name = name[:i]
+                break
+    return " ".join(name.split()).casefold()
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(str(value).replace(",", "")) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def venue_values(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Venue column values for a KOPIS facility item (list or detail)"""
+    values = {
+        "fcltynm": item.get("fcltynm") or "",
+        "sidonm": item.get("sidonm"),
+        "gugunnm": item.get("gugunnm"),
+        "adres": item.get("adres"),
+        "lat": _float(item.get("la")),
+        "lng": _float(item.get("lo")),
+        "seatscale": _int(item.get("seatscale")),
+    }
+    # Details lack the list's region fields and vice versa; keep what is known
+    return {k: v for k, v in values.items() if v is not None}
+
+
+class VenueService:
+    """Sync KOPIS facilities into the venues table"""
+
+    def __init__(self, kopis: KopisService):
+        self.kopis = kopis
+
+    def upsert(self, db: Session, items: List[Dict[str, Any]]) -> int:
+        """Insert new venues and update changed ones; returns rows written"""
+        values = {item["mt10id"]: venue_values(item) for item in items if item.get("mt10id")}
+        if not values:
+            return 0
+
+        existing = {venue.mt10id: venue for venue in db.query(Venue).filter(Venue.mt10id.in_(list(values)))}
+        written = 0
+        for mt10id, columns in values.items():
+            venue = existing.get(mt10id)
+            if venue is None:
+                db.add(Venue(mt10id=mt10id, **columns))
+                written += 1
+            elif any(getattr(venue, k) != v for k, v in columns.items()):
+                for k, v in columns.items():
+                    setattr(venue, k, v)
+                written += 1
+        db.commit()
+        if written:
+            nearby_index.invalidate()
+        return written
+
+    def sync(self, db: Session, refresh: bool = False, max_pages: int = 100) -> int:
+        """
+        Sync the facility list, then fetch details for venues without
+        coordinates (all venues with `refresh`); returns rows written
+        """
+        listed: List[Dict[str, Any]] = []
+        for cpage in range(1, max_pages + 1):
+            page = self.kopis.get_venues_page(cpage, VENUE_PAGE_ROWS, priority=Priority.SYNC)
+            listed.extend(page)
+            if len(page) < VENUE_PAGE_ROWS:
+                break
+        written = self.upsert(db, listed)
+
+        located = set() if refresh else set(
+            db.execute(select(Venue.mt10id).where(Venue.lat.isnot(None), Venue.lng.isnot(None))).scalars()
+        )
+        missing = [item["mt10id"] for item in listed if item.get("mt10id") and item["mt10id"] not in located]
+        logger.info("Venue sync: %d listed, fetching %d details", len(listed), len(missing))
+
+        batch: List[Dict[str, Any]] = []
+        for mt10id in missing:
+            detail = self.kopis.get_venue_detail(mt10id, priority=Priority.SYNC)
+            if detail:
+                batch.append({**detail, "mt10id": mt10id})
+            if len(batch) >= VENUE_PAGE_ROWS:
+                written += self.upsert(db, batch)
+                batch = []
+        written += self.upsert(db, batch)
+        return written
+
+
+# (start ordinal, end ordinal, listing item)
+Run = Tuple[int, int, Dict[str, Any]]
+
+
+class NearbyIndex:
+    """Grid index over located venues and their catalog concerts, rebuilt on a TTL"""
+
+    def __init__(self):
+        self._grid: Optional[GridIndex] = None
+        self._concerts: Dict[str, List[Run]] = {}
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        self._built_at = 0.0
+
+    def index(self) -> Tuple[GridIndex, Dict[str, List[Run]]]:
+        if time.monotonic() - self._built_at < settings.nearby_index_ttl and self._grid is not None:
+            return self._grid, self._concerts
+        with self._lock:
+            if time.monotonic() - self._built_at >= settings.nearby_index_ttl or self._grid is None:
+                self._grid, self._concerts = self._build()
+                self._built_at = time.monotonic()
+            return self._grid, self._concerts
+
+    def _build(self) -> Tuple[GridIndex, Dict[str, List[Run]]]:
+        db = database.read_session()
+        try:
+            with span("nearby_index_build"):
+                venues = db.execute(
+                    select(Venue).where(Venue.lat.isnot(None), Venue.lng.isnot(None))
+                ).scalars().all()
+                by_key = {venue_key(v.fcltynm): v.mt10id for v in venues}
+
+                concerts: Dict[str, List[Run]] = defaultdict(list)
+                rows = db.execute(select(Concert).where(Concert.prfpdfrom.isnot(None))).scalars()
+                for concert in rows:
+                    mt10id = by_key.get(venue_key(concert.fcltynm))
+                    if mt10id is None:
+                        continue
+                    start = concert.prfpdfrom
+                    end = concert.prfpdto if concert.prfpdto and concert.prfpdto >= start else start
+                    concerts[mt10id].append((start.toordinal(), end.toordinal(), concert_item(concert)))
+                for runs in concerts.values():
+                    runs.sort(key=lambda run: (run[0], run[2]["mt20id"]))
+
+                points = [(v.lat, v.lng, _venue_item(v)) for v in venues]
+                grid = GridIndex(points, settings.nearby_grid_km)
+        finally:
+            db.close()
+        logger.info(
+            "Built nearby index over %d venues (%d with concerts)", grid.size, len(concerts)
+        )
+        return grid, dict(concerts)
+
+    def nearby(
+        self,
+        lat: float,
+        lng: float,
+        stdate: str,
+        eddate: str,
+        radius: Optional[float] = None,
+        on: Optional[str] = None,
+        venues: int = 20,
+    ) -> Dict[str, Any]:
+        """
+        Venues near (lat, lng) with concerts running in [stdate, eddate]
+        (or on day `on`), nearest first: all within `radius` km up to
+        `venues` of them, or the `venues` nearest when radius is None
+
+        Raises ValueError for malformed or inverted dates.
+        """
+        lo, hi = parse_ymd(stdate).toordinal(), parse_ymd(eddate).toordinal()
+        if hi < lo:
+            raise ValueError("eddate must not be before stdate")
+        if on is not None:
+            day = parse_ymd(on).toordinal()
+            if not lo <= day <= hi:
+                raise ValueError("on must be within stdate..eddate")
+            lo = hi = day
+
+        grid, concerts = self.index()
+        matched: Dict[str, List[Dict[str, Any]]] = {}
+
+        def has_concerts(venue: Dict[str, Any]) -> bool:
+            items = [item for start, end, item in concerts.get(venue["mt10id"], ()) if start <= hi and end >= lo]
+            if items:
+                matched[venue["mt10id"]] = items
+            return bool(items)
+
+        with span("nearby_lookup"):
+            if radius is None:
+                found = grid.nearest(lat, lng, venues, accept=has_concerts)
+            else:
+                found = grid.within(lat, lng, radius, accept=has_concerts)[:venues]
+
+        results = [
+            {**venue, "distance_km": round(distance, 3), "concerts": matched[venue["mt10id"]]}
+            for distance, venue in found
+        ]
+        return {
+            "lat": lat,
+            "lng": lng,
+            "radius": radius,
+            "stdate": stdate,
+            "eddate": eddate,
+            "on": on,
+            "total": sum(len(v["concerts"]) for v in results),
+            "venues": results,
+        }
+
+
+def _venue_item(venue: Venue) -> Dict[str, Any]:
+    return {
+        "mt10id": venue.mt10id,
+        "fcltynm": venue.fcltynm,
+        "adres": venue.adres,
+        "lat": round(venue.lat, COORD_DIGITS),
+        "lng": round(venue.lng, COORD_DIGITS),
+    }
+
+
+def load_fixture(db: Session, path: str) -> int:
+    """Upsert venues from a JSON list of KOPIS facility details (offline stand-in for sync)"""
+    with open(path, encoding="utf-8") as f:
+        items: Iterable[Dict[str, Any]] = json.load(f)
+    return venue_service.upsert(db, list(items))
+
+
+# Global instances
+venue_service = VenueService(kopis_service)
+nearby_index = NearbyIndex()
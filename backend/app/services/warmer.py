@@ -0,0 +1,240 @@
+"""Background cache warmer for hot listing windows
+
+Traffic is concentrated on a few date windows (this week, this month,
+next month and the landing page query), so the first user after each
+expiry would otherwise pay the full KOPIS latency. The warmer runs in a
+daemon thread started from the app lifespan and, every interval:
+
+1. collects the queries worth warming: configured seed queries, the
+   calendar windows around today and the most requested queries seen
+   by this worker
+2. re-fetches the segments those queries need when they are missing or
+   about to expire, with bounded concurrency and "prefetch" quota priority
+3. rebuilds the first pages of each query from the fresh segments
+
+Listing caches and the query tracker are per process, so every worker
+runs its own warmer over its own traffic; a warmer in one worker would
+leave the others cold. Passes are spread over the interval with a random
+start offset, and their KOPIS calls use "prefetch" priority, so the quota
+keeps their share bounded however many workers run.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.kopis import KopisService, kopis_service
+from app.services.quota import KST, Priority
+from app.services.range_planner import Segment, plan_segments
+
+logger = logging.getLogger(__name__)
+
+# (stdate, eddate, rows)
+Query = Tuple[str, str, int]
+
+
+class QueryTracker:
+    """
+    Decaying request counts per listing query
+
+    Counts are halved every `half_life` seconds so the ranking follows
+    current traffic; only the `max_entries` most frequent queries are kept.
+    """
+
+    def __init__(self, max_entries: int = 1000, half_life: float = 3600.0):
+        self.max_entries = max_entries
+        self.half_life = half_life
+        self._counts: Dict[Query, float] = {}
+        self._decayed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, stdate: str, eddate: str, rows: int) -> None:
+        with self._lock:
+            self._decay()
+            key = (stdate, eddate, rows)
+            self._counts[key] = self._counts.get(key, 0.0) + 1
+            if len(self._counts) > self.max_entries * 2:
+                self._trim()
+
+    def top(self, n: int) -> List[Query]:
+        with self._lock:
+            self._decay()
+            return sorted(self._counts, key=self._counts.get, reverse=True)[:n]
+
+    def _decay(self) -> None:
+        halvings = int((time.monotonic() - self._decayed_at) / self.half_life)
+        if not halvings:
+            return
+        factor = 0.5 ** halvings
+        self._counts = {k: v * factor for k, v in self._counts.items() if v * factor >= 0.5}
+        self._decayed_at += halvings * self.half_life
+
+    def _trim(self) -> None:
+        keep = sorted(self._counts, key=self._counts.get, reverse=True)[:self.max_entries]
+        self._counts = {k: self._counts[k] for k in keep}
+
+
+# Windows relative to today that WARMER_QUERIES may name instead of dates
+WINDOWS = ("this-week", "this-month", "next-month")
+
+
+def calendar_windows(today: date, rows: int = 20) -> List[Query]:
+    """This week, this month and next month"""
+    return [window(name, today, rows) for name in WINDOWS]
+
+
+def window(name: str, today: date, rows: int = 20) -> Query:
+    """Named window ("this-week", "this-month", "next-month") around `today`"""
+    week_start = today - timedelta(days=today.weekday())
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    month_after = (next_month + timedelta(days=32)).replace(day=1)
+    start, end = {
+        "this-week": (week_start, week_start + timedelta(days=6)),
+        "this-month": (month_start, next_month - timedelta(days=1)),
+        "next-month": (next_month, month_after - timedelta(days=1)),
+    }[name]
+    return start.strftime("%Y%m%d"), end.strftime("%Y%m%d"), rows
+
+
+def parse_queries(spec: str, today: date) -> List[Query]:
+    """
+    Parse "range:rows,..." (rows defaults to 20), where range is either
+    stdate-eddate or a window name relative to `today` (see WINDOWS), so
+    configured queries move with the calendar
+
+    Raises ValueError naming the first malformed entry.
+    """
+    queries = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        dates, _, rows = part.partition(":")
+        try:
+            count = int(rows or 20)
+            if count < 1:
+                raise ValueError("rows must be positive")
+            if dates in WINDOWS:
+                queries.append(window(dates, today, count))
+                continue
+            stdate, _, eddate = dates.partition("-")
+            for value in (stdate, eddate):
+                datetime.strptime(value, "%Y%m%d")
+        except ValueError as e:
+            raise ValueError(f"Invalid WARMER_QUERIES entry {part!r}: {e}") from None
+        queries.append((stdate, eddate, count))
+    return queries
+
+
+def validate_queries(spec: str) -> None:
+    """Check WARMER_QUERIES once at startup rather than failing every pass"""
+    parse_queries(spec, datetime.now(KST).date())
+
+
+class CacheWarmer:
+    """Periodically refresh hot listing segments and pages ahead of expiry"""
+
+    def __init__(self, service: KopisService, tracker: QueryTracker, shcate: str = "CCCD"):
+        self.service = service
+        self.tracker = tracker
+        self.shcate = shcate
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="fys-cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        # Workers start together; offset their passes against KOPIS
+        if self._stop.wait(random.uniform(0, settings.warmer_interval)):
+            return
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Cache warming pass failed")
+            self._stop.wait(settings.warmer_interval)
+
+    def queries(self) -> List[Query]:
+        """Queries to keep warm, most important first, without duplicates"""
+        today = datetime.now(KST).date()
+        candidates = (
+            parse_queries(settings.warmer_queries, today)
+            + calendar_windows(today)
+            + self.tracker.top(settings.warmer_top_queries)
+        )
+        return list(dict.fromkeys(candidates))
+
+    def run_once(self) -> Dict[str, int]:
+        """One warming pass; returns counts for logging"""
+        lead = settings.warmer_lead
+        queries = []
+        segments: Dict[str, Segment] = {}
+        for stdate, eddate, rows in self.queries():
+            try:
+                planned = plan_segments(stdate, eddate, settings.listing_segment_unit)
+            except ValueError:
+                continue
+            queries.append((stdate, eddate, rows))
+            for segment in planned:
+                segments[self.service.segment_key(segment, self.shcate)] = segment
+
+        due = [
+            segment for key, segment in segments.items()
+            if (self.service.segment_cache.ttl_remaining(key) or 0) < lead
+        ]
+        stats = {"queries": len(queries), "segments": len(segments), "refreshed": 0, "failed": 0, "pages": 0}
+
+        with ThreadPoolExecutor(max_workers=max(settings.warmer_concurrency, 1)) as pool:
+            for ok in pool.map(self._refresh_segment, due):
+                stats["refreshed" if ok else "failed"] += 1
+
+        # Pages are stitched from the segments refreshed above. A segment
+        # that failed to refresh or was evicted meanwhile is fetched from
+        # KOPIS again here, still at prefetch priority.
+        for stdate, eddate, rows in queries:
+            for cpage in range(1, settings.warmer_pages + 1):
+                key = self.service.listing_key(stdate, eddate, cpage, rows, self.shcate)
+                if (self.service.listing_cache.ttl_remaining(key) or 0) >= lead:
+                    continue
+                try:
+                    self.service.get_concerts_entry(
+                        stdate, eddate, cpage, rows, self.shcate,
+                        priority=Priority.PREFETCH, refresh=True,
+                    )
+                    stats["pages"] += 1
+                except HTTPException:
+                    stats["failed"] += 1
+
+        if stats["refreshed"] or stats["failed"]:
+            logger.info("Cache warming pass: %s", stats)
+        return stats
+
+    def _refresh_segment(self, segment: Segment) -> bool:
+        try:
+            self.service.refresh_segment(segment, self.shcate, Priority.PREFETCH)
+            return True
+        except HTTPException as e:
+            # Quota share spent or KOPIS down: users keep the cached copy
+            logger.warning("Could not warm segment %s-%s: %s", segment.stdate, segment.eddate, e.detail)
+            return False
+
+
+# Global instances
+query_tracker = QueryTracker()
+cache_warmer = CacheWarmer(kopis_service, query_tracker)
@@ -0,0 +1 @@
+"""Reproducible performance benchmarks (run from backend/: python -m benchmarks.<name>)"""
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""Benchmark the app's startup calls sequentially against one POST /api/batch
+
+Starts serve.py with one worker behind a local TCP proxy that delays each
+direction by half of --rtt milliseconds (a mobile round trip), then times
+the React app's first screen after login, over a kept-alive connection:
+
+- sequential: GET /api/users/me, /api/users/me/bookmarks and
+  /api/concerts, one after another (what the app does today)
+- batch: the same three as one POST /api/batch
+
+Usage (from backend/):
+    python -m benchmarks.bench_batch [--rtt 80 0] [--rounds 30]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.fake_kopis import FakeKopisServer
+from benchmarks.loadtest import ServerProcess, free_port
+
+SERVER_CMD = f"{sys.executable} serve.py --host 127.0.0.1 --port {{port}} --workers 1 --no-warmup --log-level warning"
+
+CALLS = [
+    "/api/users/me",
+    "/api/users/me/bookmarks",
+    "/api/concerts?stdate=20250101&eddate=20250131&rows=20",
+]
+
+
+async def delay_proxy(listen_port: int, target_port: int, one_way: float) -> asyncio.AbstractServer:
+    """Forward TCP to target_port, delivering every chunk `one_way` seconds late"""
+
+    async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver() -> None:
+            while True:
+                due, chunk = await queue.get()
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                if not chunk:
+                    writer.close()
+                    return
+                writer.write(chunk)
+                await writer.drain()
+
+        delivering = asyncio.create_task(deliver())
+        while True:
+            chunk = await reader.read(65536)
+            queue.put_nowait((time.perf_counter() + one_way, chunk))
+            if not chunk:
+                break
+        await delivering
+
+    async def handle(client_reader, client_writer) -> None:
+        upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", target_port)
+        try:
+            await asyncio.gather(
+                pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer), return_exceptions=True
+            )
+        except asyncio.CancelledError:
+            pass  # connections still open when the benchmark ends
+
+    return await asyncio.start_server(handle, "127.0.0.1", listen_port)
+
+
+async def measure(base_url: str, token: str, rounds: int) -> List[List[float]]:
+    headers = {"Authorization": f"Bearer {token}"}
+    sequential, batched = [], []
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30) as client:
+        await client.get("/api/health")  # open the kept-alive connection
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for path in CALLS:
+                (await client.get(path)).raise_for_status()
+            sequential.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            response = await client.post("/api/batch", json={"requests": [{"path": p} for p in CALLS]})
+            response.raise_for_status()
+            assert all(r["status"] == 200 for r in response.json()["responses"]), response.text[:500]
+            batched.append((time.perf_counter() - start) * 1000)
+    return [sequential, batched]
+
+
+async def run(server: ServerProcess, args) -> None:
+    async with httpx.AsyncClient(base_url=server.base_url, timeout=30) as client:
+        token = (await client.post(
+            "/api/users/register", json={"email": "bench@example.com", "password": "benchpass"}
+        )).json()["access_token"]
+        for i in range(20):
+            await client.post("/api/users/me/bookmarks", headers={"Authorization": f"Bearer {token}"},
+                              json={"concert_id": f"PFB{i:04d}", "concert_name": "bench"})
+
+    print(f"{'rtt ms':>7} {'mode':<12}{'p50 ms':>9}{'p95 ms':>9}")
+    for rtt in args.rtt:
+        port = free_port()
+        proxy = await delay_proxy(port, server.port, rtt / 2000)
+        try:
+            results = await measure(f"http://127.0.0.1:{port}", token, args.rounds)
+        finally:
+            proxy.close()
+        for mode, samples in zip(("sequential", "batch"), results):
+            samples.sort()
+            print(f"{rtt:>7g} {mode:<12}{statistics.median(samples):>9.1f}{samples[int(len(samples) * 0.95)]:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--rtt", type=float, nargs="+", default=[80.0, 0.0], help="simulated round trips (ms)")
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    kopis = FakeKopisServer().start()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            server = ServerProcess(SERVER_CMD, kopis.base_url, workdir)
+            try:
+                server.start(timeout=60)
+                asyncio.run(run(server, args))
+            finally:
+                server.stop()
+    finally:
+        kopis.stop()
+
+
+if __name__ == "__main__":
+    main()
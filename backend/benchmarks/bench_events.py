@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+"""Benchmark idle event streams against polling
+
+Starts serve.py with one worker and measures:
+
+- memory: worker RSS growth per open /api/users/me/events stream
+- idle cost: worker CPU while N streams sit idle (heartbeats only),
+  against N clients polling /api/users/me/bookmarks every --poll-interval
+  seconds with If-None-Match (the cheapest poll the API offers)
+- latency: bookmark change -> bookmarks_changed frame on the user's
+  stream, with the N idle streams open
+
+Usage (from backend/):
+    python -m benchmarks.bench_events [--streams 2000] [--window 30] [--poll-interval 30]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import httpx
+import jwt
+
+from benchmarks.fake_kopis import FakeKopisServer
+from benchmarks.loadtest import ServerProcess
+
+SERVER_CMD = f"{sys.executable} serve.py --host 127.0.0.1 --port {{port}} --workers 1 --no-warmup --log-level warning"
+JWT_SECRET = "loadtest-secret-key-with-at-least-32-chars"  # ServerProcess env
+
+
+def user_token(user_id: int) -> str:
+    now = int(time.time())
+    payload = {"sub": str(user_id), "aud": "fys-frontend", "iat": now, "exp": now + 7200}
+    return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
+
+
+def worker_pid(master_pid: int) -> int:
+    with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+        return int(f.read().split()[0])
+
+
+def rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def open_stream(port: int, token: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /api/users/me/events?token={token} HTTP/1.1\r\n"
+        f"Host: 127.0.0.1\r\nAccept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(f"stream refused: {status!r}")
+    while await reader.readline() not in (b"\r\n", b""):
+        pass
+    return reader, writer
+
+
+async def drain(reader: asyncio.StreamReader, frames: List[float]) -> None:
+    """Read a stream until EOF, timestamping event frames"""
+    while True:
+        chunk = await reader.read(4096)
+        if not chunk:
+            return
+        frames.extend(time.perf_counter() for _ in range(chunk.count(b"event: ")))
+
+
+async def open_streams(port: int, count: int, batch: int = 200):
+    streams = []
+    for start in range(0, count, batch):
+        streams += await asyncio.gather(*(
+            open_stream(port, user_token(1_000_000 + i)) for i in range(start, min(start + batch, count))
+        ))
+    tasks = [asyncio.create_task(drain(reader, [])) for reader, _ in streams]
+    return streams, tasks
+
+
+async def poll(base_url: str, clients: int, interval: float, window: float, headers: dict) -> int:
+    """`clients` pollers, each GETting bookmarks every `interval` seconds"""
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30,
+                                 limits=httpx.Limits(max_connections=100)) as client:
+        etag = (await client.get("/api/users/me/bookmarks")).headers["etag"]
+        rate = clients / interval
+        sent = 0
+        start = time.perf_counter()
+        pending = set()
+        while time.perf_counter() - start < window:
+            due = int((time.perf_counter() - start) * rate) - sent
+            for _ in range(due):
+                pending.add(asyncio.create_task(client.get("/api/users/me/bookmarks", headers={"If-None-Match": etag})))
+                sent += 1
+            pending = {t for t in pending if not t.done()}
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*pending)
+        return sent
+
+
+async def run(server: ServerProcess, args) -> None:
+    port = server.port
+    pid = worker_pid(server.proc.pid)
+    base_url = server.base_url
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        token = (await client.post("/api/users/register", json={"email": "bench@example.com", "password": "benchpass"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(20):
+            await client.post("/api/users/me/bookmarks", headers=headers, json={"concert_id": f"PFB{i:04d}", "concert_name": "bench"})
+
+    # Polling baseline first, with no streams open
+    await asyncio.sleep(1)
+    cpu = cpu_seconds(pid)
+    polls = await poll(base_url, args.streams, args.poll_interval, args.window, headers)
+    poll_cpu = cpu_seconds(pid) - cpu
+
+    rss_before = rss_bytes(pid)
+    start = time.perf_counter()
+    streams, tasks = await open_streams(port, args.streams)
+    opened_in = time.perf_counter() - start
+    await asyncio.sleep(2)
+    rss_after = rss_bytes(pid)
+
+    cpu = cpu_seconds(pid)
+    await asyncio.sleep(args.window)
+    idle_cpu = cpu_seconds(pid) - cpu
+
+    # Delivery latency with the idle streams still open
+    user_id = int(jwt.decode(token, options={"verify_signature": False})["sub"])
+    reader, writer = await open_stream(port, user_token(user_id))
+    frames: List[float] = []
+    reading = asyncio.create_task(drain(reader, frames))
+    await asyncio.sleep(0.5)
+    frames.clear()
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30) as client:
+        for i in range(args.events):
+            sent = time.perf_counter()
+            if i % 2 == 0:
+                await client.post("/api/users/me/bookmarks", json={"concert_id": "PFLAT", "concert_name": "x"})
+            else:
+                await client.delete("/api/users/me/bookmarks/PFLAT")
+            while len(frames) <= len(latencies):
+                await asyncio.sleep(0.0005)
+            latencies.append((frames[len(latencies)] - sent) * 1000)
+
+    reading.cancel()
+    writer.close()
+    for task in tasks:
+        task.cancel()
+    for _, w in streams:
+        w.close()
+
+    latencies.sort()
+    print(f"\n{args.streams} streams opened in {opened_in:.1f}s")
+    print(f"worker RSS: {rss_before / 2**20:.1f} MB -> {rss_after / 2**20:.1f} MB "
+          f"({(rss_after - rss_before) / args.streams / 1024:.1f} KB per stream)")
+    print(f"\nworker CPU over {args.window:.0f}s                    CPU s    CPU %")
+    print(f"  {args.streams} idle streams (heartbeat {os.environ['EVENTS_HEARTBEAT_INTERVAL']}s)   "
+          f"{idle_cpu:>8.2f} {idle_cpu / args.window * 100:>8.1f}")
+    print(f"  {args.streams} pollers every {args.poll_interval:.0f}s ({polls} GETs)  "
+          f"{poll_cpu:>8.2f} {poll_cpu / args.window * 100:>8.1f}")
+    print(f"\nbookmark change -> event frame ({args.events} events, incl. the write): "
+          f"p50 {statistics.median(latencies):.1f} ms  p95 {latencies[int(len(latencies) * 0.95)]:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--window", type=float, default=30.0, help="seconds measured per mode")
+    parser.add_argument("--poll-interval", type=float, default=30.0)
+    parser.add_argument("--events", type=int, default=100)
+    args = parser.parse_args()
+
+    os.environ.setdefault("EVENTS_HEARTBEAT_INTERVAL", "15")
+    os.environ["EVENTS_MAX_CONNECTIONS"] = str(args.streams + 10)
+    os.environ["WARMER_ENABLED"] = "false"
+    os.environ["CATALOG_SNAPSHOT_PATH"] = ""
+
+    kopis = FakeKopisServer(catalog=[]).start()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            server = ServerProcess(SERVER_CMD, kopis.base_url, workdir)
+            try:
+                server.start(timeout=60)
+                asyncio.run(run(server, args))
+            finally:
+                server.stop()
+    finally:
+        kopis.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Benchmark the venue grid index against a full haversine scan
+
+Builds GridIndex over synthetic venues (clustered around cities like the
+real catalog) and times, for random query points near those cities:
+
+- radius: venues within --radius km, nearest first
+- k-nearest: the --k nearest venues
+
+against computing the haversine distance to every venue. Results of both
+are checked to be identical.
+
+Usage (from backend/):
+    python -m benchmarks.bench_nearby [--venues 10000 50000] [--queries 2000] [--cell-km 2]
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+import time
+
+from app.services.geo import GridIndex, haversine_km
+from benchmarks.fake_kopis import synthetic_venues
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1e6, result
+
+
+def scan_within(points, lat, lng, radius):
+    found = []
+    for plat, plng, value in points:
+        distance = haversine_km(lat, lng, plat, plng)
+        if distance <= radius:
+            found.append((distance, value))
+    found.sort(key=lambda dv: dv[0])
+    return found
+
+
+def scan_nearest(points, lat, lng, k):
+    return heapq.nsmallest(k, ((haversine_km(lat, lng, plat, plng), value) for plat, plng, value in points),
+                           key=lambda dv: dv[0])
+
+
+def summary(samples):
+    samples = sorted(samples)
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--venues", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--scan-queries", type=int, default=200, help="full scans are slow; time fewer")
+    parser.add_argument("--radius", type=float, default=5.0)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--cell-km", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'venues':>8} {'query':<12}{'grid p50 µs':>13}{'grid p95 µs':>13}{'scan p50 µs':>13}{'scan p95 µs':>13}{'speedup':>9}{'hits':>7}")
+    for size in args.venues:
+        venues = synthetic_venues(size, args.seed)
+        points = [(float(v["la"]), float(v["lo"]), v["mt10id"]) for v in venues]
+        build_us, grid = timed(GridIndex, points, args.cell_km)
+
+        # Query near random venues: where users actually are
+        queries = []
+        for _ in range(args.queries):
+            lat, lng, _ = rng.choice(points)
+            queries.append((lat + rng.uniform(-0.05, 0.05), lng + rng.uniform(-0.05, 0.05)))
+
+        for name, grid_query, scan_query, param in (
+            (f"r={args.radius:g}km", grid.within, scan_within, args.radius),
+            (f"k={args.k}", grid.nearest, scan_nearest, args.k),
+        ):
+            grid_times, scan_times, hits = [], [], []
+            for i, (lat, lng) in enumerate(queries):
+                elapsed, found = timed(grid_query, lat, lng, param)
+                grid_times.append(elapsed)
+                hits.append(len(found))
+                if i < args.scan_queries:
+                    elapsed, expected = timed(scan_query, points, lat, lng, param)
+                    scan_times.append(elapsed)
+                    assert [v for _, v in found] == [v for _, v in expected] or (
+                        [round(d, 9) for d, _ in found] == [round(d, 9) for d, _ in expected]
+                    ), (lat, lng, name)
+            grid_p50, grid_p95 = summary(grid_times)
+            scan_p50, scan_p95 = summary(scan_times)
+            print(f"{size:>8} {name:<12}{grid_p50:>13.1f}{grid_p95:>13.1f}{scan_p50:>13.1f}{scan_p95:>13.1f}"
+                  f"{scan_p50 / grid_p50:>8.0f}x{statistics.mean(hits):>7.1f}")
+        print(f"{'':>8} index build {build_us / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""Benchmark deleting a heavy user: ORM cascade against set-based purge
+
+Creates a user with --bookmarks bookmarks, --reviews reviews and --events
+analytics events in a fresh SQLite database (or DATABASE_URL with
+--database-url), then deletes them twice:
+
+- orm: what `cascade="all, delete-orphan"` without passive_deletes did:
+  load every child, DELETE bookmarks/reviews one row at a time and
+  UPDATE each event's user_id to NULL
+- purge: app.services.accounts.purge_users
+
+and reports SQL statements (executemany counted per row), wall time and
+peak Python memory for each.
+
+Usage (from backend/):
+    python -m benchmarks.bench_purge [--bookmarks 3000] [--reviews 500] [--events 50000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert, select
+
+
+def seed(database, models, args) -> int:
+    db = database.SessionLocal()
+    try:
+        user = models.User(email=f"heavy{time.time_ns()}@example.com", name="heavy", provider="email")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    finally:
+        db.close()
+
+    now = datetime.utcnow()
+    with database.engine.begin() as conn:
+        conn.execute(insert(models.Bookmark), [
+            {"user_id": user_id, "concert_id": f"PF{i:06d}", "created_at": now} for i in range(args.bookmarks)
+        ])
+        conn.execute(insert(models.Review), [
+            {"user_id": user_id, "concert_id": f"PF{i:06d}", "rating": 1 + i % 5, "created_at": now, "updated_at": now}
+            for i in range(args.reviews)
+        ])
+        conn.execute(insert(models.Analytics), [
+            {"user_id": user_id, "event_type": "view", "concert_id": f"PF{i % 500:06d}",
+             "created_at": now - timedelta(seconds=i), "event_data": {"source": "bench"}}
+            for i in range(args.events)
+        ])
+    return user_id
+
+
+def orm_cascade(database, models, user_id: int) -> None:
+    """The per-row work the old relationship configuration made the ORM do"""
+    db = database.SessionLocal()
+    try:
+        user = db.get(models.User, user_id)
+        for bookmark in db.scalars(select(models.Bookmark).where(models.Bookmark.user_id == user_id)):
+            db.delete(bookmark)
+        for review in db.scalars(select(models.Review).where(models.Review.user_id == user_id)):
+            db.delete(review)
+        for row in db.scalars(select(models.Analytics).where(models.Analytics.user_id == user_id)):
+            row.user_id = None
+        db.delete(user)
+        db.commit()
+    finally:
+        db.close()
+
+
+def purge(database, accounts, user_id: int) -> None:
+    db = database.SessionLocal()
+    try:
+        accounts.purge_users(db, [user_id])
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--bookmarks", type=int, default=3000)
+    parser.add_argument("--reviews", type=int, default=500)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    workdir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{workdir.name}/purge.db"
+    os.environ.setdefault("KOPIS_API_KEY", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench-secret-key-with-at-least-32-chars")
+
+    from app.db import database, models
+    from app.services import accounts
+
+    database.init_db()
+    database.create_tables()
+    statements = []
+
+    @event.listens_for(database.engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        # executemany sends one statement per parameter set
+        statements.append(len(parameters) if executemany else 1)
+
+    print(f"user with {args.bookmarks} bookmarks, {args.reviews} reviews, {args.events} events")
+    print(f"{'mode':<8}{'statements':>12}{'seconds':>10}{'peak MB':>10}")
+    for name, run in (
+        ("orm", lambda user_id: orm_cascade(database, models, user_id)),
+        ("purge", lambda user_id: purge(database, accounts, user_id)),
+    ):
+        user_id = seed(database, models, args)
+        statements.clear()
+        tracemalloc.start()
+        start = time.perf_counter()
+        run(user_id)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<8}{sum(statements):>12}{elapsed:>10.2f}{peak / 2**20:>10.1f}")
+    workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
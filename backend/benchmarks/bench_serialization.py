@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Benchmark per-response JSON serialization for list endpoints
+
+Compares the previous path (jsonable_encoder + stdlib JSONResponse)
+with FastJSONResponse and pydantic-core dump_json. Cached listing hits
+skip serialization entirely (the body is rendered once per entry).
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization
+"""
+
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.routes.users import bookmark_list_adapter
+from app.api.schemas import BookmarkResponse
+from app.core.responses import FastJSONResponse, orjson
+
+SIZES = (20, 100, 1000)
+
+
+def make_listing(n: int) -> dict:
+    """Synthetic /api/concerts payload shaped like a KOPIS response"""
+    raw_items = [
+        {
+            "mt20id": f"PF{i:06d}",
+            "prfnm": f"대중음악 공연 {i} - 전국 투어 콘서트",
+            "prfpdfrom": "2025.10.01",
+            "prfpdto": "2025.10.31",
+            "fcltynm": "올림픽공원 (KSPO DOME(체조경기장))",
+            "poster": f"http://www.kopis.or.kr/upload/pfmPoster/PF_{i:06d}.gif",
+            "area": "서울특별시",
+            "genrenm": "대중음악",
+            "openrun": "N",
+            "prfstate": "공연예정",
+        }
+        for i in range(n)
+    ]
+    return {
+        "meta": {"cpage": 1, "rows": n, "stdate": "20251001", "eddate": "20251031", "shcate": "CCCD"},
+        "raw": {"dbs": {"db": raw_items}},
+        "items": [
+            {k: item[k] for k in ("mt20id", "prfnm", "prfpdfrom", "prfpdto", "fcltynm",
+                                  "poster", "genrenm", "area", "openrun")}
+            for item in raw_items
+        ],
+    }
+
+
+def make_bookmarks(n: int) -> List[BookmarkResponse]:
+    now = datetime.utcnow()
+    return [
+        BookmarkResponse(
+            id=i, user_id=1, concert_id=f"PF{i:06d}", concert_name=f"공연 {i}",
+            poster_url=f"http://www.kopis.or.kr/upload/pfmPoster/PF_{i:06d}.gif",
+            created_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def timeit(fn: Callable[[], object], min_time: float = 0.3) -> float:
+    """Return mean microseconds per call"""
+    fn()
+    loops, start = 0, time.perf_counter()
+    while True:
+        fn()
+        loops += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / loops * 1e6
+
+
+def main():
+    print(f"orjson available: {orjson is not None}\n")
+    print(f"{'case':<34}{'items':>7}{'before (us)':>14}{'after (us)':>13}{'speedup':>9}")
+
+    for n in SIZES:
+        payload = make_listing(n)
+        before = timeit(lambda: JSONResponse(jsonable_encoder(payload)).body)
+        after = timeit(lambda: FastJSONResponse(payload).body)
+        print(f"{'concerts':<34}{n:>7}{before:>14.1f}{after:>13.1f}{before / after:>8.1f}x")
+
+        bookmarks = make_bookmarks(n)
+        before = timeit(lambda: JSONResponse(jsonable_encoder(bookmarks)).body)
+        after = timeit(lambda: bookmark_list_adapter.dump_json(bookmarks))
+        print(f"{'bookmarks':<34}{n:>7}{before:>14.1f}{after:>13.1f}{before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
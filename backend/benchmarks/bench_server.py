@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Compare server launchers under the load-test scenarios
+
+Runs the benchmarks.loadtest scenarios against each launcher in turn,
+with the same fake KOPIS, and prints throughput and p95 side by side.
+It also reports the first /api/concerts response after the server turns
+healthy, which is where startup warmup shows.
+
+    dev    run_server.py settings: uvicorn --reload, one process
+    serve  serve.py: pre-fork workers (CPU count), uvloop, httptools, warmup
+
+Usage (from backend/):
+    python -m benchmarks.bench_server [--concurrency 1 16 64] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from typing import Dict
+
+import httpx
+
+from benchmarks.fake_kopis import FakeKopisServer, synthetic_catalog
+from benchmarks.loadtest import LANDING_QUERY, ServerProcess, run_all
+
+LAUNCHERS = {
+    "dev": f"{sys.executable} -m uvicorn app.main:app --host 127.0.0.1 --port {{port}} --reload --log-level warning",
+    "serve": f"{sys.executable} serve.py --host 127.0.0.1 --port {{port}} --log-level warning",
+}
+
+
+def first_listing_ms(base_url: str) -> float:
+    token = httpx.post(f"{base_url}/api/token").json()["token"]
+    start = time.perf_counter()
+    httpx.get(f"{base_url}/api/concerts", params=LANDING_QUERY,
+              headers={"Authorization": f"Bearer {token}"}, timeout=60)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--scenarios", nargs="*", default=["token", "concerts_hot", "concerts_cold", "bookmarks_list"])
+    parser.add_argument("--bookmarks", type=int, default=50)
+    parser.add_argument("--kopis-latency-ms", type=float, default=80.0)
+    parser.add_argument("--launchers", nargs="+", default=list(LAUNCHERS), choices=list(LAUNCHERS))
+    args = parser.parse_args()
+
+    kopis = FakeKopisServer(catalog=synthetic_catalog(2000), latency_ms=args.kopis_latency_ms, jitter_ms=40).start()
+    results: Dict[str, Dict] = {}
+    first: Dict[str, float] = {}
+    try:
+        for name in args.launchers:
+            print(f"\n== {name}: {LAUNCHERS[name].replace(sys.executable, 'python')}", flush=True)
+            with tempfile.TemporaryDirectory() as workdir:
+                server = ServerProcess(LAUNCHERS[name], kopis.base_url, workdir)
+                try:
+                    server.start(timeout=60)
+                    first[name] = first_listing_ms(server.base_url)
+                    results[name] = asyncio.run(run_all(server.base_url, args))
+                finally:
+                    server.stop()
+    finally:
+        kopis.stop()
+
+    names = args.launchers
+    print(f"\n{'first listing after healthy (ms)':<34}" + "".join(f"{first[n]:>16.1f}" for n in names))
+    print(f"\n{'scenario':<22}{'c':>5}" + "".join(f"{n + ' req/s':>16}{n + ' p95':>12}" for n in names))
+    for scenario in results[names[0]]:
+        for level in results[names[0]][scenario]:
+            row = f"{scenario:<22}{level:>5}"
+            for n in names:
+                stats = results[n][scenario][level]
+                row += f"{stats['rps']:>16.1f}{stats['p95_ms']:>12.2f}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
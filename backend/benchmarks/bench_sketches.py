@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""Benchmark view sketches (HyperLogLog / Count-Min) against exact counts
+
+Generates a week of Zipf-distributed concert views, then compares:
+
+- accuracy: unique viewers per concert (HyperLogLog) and views of the
+  most popular concerts (Count-Min) against exact sets and counters
+- memory: serialized sketch bytes against exact Python sets/counters
+- query time: COUNT(DISTINCT ...) / COUNT(*) over raw rows in SQLite
+  against merging the stored day sketches
+
+Usage (from backend/):
+    python -m benchmarks.bench_sketches [--views 300000] [--concerts 2000] [--visitors 50000]
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from app.services.sketches import HeavyHitters, HyperLogLog
+
+DAYS = 7
+
+
+def deep_size(sets) -> int:
+    """Approximate bytes held by a dict of sets of strings"""
+    total = sys.getsizeof(sets)
+    for key, members in sets.items():
+        total += sys.getsizeof(key) + sys.getsizeof(members)
+        total += sum(sys.getsizeof(m) for m in members)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--views", type=int, default=300000)
+    parser.add_argument("--concerts", type=int, default=2000)
+    parser.add_argument("--visitors", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    concerts = [f"PF{i:06d}" for i in range(args.concerts)]
+    weights = [1 / (rank + 1) for rank in range(args.concerts)]  # Zipf, s=1
+    start = date(2025, 10, 1)
+
+    views = [
+        (start + timedelta(days=rng.randrange(DAYS)),
+         concert,
+         f"visitor-{rng.randrange(args.visitors)}")
+        for concert in rng.choices(concerts, weights, k=args.views)
+    ]
+
+    # Exact and sketched, per day (as stored)
+    exact_viewers = defaultdict(set)
+    exact_views = Counter()
+    day_viewers = defaultdict(HyperLogLog)
+    day_popular = defaultdict(HeavyHitters)
+    t0 = time.perf_counter()
+    for day, concert, visitor in views:
+        day_viewers[(day, concert)].add(visitor)
+        day_popular[day].add(concert)
+    sketch_us = (time.perf_counter() - t0) / len(views) * 1e6
+    for day, concert, visitor in views:
+        exact_viewers[concert].add(visitor)
+        exact_views[concert] += 1
+
+    stored = {k: v.to_bytes() for k, v in day_viewers.items()}
+    stored_popular = {k: v.to_bytes() for k, v in day_popular.items()}
+
+    # Accuracy over the whole week (merged day sketches)
+    errors = []
+    for concert in concerts:
+        exact = len(exact_viewers.get(concert, ()))
+        if exact < 100:
+            continue
+        merged = HyperLogLog()
+        for day in range(DAYS):
+            data = stored.get((start + timedelta(days=day), concert))
+            if data:
+                merged.update(HyperLogLog.from_bytes(data))
+        errors.append(abs(merged.count() - exact) / exact)
+
+    popular = HeavyHitters()
+    for data in stored_popular.values():
+        popular.update(HeavyHitters.from_bytes(data))
+    top = popular.top(20)
+    true_top = {c for c, _ in exact_views.most_common(20)}
+    cms_errors = [(est - exact_views[c]) / exact_views[c] for c, est in top]
+
+    print(f"{args.views} views, {args.concerts} concerts, {DAYS} days; sketch update {sketch_us:.1f} us/view\n")
+    print("unique viewers (HyperLogLog, concerts with >= 100 viewers):")
+    print(f"  concerts compared   {len(errors)}")
+    print(f"  mean / p95 / max    {statistics.mean(errors):.2%} / "
+          f"{sorted(errors)[int(len(errors) * 0.95)]:.2%} / {max(errors):.2%}")
+    print("top 20 concerts (Count-Min):")
+    print(f"  recall              {len(true_top & {c for c, _ in top}) / 20:.0%}")
+    print(f"  overcount mean/max  {statistics.mean(cms_errors):.2%} / {max(cms_errors):.2%}")
+
+    sketch_bytes = sum(map(len, stored.values())) + sum(map(len, stored_popular.values()))
+    exact_bytes = deep_size(exact_viewers) + sys.getsizeof(exact_views)
+    print("memory:")
+    print(f"  exact sets          {exact_bytes / 1e6:8.2f} MB (grows with visitors)")
+    print(f"  stored sketches     {sketch_bytes / 1e6:8.2f} MB ({len(stored) + len(stored_popular)} rows)")
+
+    # Query time: raw rows vs stored sketches, SQLite in memory
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE analytics (day TEXT, concert_id TEXT, visitor TEXT)")
+    conn.execute("CREATE INDEX ix_analytics_concert_day ON analytics (concert_id, day)")
+    conn.executemany("INSERT INTO analytics VALUES (?, ?, ?)", [(d.isoformat(), c, v) for d, c, v in views])
+    conn.execute("CREATE TABLE sketches (kind TEXT, key TEXT, day TEXT, data BLOB, UNIQUE (kind, key, day))")
+    conn.executemany("INSERT INTO sketches VALUES ('viewers', ?, ?, ?)",
+                     [(c, d.isoformat(), data) for (d, c), data in stored.items()])
+    conn.executemany("INSERT INTO sketches VALUES ('popular', '', ?, ?)",
+                     [(d.isoformat(), data) for d, data in stored_popular.items()])
+
+    def exact_query():
+        conn.execute("SELECT COUNT(DISTINCT visitor) FROM analytics WHERE concert_id = ?", (concerts[0],)).fetchone()
+        conn.execute("SELECT concert_id, COUNT(*) c FROM analytics GROUP BY concert_id ORDER BY c DESC LIMIT 10").fetchall()
+
+    def sketch_query():
+        merged = HyperLogLog()
+        for (data,) in conn.execute("SELECT data FROM sketches WHERE kind = 'viewers' AND key = ?", (concerts[0],)):
+            merged.update(HyperLogLog.from_bytes(data))
+        merged.count()
+        hitters = HeavyHitters()
+        for (data,) in conn.execute("SELECT data FROM sketches WHERE kind = 'popular'"):
+            hitters.update(HeavyHitters.from_bytes(data))
+        hitters.top(10)
+
+    print("query (unique viewers of the top concert + top 10 over the week):")
+    for name, fn in (("exact SQL", exact_query), ("sketches", sketch_query)):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(5):
+            fn()
+        print(f"  {name:<18}{(time.perf_counter() - t0) / 5 * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
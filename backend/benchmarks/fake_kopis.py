@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""Offline stand-in for the KOPIS open API
+
+Serves `pblprfr` listings from a synthetic catalog (or from a recorded
+KOPIS XML response) with configurable latency, error rate and catalog
+size, so the backend can be benchmarked without network access or quota.
+Facility endpoints (`prfplc` list and `prfplc/{mt10id}` detail) serve the
+venues in fixtures/venues.json, which match the synthetic catalog's venue
+names, or synthetic venues.
+
+Usage (from backend/):
+    python -m benchmarks.fake_kopis --port 9100 --latency-ms 80 --error-rate 0.01
+    KOPIS_BASE_URL=http://127.0.0.1:9100/openApi/restful python run_server.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import xmltodict
+
+LIST_PATH = "/openApi/restful/pblprfr"
+VENUE_PATH = "/openApi/restful/prfplc"
+
+VENUE_FIXTURE = Path(__file__).parent / "fixtures" / "venues.json"
+
+# Fields of a prfplc list item (details add address, coordinates, ...)
+VENUE_LIST_FIELDS = ("fcltynm", "mt10id", "mt13cnt", "fcltychartr", "sidonm", "gugunnm", "opende")
+
+VENUES = [
+    ("올림픽공원 (KSPO DOME(체조경기장))", "서울특별시"),
+    ("블루스퀘어 (마스터카드홀)", "서울특별시"),
+    ("예스24 라이브홀", "서울특별시"),
+    ("부산 KBS홀", "부산광역시"),
+    ("대구 엑스코 (동관)", "대구광역시"),
+    ("광주 김대중컨벤션센터 (다목적홀)", "광주광역시"),
+    ("인천 인스파이어 아레나", "인천광역시"),
+]
+
+
+def synthetic_catalog(size: int, seed: int = 42, base: Optional[date] = None) -> List[Dict[str, str]]:
+    """Build a deterministic catalog of popular-music performances"""
+    rng = random.Random(seed)
+    base = base or date(2025, 10, 1)
+    items = []
+    for i in range(size):
+        start = base + timedelta(days=rng.randint(-120, 240))
+        openrun = rng.random() < 0.05
+        length = rng.randint(60, 180) if openrun else rng.choice([0, 0, 0, 1, 2, 6, 30])
+        venue, area = VENUES[i % len(VENUES)]
+        items.append({
+            "mt20id": f"PF{200000 + i}",
+            "prfnm": f"대중음악 공연 {i} - 전국 투어 콘서트",
+            "prfpdfrom": start.strftime("%Y.%m.%d"),
+            "prfpdto": (start + timedelta(days=length)).strftime("%Y.%m.%d"),
+            "fcltynm": venue,
+            "poster": f"http://www.kopis.or.kr/upload/pfmPoster/PF_PF{200000 + i}.gif",
+            "area": area,
+            "genrenm": "대중음악",
+            "openrun": "Y" if openrun else "N",
+            "prfstate": "공연예정",
+        })
+    items.sort(key=lambda item: (item["prfpdfrom"], item["mt20id"]))
+    return items
+
+
+def fixture_venues(path: Path = VENUE_FIXTURE) -> List[Dict[str, str]]:
+    """Facility details (prfplc/{mt10id} items) from a JSON fixture"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def synthetic_venues(size: int, seed: int = 42) -> List[Dict[str, str]]:
+    """Facility details scattered over South Korea, clustered around cities"""
+    rng = random.Random(seed)
+    cities = [(37.55, 126.98), (35.16, 129.06), (35.87, 128.60), (35.16, 126.85), (37.46, 126.70), (36.35, 127.38)]
+    venues = []
+    for i in range(size):
+        if rng.random() < 0.7:
+            lat, lng = rng.choice(cities)
+            lat, lng = lat + rng.gauss(0, 0.08), lng + rng.gauss(0, 0.1)
+        else:
+            lat, lng = rng.uniform(34.3, 38.3), rng.uniform(126.1, 129.4)
+        venues.append({
+            "mt10id": f"FC{100000 + i}",
+            "fcltynm": f"공연장 {i}",
+            "mt13cnt": "1",
+            "fcltychartr": "기타(민간)",
+            "sidonm": "",
+            "gugunnm": "",
+            "opende": "",
+            "seatscale": str(rng.randint(50, 3000)),
+            "adres": "",
+            "la": f"{lat:.6f}",
+            "lo": f"{lng:.6f}",
+        })
+    return venues
+
+
+def recorded_catalog(path: str) -> List[Dict[str, str]]:
+    """Load catalog items from a recorded KOPIS pblprfr XML response"""
+    with open(path, encoding="utf-8") as f:
+        items = xmltodict.parse(f.read()).get("dbs", {}).get("db", [])
+    return [items] if isinstance(items, dict) else list(items)
+
+
+def render_items(items: List[Dict[str, str]]) -> bytes:
+    """Render items the way KOPIS does (no <db> elements when empty)"""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?><dbs>']
+    for item in items:
+        parts.append("<db>")
+        for key, value in item.items():
+            parts.append(f"<{key}>{escape(str(value))}</{key}>")
+        parts.append("</db>")
+    parts.append("</dbs>")
+    return "".join(parts).encode("utf-8")
+
+
+def _ymd(dotted: str) -> str:
+    return dotted.replace(".", "")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # default of 5 refuses connections under load
+
+
+class FakeKopisServer:
+    """Threaded HTTP server emulating the KOPIS listing and facility endpoints"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        catalog: Optional[List[Dict[str, str]]] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        max_pages: Optional[int] = None,
+        seed: int = 42,
+        venues: Optional[List[Dict[str, str]]] = None,
+    ):
+        self.catalog = catalog if catalog is not None else synthetic_catalog(2000, seed)
+        self.venues = {v["mt10id"]: v for v in (venues if venues is not None else fixture_venues())}
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.max_pages = max_pages
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.httpd = _Server((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/openApi/restful"
+
+    def start(self) -> "FakeKopisServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def list_items(self, params: Dict[str, str]) -> List[Dict[str, str]]:
+        """Items overlapping [stdate, eddate], paginated like KOPIS"""
+        stdate, eddate = params.get("stdate", "0"), params.get("eddate", "99999999")
+        cpage = max(int(params.get("cpage", 1)), 1)
+        rows = max(int(params.get("rows", 10)), 1)
+        if self.max_pages is not None and cpage > self.max_pages:
+            return []
+        matched = [
+            item for item in self.catalog
+            if _ymd(item["prfpdfrom"]) <= eddate and _ymd(item["prfpdto"]) >= stdate
+        ]
+        return matched[(cpage - 1) * rows:cpage * rows]
+
+    def venue_items(self, params: Dict[str, str]) -> List[Dict[str, str]]:
+        """prfplc list page (no coordinates, like KOPIS)"""
+        cpage = max(int(params.get("cpage", 1)), 1)
+        rows = max(int(params.get("rows", 10)), 1)
+        page = list(self.venues.values())[(cpage - 1) * rows:cpage * rows]
+        return [{k: v.get(k, "") for k in VENUE_LIST_FIELDS} for v in page]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/xml;charset=UTF-8"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with server._lock:
+                    server.calls += 1
+                    roll = server.rng.random()
+                    delay = server.latency_ms + server.rng.uniform(0, server.jitter_ms)
+
+                if delay:
+                    time.sleep(delay / 1000)
+
+                if roll < server.error_rate:
+                    self._send(503, b"Service Unavailable", "text/plain")
+                    return
+
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == LIST_PATH:
+                    self._send(200, render_items(server.list_items(params)))
+                elif url.path == VENUE_PATH:
+                    self._send(200, render_items(server.venue_items(params)))
+                elif url.path.startswith(VENUE_PATH + "/"):
+                    venue = server.venues.get(url.path[len(VENUE_PATH) + 1:])
+                    self._send(200, render_items([venue] if venue else []))
+                else:
+                    self._send(404, b"Not Found", "text/plain")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--items", type=int, default=2000, help="synthetic catalog size")
+    parser.add_argument("--recorded", help="serve items from a recorded pblprfr XML file")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-pages", type=int, help="return empty pages after this page")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--venues", type=int, help="serve this many synthetic venues instead of the fixture")
+    args = parser.parse_args()
+
+    catalog = recorded_catalog(args.recorded) if args.recorded else synthetic_catalog(args.items, args.seed)
+    server = FakeKopisServer(
+        args.host, args.port, catalog,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, max_pages=args.max_pages, seed=args.seed,
+        venues=synthetic_venues(args.venues, args.seed) if args.venues else None,
+    )
+    print(f"Fake KOPIS serving {len(catalog)} items at {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+"""End-to-end load test for the backend against an offline KOPIS
+
+Starts the fake KOPIS server in-process, launches `app.main:app` through
+uvicorn on a throwaway SQLite database, then drives each scenario at
+fixed concurrency levels and reports throughput and p50/p95/p99.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest                       # print results
+    python -m benchmarks.loadtest --save benchmarks/baselines/loadtest.json
+    python -m benchmarks.loadtest --compare benchmarks/baselines/loadtest.json
+
+--compare exits non-zero when a scenario's p95 or throughput regresses by
+more than --tolerance against the stored baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.fake_kopis import FakeKopisServer, synthetic_catalog
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_SERVER_CMD = f"{sys.executable} -m uvicorn app.main:app --host 127.0.0.1 --port {{port}} --log-level warning"
+LANDING_QUERY = {"stdate": "20251001", "eddate": "20251031", "cpage": "1", "rows": "12"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class ServerProcess:
+    """Backend server subprocess bound to a fake KOPIS and a SQLite file"""
+
+    def __init__(self, command: str, kopis_url: str, workdir: str):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.command = command.format(port=self.port)
+        self.env = {
+            **os.environ,
+            "KOPIS_API_KEY": "loadtest",
+            "KOPIS_BASE_URL": kopis_url,
+            "JWT_SECRET": "loadtest-secret-key-with-at-least-32-chars",
+            "JWT_TTL_MIN": "120",
+            "DATABASE_URL": f"sqlite:///{workdir}/loadtest.db",
+            "RATE_LIMIT_ENABLED": "false",
+            "KOPIS_DAILY_QUOTA": "0",
+        }
+        self.log_path = Path(workdir) / "server.log"
+        self.proc = None
+
+    def start(self, timeout: float = 30.0) -> None:
+        subprocess.run(
+            [sys.executable, "-c", "import app.db.models; from app.db.database import init_db, create_tables; init_db(); create_tables()"],
+            cwd=BACKEND_DIR, env=self.env, check=True,
+        )
+        # Server logs (including slow-request logs) go to a file, not the report
+        with open(self.log_path, "wb") as log:
+            self.proc = subprocess.Popen(
+                shlex.split(self.command), cwd=BACKEND_DIR, env=self.env,
+                stdout=log, stderr=subprocess.STDOUT,
+            )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.base_url}/api/health", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if self.proc.poll() is not None:
+                raise RuntimeError(
+                    f"Server exited with {self.proc.returncode}:\n{self.log_path.read_text()[-2000:]}"
+                )
+            time.sleep(0.2)
+        raise RuntimeError("Server did not become healthy in time")
+
+    def stop(self) -> None:
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+async def run_level(
+    request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    client: httpx.AsyncClient,
+    concurrency: int,
+    duration: float,
+) -> Dict[str, float]:
+    """Run one scenario at a fixed concurrency for `duration` seconds"""
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int) -> None:
+        i = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await request(client, worker_id * 1_000_000 + i)
+                error = str(response.status_code) if response.status_code >= 400 else None
+            except httpx.HTTPError as e:
+                error = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+            i += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def build_scenarios(client: httpx.AsyncClient, bookmarks: int) -> Dict[str, Callable]:
+    """Create a user with bookmarks and return scenario request functions"""
+    anon_token = (await client.post("/api/token")).json()["token"]
+    anon = {"Authorization": f"Bearer {anon_token}"}
+
+    email = f"loadtest-{random.randrange(1 << 30)}@example.com"
+    registered = (await client.post("/api/users/register", json={"email": email, "password": "loadtest"})).json()
+    user = {"Authorization": f"Bearer {registered['access_token']}"}
+    for n in range(bookmarks):
+        await client.post("/api/users/me/bookmarks", headers=user, json={
+            "concert_id": f"PF{200000 + n}", "concert_name": f"공연 {n}",
+            "poster_url": f"http://www.kopis.or.kr/upload/pfmPoster/PF_PF{200000 + n}.gif",
+        })
+
+    def token(c, i):
+        return c.post("/api/token")
+
+    def concerts_hot(c, i):
+        return c.get("/api/concerts", params=LANDING_QUERY, headers=anon)
+
+    def concerts_cold(c, i):
+        # Distinct ranges per request: always a listing cache miss
+        day = 1 + i % 28
+        return c.get("/api/concerts", headers=anon, params={
+            "stdate": f"202510{day:02d}", "eddate": f"2025{11 + i % 2:02d}{day:02d}",
+            "cpage": str(1 + (i // 56) % 50), "rows": "20",
+        })
+
+    def bookmarks_list(c, i):
+        return c.get("/api/users/me/bookmarks", headers=user)
+
+    async def bookmarks_write(c, i):
+        concert_id = f"LT{i}"
+        await c.post("/api/users/me/bookmarks", headers=user, json={"concert_id": concert_id})
+        return await c.delete(f"/api/users/me/bookmarks/{concert_id}", headers=user)
+
+    return {
+        "token": token,
+        "concerts_hot": concerts_hot,
+        "concerts_cold": concerts_cold,
+        "bookmarks_list": bookmarks_list,
+        "bookmarks_write": bookmarks_write,
+    }
+
+
+async def run_all(base_url: str, args) -> Dict[str, Dict[str, Dict[str, float]]]:
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        scenarios = await build_scenarios(client, args.bookmarks)
+        results: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for name, request in scenarios.items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            results[name] = {}
+            for concurrency in args.concurrency:
+                stats = await run_level(request, client, concurrency, args.duration)
+                results[name][str(concurrency)] = stats
+                print(
+                    f"{name:<16} c={concurrency:<4} {stats['rps']:>9.1f} req/s  "
+                    f"p50 {stats['p50_ms']:>8.2f}  p95 {stats['p95_ms']:>8.2f}  "
+                    f"p99 {stats['p99_ms']:>8.2f} ms  errors {stats['errors']}"
+                    + (f" {stats['error_kinds']}" if stats["errors"] else ""),
+                    flush=True,
+                )
+        return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List regressions beyond tolerance (p95 latency up or throughput down)"""
+    regressions = []
+    for name, levels in results.items():
+        for concurrency, stats in levels.items():
+            base = baseline.get("results", {}).get(name, {}).get(concurrency)
+            if not base:
+                continue
+            if base["p95_ms"] and stats["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} c={concurrency}: p95 {base['p95_ms']} -> {stats['p95_ms']} ms")
+            if base["rps"] and stats["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"{name} c={concurrency}: throughput {base['rps']} -> {stats['rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario and level")
+    parser.add_argument("--scenarios", nargs="*", help="subset of scenarios to run")
+    parser.add_argument("--bookmarks", type=int, default=50, help="bookmarks seeded for the test user")
+    parser.add_argument("--kopis-latency-ms", type=float, default=80.0)
+    parser.add_argument("--kopis-jitter-ms", type=float, default=40.0)
+    parser.add_argument("--kopis-error-rate", type=float, default=0.0)
+    parser.add_argument("--kopis-items", type=int, default=2000)
+    parser.add_argument("--server-cmd", default=DEFAULT_SERVER_CMD, help="command with a {port} placeholder")
+    parser.add_argument("--save", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    kopis = FakeKopisServer(
+        catalog=synthetic_catalog(args.kopis_items),
+        latency_ms=args.kopis_latency_ms,
+        jitter_ms=args.kopis_jitter_ms,
+        error_rate=args.kopis_error_rate,
+    ).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = ServerProcess(args.server_cmd, kopis.base_url, workdir)
+        try:
+            server.start()
+            results = asyncio.run(run_all(server.base_url, args))
+        finally:
+            server.stop()
+            kopis.stop()
+
+    report = {
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "kopis_latency_ms": args.kopis_latency_ms,
+            "kopis_jitter_ms": args.kopis_jitter_ms,
+            "kopis_error_rate": args.kopis_error_rate,
+            "server_cmd": args.server_cmd.replace(sys.executable, "python"),
+        },
+        "machine": {"python": platform.python_version(), "cpus": os.cpu_count(), "platform": platform.platform()},
+        "results": results,
+    }
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions beyond tolerance:")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("\nNo regressions beyond tolerance.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Apply analytics retention now, or delete old events from an unpartitioned table
+
+The background maintenance drops whole monthly partitions and deletes
+expired rows from the default partition (see app/db/partitions.py). Tables that are not partitioned (SQLite, or
+PostgreSQL before the partitioning migration) are never pruned
+automatically: a mass DELETE has to be asked for with --delete. It runs
+in chunks of one transaction each, so it can run while the API serves.
+
+Usage:
+    python prune_analytics.py                        # drop partitions older than ANALYTICS_RETENTION_MONTHS
+    python prune_analytics.py --keep-months 6 --detach-only
+    python prune_analytics.py --delete --dry-run     # unpartitioned: count rows a DELETE would remove
+"""
+
+import argparse
+import logging
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import database
+from app.db.partitions import (
+    DEFAULT_PARTITION, PARENT, apply_retention, delete_before, expired_partitions, is_partitioned,
+    list_partitions, retention_cutoff,
+)
+
+
+def count_before(engine, table, cutoff):
+    with engine.connect() as conn:
+        return conn.execute(
+            text(f'SELECT count(*) FROM "{table}" WHERE created_at < :cutoff'), {"cutoff": cutoff}
+        ).scalar_one()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-months", type=int, default=settings.analytics_retention_months,
+                        help="whole months to keep (default ANALYTICS_RETENTION_MONTHS)")
+    parser.add_argument("--detach-only", action="store_true", help="detach old partitions but keep them as tables")
+    parser.add_argument("--delete", action="store_true", help="unpartitioned tables: DELETE rows before the cutoff")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be removed")
+    args = parser.parse_args()
+    if args.keep_months <= 0:
+        parser.error("--keep-months must be positive")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    database.init_db()
+    engine = database.engine
+    if engine is None:
+        parser.error("DATABASE_URL is not set")
+    cutoff = retention_cutoff(args.keep_months)
+
+    if is_partitioned(engine):
+        if args.dry_run:
+            names = list_partitions(engine)
+            print(f"Would remove partitions: {', '.join(expired_partitions(names, cutoff)) or 'none'}")
+            if DEFAULT_PARTITION in names:
+                print(f"Would delete {count_before(engine, DEFAULT_PARTITION, cutoff)} rows "
+                      f"from {DEFAULT_PARTITION} before {cutoff.isoformat()}")
+            return
+        removed = apply_retention(engine, args.keep_months, drop=not args.detach_only)
+        print(f"Removed partitions: {', '.join(removed) or 'none'}")
+        return
+
+    rows = count_before(engine, PARENT, cutoff)
+    if args.dry_run or not args.delete:
+        print(f"{PARENT} is not partitioned: {rows} rows before {cutoff.isoformat()}"
+              + ("" if args.dry_run else " (pass --delete to remove them)"))
+        return
+    start = time.perf_counter()
+    deleted = delete_before(engine, cutoff)
+    print(f"Deleted {deleted} rows before {cutoff.isoformat()} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Delete users and their data in bulk (account deletion requests, test accounts)
+
+Bookmarks and reviews are deleted and analytics events unlinked with
+set-based statements of at most PURGE_BATCH_SIZE rows, each in its own
+transaction, so a large purge can run while the API is serving traffic.
+See app/services/accounts.py.
+
+Usage:
+    python purge_users.py --ids 12 34 56
+    python purge_users.py --ids-file deletion_requests.txt   # one ID per line, '#' comments
+    python purge_users.py --email-domain example.com --dry-run
+"""
+
+import argparse
+import logging
+import time
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from sqlalchemy import select
+
+from app.db import database
+from app.db.models import User
+from app.services.accounts import purge_users, user_data_counts
+
+
+def escape_like(value: str) -> str:
+    """Match `value` literally in a LIKE pattern (escape character: backslash)"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def read_ids(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [int(line) for line in lines if line]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ids", type=int, nargs="+", default=[], help="user IDs to purge")
+    parser.add_argument("--ids-file", help="file with one user ID per line")
+    parser.add_argument("--email-domain", help="purge every user whose email is at this domain")
+    parser.add_argument("--batch-size", type=int, help="rows per transaction (default PURGE_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="only count the rows a purge would affect")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        user_ids = list(args.ids)
+        if args.ids_file:
+            user_ids += read_ids(args.ids_file)
+        if args.email_domain:
+            user_ids += db.execute(
+                select(User.id).where(User.email.like(f"%@{escape_like(args.email_domain)}", escape="\\"))
+            ).scalars().all()
+        if not user_ids:
+            parser.error("no users selected (use --ids, --ids-file or --email-domain)")
+
+        if args.dry_run:
+            print(f"Would purge: {user_data_counts(db, user_ids)}")
+            return
+        start = time.perf_counter()
+        counts = purge_users(db, user_ids, args.batch_size)
+        print(f"Purged in {time.perf_counter() - start:.1f}s: {counts}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""Production server: pre-fork uvicorn workers with uvloop and httptools
+
+The master process imports the app once, binds the listening socket and
+forks the workers, which share the socket (the kernel spreads
+connections across the workers that are accepting). Each worker:
+
+1. resets inherited DB pools and warms caches and connection pools
+   before it starts accepting, so the first requests do not pay for it
+2. serves with uvloop and httptools, without access logs (see /metrics)
+3. exits after max-requests (plus random jitter, so workers do not all
+   recycle at once); the master forks a replacement
+
+Singleton background jobs (partition maintenance) run in worker slot 0
+only, and its replacement inherits them. Every worker runs its own cache
+warmer, since listing caches are per process. Per-process state
+that multiplies with or is split across the worker count (in-memory
+rate limits, the local event bus) is reported with a warning at startup;
+a per-process KOPIS quota is divided by the worker count.
+
+On SIGTERM / SIGINT the master forwards the signal; each worker stops
+accepting, drains in-flight requests for up to the graceful timeout and
+runs the app shutdown (stops the cache warmer, flushes analytics
+sketches). Workers still alive after the timeout are killed.
+
+Usage (from backend/):
+    python serve.py                          # SERVER_* settings
+    python serve.py --port 8000 --workers 4 --max-requests 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Dict, Tuple
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import uvicorn
+
+from app.core.config import settings
+from app.main import app
+from app.services.events import event_hub
+from app.services.kopis import kopis_service
+from app.services.quota import LocalQuotaStore
+
+logger = logging.getLogger("fys.serve")
+
+
+def check_worker_state(workers: int) -> None:
+    """Warn about per-process state that N workers do not share"""
+    if workers <= 1:
+        return
+    if settings.rate_limit_enabled:
+        logger.warning("Rate limits are kept per worker: clients get up to %dx the configured limits", workers)
+    if isinstance(kopis_service.quota.store, LocalQuotaStore) and settings.kopis_daily_quota:
+        logger.warning(
+            "KOPIS quota is counted per worker: each of %d workers gets %d calls per key per day; use redis to share it",
+            workers, max(1, settings.kopis_daily_quota // workers),
+        )
+    if settings.events_backend == "local":
+        logger.warning(
+            "EVENTS_BACKEND=local with %d workers: events reach only streams on the worker that raised them; use redis",
+            workers,
+        )
+    if settings.database_read_urls and settings.read_your_writes_backend == "local":
+        logger.warning(
+            "READ_YOUR_WRITES_BACKEND=local with %d workers: a read may miss a write another worker made", workers
+        )
+
+
+def warmup(timeout: float) -> None:
+    """Open DB connections, map the catalog and fill hot caches (best effort)"""
+    from app.db import database
+    from app.services.concert_calendar import concert_calendar
+    from app.services.snapshot import catalog_snapshot
+    from app.services.warmer import cache_warmer
+
+    steps = [
+        ("db pools", database.warm_pools),
+        ("catalog snapshot", catalog_snapshot.current),
+        ("calendar index", concert_calendar.index),
+    ]
+    if settings.warmer_enabled:
+        # Also opens the keep-alive connections to KOPIS
+        steps.append(("listing caches", cache_warmer.run_once))
+
+    def run() -> None:
+        for name, step in steps:
+            start = time.perf_counter()
+            try:
+                step()
+                logger.info("Warmed %s in %.0f ms", name, (time.perf_counter() - start) * 1000)
+            except Exception as e:
+                logger.warning("Warming %s failed: %s", name, e)
+
+    # Never let a slow upstream keep the worker from serving
+    thread = threading.Thread(target=run, name="fys-warmup", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        logger.warning("Warmup still running after %.0fs; serving anyway", timeout)
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn server that stops accepting before it closes idle connections
+
+    A connection accepted just before shutdown has often not delivered
+    its request yet, so uvicorn would close it as idle and the client
+    would see a reset. Waiting ACCEPT_GRACE seconds after closing the
+    listener turns those into in-flight requests that are drained.
+    Event streams never finish on their own, so they are ended first;
+    clients reconnect to another worker.
+    """
+
+    ACCEPT_GRACE = 0.5
+
+    async def shutdown(self, sockets=None) -> None:
+        for server in self.servers:
+            server.close()
+        event_hub.close_all()
+        await asyncio.sleep(self.ACCEPT_GRACE)
+        await super().shutdown(sockets)
+
+
+def run_worker(sock: socket.socket, args, slot: int) -> None:
+    """Worker process body (never returns)"""
+    from app.db import database
+
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+        signal.signal(sig, signal.SIG_DFL)
+    database.after_fork()
+    settings.background_jobs = settings.background_jobs and slot == 0
+    kopis_service.quota.split(args.workers)
+    random.seed()
+
+    if not args.no_warmup:
+        warmup(args.warmup_timeout)
+
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        access_log=False,
+        log_level=args.log_level,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=max_requests,
+    )
+    DrainingServer(config).run(sockets=[sock])
+    os._exit(0)
+
+
+class Master:
+    """Fork, watch and replace workers; forward shutdown signals"""
+
+    def __init__(self, sock: socket.socket, args):
+        self.sock = sock
+        self.args = args
+        self.workers: Dict[int, Tuple[int, float]] = {}  # pid -> (slot, started at)
+        self.stopping = False
+
+    def spawn(self, slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(self.sock, self.args, slot)
+            finally:
+                os._exit(1)
+        self.workers[pid] = (slot, time.monotonic())
+        logger.info("Started worker %d%s", pid, " (background jobs)" if slot == 0 else "")
+
+    def stop(self, signum, frame) -> None:
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Received %s, draining %d workers", signal.Signals(signum).name, len(self.workers))
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # Hard stop for workers that outlive the graceful timeout
+        timer = threading.Timer(self.args.graceful_timeout + 5, self.kill)
+        timer.daemon = True
+        timer.start()
+
+    def kill(self) -> None:
+        for pid in list(self.workers):
+            logger.warning("Killing worker %d after graceful timeout", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker = self.workers.pop(pid, None)
+            if worker is None or self.stopping:
+                continue
+            slot, started = worker
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                logger.info("Worker %d recycled", pid)
+            else:
+                logger.warning("Worker %d exited with %d", pid, code)
+                if time.monotonic() - started < 1:
+                    time.sleep(1)  # do not spin on a crashing worker
+            self.spawn(slot)
+        logger.info("All workers stopped")
+
+
+def bind(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("--workers", type=int, default=settings.server_workers or os.cpu_count() or 1,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--max-requests", type=int, default=settings.server_max_requests,
+                        help="recycle a worker after this many requests (0: never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.server_max_requests_jitter)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.server_graceful_timeout,
+                        help="seconds to drain in-flight requests on shutdown")
+    parser.add_argument("--keep-alive", type=int, default=settings.server_keep_alive)
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--warmup-timeout", type=float, default=settings.server_warmup_timeout)
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(process)d %(levelname)s %(message)s")
+    sock = bind(args.host, args.port, args.backlog)
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    check_worker_state(args.workers)
+    Master(sock, args).run()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
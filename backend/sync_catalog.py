@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Sync the local concert catalog from KOPIS and rebuild analytics rollups
+
+Also rewrites the catalog snapshot (CATALOG_SNAPSHOT_PATH) that running
+workers pick up without a restart, and optionally syncs venues (KOPIS
+facilities with coordinates) for /api/concerts/nearby.
+
+Usage:
+    python sync_catalog.py                  # current month + next 2
+    python sync_catalog.py --months 6 --rollup-days 2
+    python sync_catalog.py --months 0 --venues              # one detail call per new venue
+    python sync_catalog.py --months 0 --venues-fixture benchmarks/fixtures/venues.json
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app.core.config import settings
+from app.db import database
+from app.services.analytics import analytics_service
+from app.services.catalog import catalog_service
+from app.services.venues import load_fixture, venue_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=3, help="calendar months to sync, starting this month")
+    parser.add_argument("--rollup-days", type=int, default=0, help="recompute rollups for the last N days")
+    parser.add_argument("--venues", action="store_true", help="sync KOPIS facilities and fetch new venues' coordinates")
+    parser.add_argument("--venues-refresh", action="store_true", help="with --venues, re-fetch every venue's details")
+    parser.add_argument("--venues-fixture", help="load venues from a JSON fixture instead of KOPIS")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    database.init_db()
+    db = database.SessionLocal()
+    try:
+        if args.months:
+            written = catalog_service.sync(db, months=args.months)
+            print(f"Catalog: {written} concerts written")
+            if settings.catalog_snapshot_path:
+                version = catalog_service.write_snapshot(db, months=args.months)
+                print(f"Snapshot: version {version} written to {settings.catalog_snapshot_path}")
+        if args.venues_fixture:
+            print(f"Venues: {load_fixture(db, args.venues_fixture)} written from {args.venues_fixture}")
+        elif args.venues:
+            print(f"Venues: {venue_service.sync(db, refresh=args.venues_refresh)} written")
+        # Event timestamps are UTC
+        today = datetime.utcnow().date()
+        for offset in range(args.rollup_days):
+            day = today - timedelta(days=offset)
+            print(f"Rollups {day}: {analytics_service.rollup_day(db, day)} rows")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
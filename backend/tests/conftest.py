@@ -0,0 +1,72 @@
+"""Shared fixtures: the API against benchmarks.fake_kopis, without a database"""
+
+import os
+
+# Before app imports: settings are read once, at import time
+os.environ.setdefault("KOPIS_API_KEY", "test-kopis-key")
+os.environ.setdefault("JWT_SECRET", "test-secret-key-with-at-least-32-chars")
+os.environ.update({
+    "DATABASE_URL": "",
+    "CATALOG_SNAPSHOT_PATH": "",
+    "WARMER_ENABLED": "false",
+    "RATE_LIMIT_ENABLED": "false",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.security import issue_token
+from app.db import database
+from app.main import app
+from app.services.kopis import kopis_service
+from app.services.resilience import CircuitBreaker
+from benchmarks.fake_kopis import FakeKopisServer
+
+
+@pytest.fixture(scope="session")
+def fake_kopis():
+    server = FakeKopisServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def kopis(fake_kopis, monkeypatch):
+    """fake_kopis wired into kopis_service, with empty caches and a closed circuit"""
+    monkeypatch.setattr(kopis_service, "base_url", fake_kopis.base_url)
+    monkeypatch.setattr(kopis_service, "breaker", CircuitBreaker(
+        failure_threshold=settings.kopis_breaker_threshold, reset_timeout=settings.kopis_breaker_reset,
+    ))
+    # Failures are expected in some tests; do not wait out retries
+    monkeypatch.setattr(settings, "kopis_max_retries", 0)
+    monkeypatch.setattr(fake_kopis, "error_rate", 0.0)
+    kopis_service.listing_cache.clear()
+    kopis_service.segment_cache.clear()
+    fake_kopis.calls = 0
+    return fake_kopis
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth():
+    return {"Authorization": f"Bearer {issue_token()}"}
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """SQLite primary with every table, installed as the app's database"""
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(settings, "database_read_urls", "")
+    # Restored to "not configured" after the test
+    monkeypatch.setattr(database, "engine", None)
+    monkeypatch.setattr(database, "SessionLocal", None)
+    monkeypatch.setattr(database, "replicas", [])
+    engine = database.init_db()
+    database.create_tables()
+    yield database.SessionLocal
+    engine.dispose()
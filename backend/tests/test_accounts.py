@@ -0,0 +1,97 @@
+"""Account deletion, bulk purges and the per-user data export (SQLite)"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.models import Analytics, Bookmark, Review, User
+from app.services import accounts
+from app.services.accounts import delete_account, export_user_data, purge_users, user_data_counts
+
+START = datetime(2025, 10, 1)
+
+
+def add_user(session, user_id, rows=3, provider="email"):
+    session.add(User(
+        id=user_id, email=f"user{user_id}@example.com", name=f"user {user_id}",
+        provider=provider, provider_id=f"secret-{user_id}",
+    ))
+    session.flush()
+    for i in range(rows):
+        session.add(Bookmark(user_id=user_id, concert_id=f"PF{i}", concert_name=f"공연 {i}"))
+        session.add(Review(user_id=user_id, concert_id=f"PF{i}", rating=1 + i % 5, content="좋아요"))
+        session.add(Analytics(user_id=user_id, event_type="view", concert_id=f"PF{i}", created_at=START + timedelta(minutes=i)))
+    session.commit()
+
+
+def table_counts(session, user_id):
+    return {
+        "analytics": session.scalar(select(func.count()).where(Analytics.user_id == user_id)),
+        "bookmarks": session.scalar(select(func.count()).where(Bookmark.user_id == user_id)),
+        "reviews": session.scalar(select(func.count()).where(Review.user_id == user_id)),
+        "users": session.scalar(select(func.count()).where(User.id == user_id)),
+    }
+
+
+def test_delete_account(db):
+    with db() as session:
+        add_user(session, 1, rows=4)
+        add_user(session, 2, rows=2)
+        assert user_data_counts(session, [1]) == {"analytics": 4, "bookmarks": 4, "reviews": 4, "users": 1}
+
+        assert delete_account(session, 1) == {"analytics": 4, "bookmarks": 4, "reviews": 4, "users": 1}
+
+        assert table_counts(session, 1) == {"analytics": 0, "bookmarks": 0, "reviews": 0, "users": 0}
+        # Events stay for aggregate stats, without the user
+        assert session.scalar(select(func.count()).where(Analytics.user_id.is_(None))) == 4
+        assert table_counts(session, 2) == {"analytics": 2, "bookmarks": 2, "reviews": 2, "users": 1}
+
+
+def test_purge_in_chunks_and_batches(db, monkeypatch):
+    monkeypatch.setattr(accounts, "USER_CHUNK", 2)
+    with db() as session:
+        for user_id in range(1, 7):
+            add_user(session, user_id, rows=user_id)
+
+        counts = purge_users(session, [1, 2, 3, 4, 5, 5, 99], batch_size=3)
+
+        # 1+2+3+4+5 rows per table; 99 does not exist
+        assert counts == {"analytics": 15, "bookmarks": 15, "reviews": 15, "users": 5}
+        for user_id in range(1, 6):
+            assert table_counts(session, user_id) == {"analytics": 0, "bookmarks": 0, "reviews": 0, "users": 0}
+        assert table_counts(session, 6) == {"analytics": 6, "bookmarks": 6, "reviews": 6, "users": 1}
+        assert session.scalar(select(func.count()).select_from(Analytics)) == 21
+
+
+def test_batches_commit_separately(db, monkeypatch):
+    statements = []
+    with db() as session:
+        add_user(session, 1, rows=7)
+        commit = session.commit
+        monkeypatch.setattr(session, "commit", lambda: (statements.append(1), commit()))
+
+        purge_users(session, [1], batch_size=3)
+
+    # analytics, bookmarks and reviews take 3 batches each (3 + 3 + 1), users one
+    assert len(statements) == 10
+
+
+@pytest.mark.parametrize("provider, has_provider_id", [("email", False), ("google", True)])
+def test_export(db, provider, has_provider_id):
+    with db() as session:
+        add_user(session, 1, rows=2, provider=provider)
+        add_user(session, 2, rows=1)
+
+    lines = [json.loads(line) for line in b"".join(export_user_data(1)).splitlines()]
+
+    assert [line["type"] for line in lines] == ["user", "bookmark", "bookmark", "review", "review", "event", "event"]
+    assert lines[0]["data"]["email"] == "user1@example.com"
+    assert ("provider_id" in lines[0]["data"]) == has_provider_id
+    assert all(line["data"].get("user_id", 1) == 1 for line in lines)
+    assert [line["data"]["created_at"] for line in lines[-2:]] == sorted(line["data"]["created_at"] for line in lines[-2:])
+
+
+def test_export_unknown_user(db):
+    assert list(export_user_data(42)) == []
@@ -0,0 +1,96 @@
+"""View beacons, sketch flush/merge and the statistics routes"""
+
+import pytest
+
+from app.core.security import issue_token
+from app.db.models import AnalyticsSketch
+from app.services.analytics import POPULAR, VIEWERS, AnalyticsService, analytics_service
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = AnalyticsService()
+    monkeypatch.setattr("app.api.routes.analytics.analytics_service", service)
+    return service
+
+
+def view(client, concert_id, token):
+    return client.post("/api/analytics/views", json={"concert_id": concert_id}, headers={"Authorization": f"Bearer {token}"})
+
+
+def test_statistics_need_a_database(client, auth):
+    assert client.get("/api/analytics/concerts/PF1", headers=auth).status_code == 503
+    assert client.get("/api/analytics/trending", headers=auth).status_code == 503
+
+
+def test_view_beacon_counts_visitors(client, service, db):
+    user = issue_token(sub="7")
+    assert view(client, "PF1", user).status_code == 204
+    assert view(client, "PF1", user).status_code == 204
+    # Anonymous tokens count per client address, however often they are reissued
+    assert view(client, "PF1", issue_token()).status_code == 204
+    assert view(client, "PF1", issue_token()).status_code == 204
+    assert view(client, "PF2", user).status_code == 204
+
+    with db() as session:
+        assert service.flush(session) == 4
+        stats = service.get_concert_analytics(session, "PF1")
+    assert stats["unique_viewers"] == 2
+    assert stats["views"] == 4
+
+
+def test_view_beacon_requires_token(client, service):
+    assert client.post("/api/analytics/views", json={"concert_id": "PF1"}).status_code == 401
+    assert view(client, "PF1", "not-a-jwt").status_code == 401
+    assert service._pending == {}
+
+
+def test_flushes_merge_into_stored_sketches(service, db):
+    for i in range(30):
+        service.record_view("PF1", f"user:{i}")
+    with db() as session:
+        service.flush(session)
+
+    # A second worker's sketch overlapping the first
+    other = AnalyticsService()
+    for i in range(20, 50):
+        other.record_view("PF1", f"user:{i}")
+    other.record_view("PF2", "user:1")
+    with db() as session:
+        other.flush(session)
+        assert session.query(AnalyticsSketch).filter_by(kind=VIEWERS, key="PF1").count() == 1
+        assert session.query(AnalyticsSketch).filter_by(kind=POPULAR).count() == 1
+
+        stats = service.get_concert_analytics(session, "PF1")
+        assert stats["unique_viewers"] == 50
+        assert stats["views"] == 60
+        assert service.get_trending_concerts(session, limit=1) == [{"concert_id": "PF1", "views": 60}]
+        assert service.flush(session) == 0
+
+
+def test_failed_flush_keeps_pending(service, db, monkeypatch):
+    service.record_view("PF1", "user:1")
+    session = db()
+    monkeypatch.setattr(session, "commit", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    with pytest.raises(RuntimeError):
+        service.flush(session)
+    session.close()
+
+    service.record_view("PF1", "user:2")
+    with db() as session:
+        assert service.flush(session) == 3
+        assert service.get_concert_analytics(session, "PF1")["unique_viewers"] == 2
+
+
+def test_statistics_routes(client, auth, db, monkeypatch):
+    monkeypatch.setattr(analytics_service, "_pending", {})
+    for visitor in ("a", "b", "c"):
+        analytics_service.record_view("PF9", visitor)
+    analytics_service.record_view("PF8", "a")
+    with db() as session:
+        analytics_service.flush(session)
+
+    stats = client.get("/api/analytics/concerts/PF9?days=1", headers=auth).json()
+    assert stats == {"concert_id": "PF9", "days": 1, "unique_viewers": 3, "views": 3}
+    trending = client.get("/api/analytics/trending?limit=2", headers=auth).json()
+    assert trending == [{"concert_id": "PF9", "views": 3}, {"concert_id": "PF8", "views": 1}]
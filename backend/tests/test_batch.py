@@ -0,0 +1,94 @@
+"""POST /api/batch: path checks, auth of sub-requests, rate limits and the byte budget"""
+
+import json
+
+import pytest
+
+from app import main
+from app.core.config import settings
+from app.core.security import issue_token
+
+LISTING = "/api/concerts?stdate=20251001&eddate=20251031&rows=12"
+
+
+def batch(client, paths, token=None, headers=None):
+    body = {"requests": [{"path": path, "headers": headers or {}} for path in paths]}
+    auth = {"Authorization": f"Bearer {token or issue_token()}"}
+    return client.post("/api/batch", json=body, headers=auth)
+
+
+def test_listing_in_batch(kopis, client):
+    response = batch(client, [LISTING, LISTING + "&cpage=2"])
+
+    assert response.status_code == 200
+    first, second = response.json()["responses"]
+    assert (first["id"], second["id"]) == ("0", "1")
+    assert first["status"] == second["status"] == 200
+    assert len(first["body"]["items"]) == 12
+    assert first["headers"]["etag"]
+
+
+@pytest.mark.parametrize("path", [
+    "/api/posters/PF1",
+    "/api/poster%73/PF1",
+    "/api/export/concerts",
+    "/api/%65xport/concerts",
+    "/api/users/me/events",
+    "/api/batch",
+])
+def test_excluded_paths_are_forbidden(client, path):
+    assert batch(client, [path]).status_code == 403
+
+
+@pytest.mark.parametrize("path", [
+    "/api/concerts/../posters/PF1",
+    "/api/concerts/%2e%2e/posters/PF1",
+    "/api/./batch",
+    "http://example.com/api/concerts",
+    "/health",
+])
+def test_malformed_paths_are_rejected(client, path):
+    assert batch(client, [path]).status_code == 400
+
+
+def test_sub_request_headers_are_restricted(client):
+    assert batch(client, ["/api/health"], headers={"Authorization": "Bearer other"}).status_code == 400
+    assert batch(client, ["/api/health"], headers={"If-None-Match": '"x"'}).status_code == 200
+
+
+def test_batch_token_is_checked(client):
+    body = {"requests": [{"path": "/api/health"}]}
+    assert client.post("/api/batch", json=body).status_code == 401
+    assert client.post("/api/batch", json=body, headers={"Authorization": "Bearer bad"}).status_code == 401
+
+
+def test_anonymous_token_gets_401_on_user_routes(client):
+    response = batch(client, ["/api/users/me"])
+
+    assert response.status_code == 200
+    assert response.json()["responses"][0]["status"] == 401
+
+
+def test_sub_requests_count_against_their_own_limits(kopis, client, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    monkeypatch.setitem(main.RATE_LIMITS, "/api/concerts", (2, 60))
+    monkeypatch.setattr(main, "rate_table", {})
+
+    response = batch(client, [LISTING, LISTING, LISTING])
+
+    assert response.status_code == 200
+    assert sorted(r["status"] for r in response.json()["responses"]) == [200, 200, 429]
+    # The same client's next direct request is over the limit too
+    assert client.get(LISTING, headers={"Authorization": f"Bearer {issue_token()}"}).status_code == 429
+
+
+def test_response_budget(kopis, client, monkeypatch):
+    single = batch(client, [LISTING]).json()["responses"][0]
+    assert single["status"] == 200
+
+    # Room for one listing body, not two
+    size = len(json.dumps(single["body"], ensure_ascii=False, separators=(",", ":")).encode())
+    monkeypatch.setattr(settings, "batch_max_response_bytes", size * 3 // 2)
+    statuses = [r["status"] for r in batch(client, [LISTING, LISTING + "&cpage=2"]).json()["responses"]]
+
+    assert sorted(statuses) == [200, 413]
@@ -0,0 +1,107 @@
+"""Content-coding negotiation, the size threshold and Vary"""
+
+import gzip
+import json
+
+import brotli
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+
+LISTING = "/api/concerts?stdate=20251001&eddate=20251031&rows=12"
+LARGE = {"items": ["공연" * 50] * 40}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("*", "br"),
+    ("gzip;q=0, *;q=0", None),
+    ("identity", None),
+    ("deflate", None),
+    ("", None),
+    (None, None),
+])
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def rows(count):
+    async def body():
+        for i in range(count):
+            yield json.dumps({"row": i, "name": "공연" * 20}).encode() + b"\n"
+    return body()
+
+
+@pytest.fixture
+def app_client():
+    routes = [
+        Route("/large", lambda request: JSONResponse(LARGE, headers={"ETag": '"v1"', "Vary": "Authorization"})),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+        Route("/stream/{count:int}", lambda request: StreamingResponse(
+            rows(request.path_params["count"]), media_type="application/x-ndjson")),
+        Route("/image", lambda request: Response(b"\0" * 4096, media_type="image/webp")),
+    ]
+    app = Starlette(routes=routes)
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def get_raw(client, path, accept_encoding, headers=None):
+    """Response without the client's transparent decoding"""
+    with client.stream("GET", path, headers={**(headers or {}), "Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept_encoding, encoding, decode", [
+    ("gzip, br", "br", brotli.decompress),
+    ("gzip", "gzip", gzip.decompress),
+])
+def test_large_body_compressed(app_client, accept_encoding, encoding, decode):
+    response, raw = get_raw(app_client, "/large", accept_encoding)
+
+    assert response.headers["content-encoding"] == encoding
+    assert json.loads(decode(raw)) == LARGE
+    # Existing Vary values are kept; the re-encoded body gets a weak validator
+    assert response.headers["vary"] == "Authorization, Accept-Encoding"
+    assert response.headers["etag"] == 'W/"v1"'
+
+
+def test_identity_untouched(app_client):
+    response, raw = get_raw(app_client, "/large", "identity")
+
+    assert "content-encoding" not in response.headers
+    assert json.loads(raw) == LARGE
+    assert response.headers["etag"] == '"v1"'
+
+
+def test_threshold_and_excluded_types(app_client):
+    for path in ("/small", "/image", "/stream/2"):
+        response, _ = get_raw(app_client, path, "br, gzip")
+        assert "content-encoding" not in response.headers, path
+
+    # A stream past the threshold is compressed as it goes
+    response, raw = get_raw(app_client, "/stream/50", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(gzip.decompress(raw).splitlines()) == 50
+
+
+@pytest.mark.parametrize("accept_encoding", ["br", "gzip", "identity"])
+def test_listing_vary_and_encoding(kopis, client, auth, accept_encoding):
+    response, raw = get_raw(client, LISTING, accept_encoding, auth)
+
+    # Cached listings carry precompressed bodies; every variant varies on both headers
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Authorization, Accept-Encoding"
+    if accept_encoding == "identity":
+        assert "content-encoding" not in response.headers
+        body = raw
+    else:
+        assert response.headers["content-encoding"] == accept_encoding
+        body = brotli.decompress(raw) if accept_encoding == "br" else gzip.decompress(raw)
+    assert len(json.loads(body)["items"]) == 12
@@ -0,0 +1,130 @@
+"""GET /api/concerts against benchmarks.fake_kopis"""
+
+from app.core.config import settings
+from app.services.kopis import kopis_service
+from app.services.range_planner import plan_segments
+
+LISTING = "/api/concerts?stdate=20251001&eddate=20251031&rows=12"
+
+
+def expire(stdate, eddate, cpage=1, rows=12):
+    """Make a query's listing page and segments stale (still cached for fallback)"""
+    caches = [(kopis_service.listing_cache, kopis_service.listing_key(stdate, eddate, cpage, rows))]
+    caches += [
+        (kopis_service.segment_cache, kopis_service.segment_key(segment))
+        for segment in plan_segments(stdate, eddate)
+    ]
+    for cache, key in caches:
+        cache.set(key, cache.get_stale(key), ttl=-1)
+
+
+def test_listing(kopis, client, auth):
+    response = client.get(LISTING, headers=auth)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["meta"]["stdate"] == "20251001"
+    assert body["meta"]["total"] > 12
+    assert len(body["items"]) == 12
+    for item in body["items"]:
+        assert item["prfpdfrom"].replace(".", "") <= "20251031"
+        assert item["prfpdto"].replace(".", "") >= "20251001"
+    assert response.headers["etag"]
+    assert response.headers["vary"] == "Authorization, Accept-Encoding"
+
+
+def test_listing_pages_share_segments(kopis, client, auth):
+    first = client.get(LISTING, headers=auth).json()
+    calls = kopis.calls
+    second = client.get(LISTING + "&cpage=2", headers=auth).json()
+
+    # Page 2 is cut from the cached October segment
+    assert kopis.calls == calls
+    assert first["meta"]["total"] == second["meta"]["total"]
+    assert not {i["mt20id"] for i in first["items"]} & {i["mt20id"] for i in second["items"]}
+
+
+def test_listing_requires_token(kopis, client):
+    assert client.get(LISTING).status_code == 401
+
+
+def test_listing_rejects_bad_dates(kopis, client, auth):
+    assert client.get("/api/concerts?stdate=20251032&eddate=20251031", headers=auth).status_code == 400
+    assert client.get("/api/concerts?stdate=20251031&eddate=20251001", headers=auth).status_code == 400
+
+
+def test_long_range_fetched_directly(kopis, client, auth):
+    # Six months is more than MAX_SEGMENTS: one KOPIS call for the page
+    response = client.get("/api/concerts?stdate=20251001&eddate=20260331&rows=12", headers=auth)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 12
+    assert body["meta"]["total"] is None
+    assert kopis.calls == 1
+    assert len(kopis_service.segment_cache) == 0
+
+
+def test_truncated_segment_fetched_directly(kopis, client, auth, monkeypatch):
+    monkeypatch.setattr(settings, "listing_segment_rows", 10)
+    monkeypatch.setattr(settings, "listing_segment_max_pages", 2)
+
+    response = client.get(LISTING + "&cpage=3", headers=auth)
+
+    # 20 rows of the segment would end before page 3 starts
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == 12
+    assert response.json()["meta"]["total"] is None
+    assert kopis.calls == 3
+
+
+def test_etag_revalidation(kopis, client, auth):
+    etag = client.get(LISTING, headers=auth).headers["etag"]
+
+    response = client.get(LISTING, headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    # The compressed 200 carries the weak form of the same validator
+    assert response.headers["etag"] == etag.removeprefix("W/")
+    assert response.headers["vary"] == "Authorization, Accept-Encoding"
+
+    assert client.get(LISTING, headers={**auth, "If-None-Match": '"other"'}).status_code == 200
+
+
+def test_etag_survives_refetch(kopis, client, auth):
+    etag = client.get(LISTING, headers=auth).headers["etag"]
+    kopis_service.listing_cache.clear()
+    kopis_service.segment_cache.clear()
+
+    # Same upstream data: same content ETag, so the client still gets a 304
+    response = client.get(LISTING, headers={**auth, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_stale_fallback_when_kopis_fails(kopis, client, auth):
+    fresh = client.get(LISTING, headers=auth)
+    expire("20251001", "20251031")
+    kopis.error_rate = 1.0
+
+    response = client.get(LISTING, headers=auth)
+    assert response.status_code == 200
+    assert response.json() == fresh.json()
+    assert response.headers["etag"] == fresh.headers["etag"]
+
+
+def test_stale_segment_serves_new_page(kopis, client, auth):
+    first = client.get(LISTING, headers=auth).json()
+    expire("20251001", "20251031")
+    kopis.error_rate = 1.0
+
+    # Page 2 was never cached, but the stale segment still has its items
+    response = client.get(LISTING + "&cpage=2", headers=auth)
+    assert response.status_code == 200
+    assert response.json()["meta"]["total"] == first["meta"]["total"]
+
+
+def test_error_without_cached_copy(kopis, client, auth):
+    kopis.error_rate = 1.0
+
+    response = client.get(LISTING, headers=auth)
+    assert response.status_code in (502, 503)
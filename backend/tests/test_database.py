@@ -0,0 +1,97 @@
+"""Read replica routing and read-your-writes"""
+
+import pytest
+from starlette.requests import Request
+
+from app.core.cache import LocalCache
+from app.core.config import settings
+from app.core.security import issue_token
+from app.db import database
+from app.db.models import Bookmark, User
+
+
+def request(token=None, host="10.0.0.1"):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": headers, "client": (host, 5000)})
+
+
+@pytest.fixture
+def replicated(tmp_path, monkeypatch):
+    """SQLite primary and one SQLite "replica" that never receives the primary's writes"""
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setattr(settings, "database_read_urls", f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "engine", None)
+    monkeypatch.setattr(database, "SessionLocal", None)
+    monkeypatch.setattr(database, "replicas", [])
+    monkeypatch.setattr(database, "_recent_writers", LocalCache(ttl=60))
+    database.init_db()
+    database.replica_monitor.stop()
+    database.create_tables()
+    (replica,) = database.replicas
+    database.Base.metadata.create_all(replica.engine)
+    yield replica
+    for target in [database.engine, replica.engine]:
+        target.dispose()
+
+
+def bound_to(session):
+    return session.get_bind().url.database.rsplit("/", 1)[-1]
+
+
+def test_client_key_follows_user_not_token(monkeypatch):
+    first = issue_token(sub="7")
+    monkeypatch.setattr(settings, "jwt_ttl_min", settings.jwt_ttl_min + 5)
+    refreshed = issue_token(sub="7")
+    assert first != refreshed
+
+    assert database.client_key(request(first)) == database.client_key(request(refreshed)) == "user:7"
+    assert database.client_key(request(issue_token(sub="8"))) == "user:8"
+    # Anonymous and invalid tokens fall back to the address
+    anonymous = database.client_key(request(issue_token(), host="10.0.0.2"))
+    assert anonymous.startswith("addr:")
+    assert database.client_key(request("garbage", host="10.0.0.2")) == anonymous
+    assert database.client_key(request(host="10.0.0.3")) != anonymous
+
+
+def test_writer_reads_from_primary_after_token_refresh(replicated, monkeypatch):
+    writer = request(issue_token(sub="7"))
+    db = next(database.get_db(writer))
+    db.add(User(id=7, email="u7@example.com"))
+    db.add(Bookmark(user_id=7, concert_id="PF1"))
+    db.commit()
+    db.close()
+
+    # A new token for the same user still reads its write
+    monkeypatch.setattr(settings, "jwt_ttl_min", settings.jwt_ttl_min + 5)
+    session = next(database.get_read_db(request(issue_token(sub="7"))))
+    assert bound_to(session) == "primary.db"
+    assert session.query(Bookmark).count() == 1
+    session.close()
+
+    other = next(database.get_read_db(request(issue_token(sub="8"))))
+    assert bound_to(other) == "replica.db"
+    assert other.query(Bookmark).count() == 0
+    other.close()
+
+
+def test_unhealthy_replica_falls_back_to_primary(replicated):
+    assert bound_to(database.read_session("user:9")) == "replica.db"
+    replicated.healthy = False
+    assert bound_to(database.read_session("user:9")) == "primary.db"
+
+
+def test_replica_sessions_are_read_only(replicated):
+    session = database.read_session()
+    session.add(User(id=1, email="u1@example.com"))
+    with pytest.raises(RuntimeError, match="read-replica"):
+        session.flush()
+    session.close()
+
+
+def test_read_only_sessions_do_not_pin(replicated):
+    db = next(database.get_db(request(issue_token(sub="7"))))
+    db.query(User).all()
+    db.commit()
+    db.close()
+
+    assert bound_to(database.read_session("user:7")) == "replica.db"
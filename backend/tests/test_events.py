@@ -0,0 +1,89 @@
+"""EventHub subscriptions, fan-out and slow-consumer handling"""
+
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.events import BOOKMARKS_CHANGED, HEARTBEAT, RESYNC, EventHub, format_event
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    monkeypatch.setattr(settings, "events_buffer_size", 4)
+    monkeypatch.setattr(settings, "events_max_per_user", 2)
+    monkeypatch.setattr(settings, "events_backend", "local")
+    return EventHub()
+
+
+async def settle():
+    """Let call_soon_threadsafe pushes run"""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def drain(sub):
+    frames = []
+    while not sub.queue.empty():
+        frames.append(sub.queue.get_nowait())
+    return frames
+
+
+def test_fan_out_by_user(hub):
+    async def scenario():
+        phone, laptop, other = hub.subscribe(1), hub.subscribe(1), hub.subscribe(2)
+        hub.publish(BOOKMARKS_CHANGED, {"count": 3}, user_id=1)
+        hub.deliver("catalog_updated", {"version": 9})
+        await settle()
+        return drain(phone), drain(laptop), drain(other)
+
+    phone, laptop, other = asyncio.run(scenario())
+
+    changed = format_event(BOOKMARKS_CHANGED, {"count": 3})
+    updated = format_event("catalog_updated", {"version": 9})
+    assert phone == laptop == [changed, updated]
+    assert other == [updated]
+    assert hub.connections == 3
+
+
+def test_per_user_limit(hub):
+    async def scenario():
+        hub.subscribe(1)
+        hub.subscribe(1)
+        with pytest.raises(OverflowError):
+            hub.subscribe(1)
+        hub.subscribe(2)
+
+    asyncio.run(scenario())
+    assert hub.connections == 3
+
+
+def test_slow_subscriber_does_not_block_others(hub):
+    async def scenario():
+        slow, fast = hub.subscribe(1), hub.subscribe(1)
+        received = []
+
+        async def read_fast():
+            async for frame in hub.stream(fast):
+                if frame != HEARTBEAT:
+                    received.append(frame)
+                if len(received) == 11:  # the retry preamble and ten events
+                    return
+
+        reader = asyncio.create_task(read_fast())
+        for i in range(10):
+            hub.deliver(BOOKMARKS_CHANGED, {"n": i}, user_id=1)
+            await settle()
+        await asyncio.wait_for(reader, 1.0)
+
+        # The slow stream was cut off once its buffer filled: resync, then EOF
+        slow_frames = [frame async for frame in hub.stream(slow)]
+        return received, slow_frames
+
+    received, slow_frames = asyncio.run(scenario())
+
+    assert received[1:] == [format_event(BOOKMARKS_CHANGED, {"n": i}) for i in range(10)]
+    assert slow_frames[1:] == [format_event(RESYNC, {})]
+    # Both streams unsubscribed when their generators finished
+    assert hub.connections == 0
+    assert hub.connected_users() == []
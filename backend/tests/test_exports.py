@@ -0,0 +1,103 @@
+"""Streaming exports: formats, resume cursors and failures before the stream starts"""
+
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Concert
+
+TOKEN = {"Authorization": "Bearer export-token"}
+
+
+@pytest.fixture(autouse=True)
+def export_tokens(monkeypatch):
+    monkeypatch.setattr(settings, "export_tokens", "export-token")
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+
+
+@pytest.fixture
+def concerts(db):
+    with db() as session:
+        session.add_all(
+            Concert(
+                mt20id=f"PF{i:03d}", prfnm=f'공연 {i}, "특별"', prfpdfrom=date(2025, 10, i + 1),
+                prfpdto=date(2025, 10, i + 1), updated_at=datetime(2025, 9, 1 + i),
+            )
+            for i in range(5)
+        )
+        session.commit()
+
+
+def lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson(client, concerts):
+    response = client.get("/api/export/concerts", headers=TOKEN)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["x-export-key"] == "mt20id"
+    rows = lines(response)
+    assert [row["mt20id"] for row in rows] == [f"PF{i:03d}" for i in range(5)]
+    assert rows[0]["prfnm"] == '공연 0, "특별"'
+    assert rows[0]["prfpdfrom"] == "2025-10-01"
+
+
+def test_resume_filter_and_limit(client, concerts):
+    rows = lines(client.get("/api/export/concerts?after=PF001&limit=2", headers=TOKEN))
+    assert [row["mt20id"] for row in rows] == ["PF002", "PF003"]
+
+    rows = lines(client.get("/api/export/concerts?since=2025-09-02&until=2025-09-04", headers=TOKEN))
+    assert [row["mt20id"] for row in rows] == ["PF001", "PF002"]
+
+
+def test_csv_gzip(client, concerts):
+    response = client.get("/api/export/concerts?format=csv&gzip=true", headers=TOKEN)
+
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="concerts.csv.gz"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert len(rows) == 5
+    assert rows[4]["mt20id"] == "PF004"
+    assert rows[4]["prfnm"] == '공연 4, "특별"'
+
+
+def test_bad_cursor(client, db):
+    assert client.get("/api/export/analytics/events?after=abc", headers=TOKEN).status_code == 400
+
+
+def test_requires_export_token(client, db, monkeypatch):
+    assert client.get("/api/export/concerts").status_code == 401
+    assert client.get("/api/export/concerts", headers={"Authorization": "Bearer nope"}).status_code == 403
+    monkeypatch.setattr(settings, "export_tokens", "")
+    assert client.get("/api/export/concerts", headers=TOKEN).status_code == 403
+
+
+def test_no_database_is_503(client):
+    response = client.get("/api/export/concerts", headers=TOKEN)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
+
+
+def test_exhausted_pool_is_503(client, db, monkeypatch):
+    closed = []
+
+    def timeout(self, *args, **kwargs):
+        raise PoolTimeout("QueuePool limit reached")
+
+    monkeypatch.setattr(Session, "connection", timeout)
+    monkeypatch.setattr(Session, "close", lambda self: closed.append(self))
+
+    response = client.get("/api/export/concerts", headers=TOKEN)
+    assert response.status_code == 503
+    assert "TimeoutError" in response.json()["detail"]
+    assert len(closed) == 1
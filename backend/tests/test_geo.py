@@ -0,0 +1,94 @@
+"""GridIndex against full haversine scans"""
+
+import random
+
+import pytest
+
+from app.services.geo import GridIndex, haversine_km
+
+
+def scan(points, lat, lng, accept=None):
+    return sorted(
+        (haversine_km(lat, lng, plat, plng), value)
+        for plat, plng, value in points
+        if accept is None or accept(value)
+    )
+
+
+def random_points(rng, size):
+    # Clusters around Seoul and Busan plus scattered points
+    centers = [(37.5665, 126.9780), (35.1796, 129.0756)]
+    points = []
+    for i in range(size):
+        if i % 5 == 0:
+            lat, lng = rng.uniform(33.0, 38.5), rng.uniform(125.0, 130.0)
+        else:
+            clat, clng = rng.choice(centers)
+            lat, lng = clat + rng.gauss(0, 0.1), clng + rng.gauss(0, 0.1)
+        points.append((lat, lng, i))
+    return points
+
+
+def queries(rng, count):
+    found = []
+    for _ in range(count):
+        found.append((rng.uniform(33.0, 38.5), rng.uniform(125.0, 130.0)))
+    # Outside the points' bounding box
+    found += [(40.0, 127.0), (30.0, 124.0), (36.0, 140.0), (-33.9, 151.2)]
+    return found
+
+
+def distances(results):
+    return [round(d, 9) for d, _ in results]
+
+
+@pytest.mark.parametrize("cell_km", [0.5, 2.0, 25.0])
+def test_within_matches_scan(cell_km):
+    rng = random.Random(1)
+    points = random_points(rng, 1000)
+    grid = GridIndex(points, cell_km)
+    even = lambda value: value % 2 == 0
+
+    for lat, lng in queries(rng, 40):
+        for radius in (1.0, 5.0, 60.0):
+            expected = [dv for dv in scan(points, lat, lng) if dv[0] <= radius]
+            found = grid.within(lat, lng, radius)
+            assert distances(found) == distances(expected)
+            assert {v for _, v in found} == {v for _, v in expected}
+
+            expected = [dv for dv in scan(points, lat, lng, even) if dv[0] <= radius]
+            assert distances(grid.within(lat, lng, radius, accept=even)) == distances(expected)
+
+
+@pytest.mark.parametrize("cell_km", [1.0, 2.0, 25.0])
+def test_nearest_matches_scan(cell_km):
+    rng = random.Random(2)
+    points = random_points(rng, 1000)
+    grid = GridIndex(points, cell_km)
+    rare = lambda value: value % 97 == 0
+
+    for lat, lng in queries(rng, 40):
+        for k in (1, 10):
+            assert distances(grid.nearest(lat, lng, k)) == distances(scan(points, lat, lng)[:k])
+            assert distances(grid.nearest(lat, lng, k, accept=rare)) == distances(scan(points, lat, lng, rare)[:k])
+
+        expected = [dv for dv in scan(points, lat, lng) if dv[0] <= 20.0][:10]
+        assert distances(grid.nearest(lat, lng, 10, max_km=20.0)) == distances(expected)
+
+
+def test_nearest_more_than_size():
+    points = [(37.5, 127.0, "a"), (37.6, 127.1, "b"), (35.1, 129.0, "c")]
+    grid = GridIndex(points)
+
+    assert [v for _, v in grid.nearest(37.5, 127.0, 10)] == ["a", "b", "c"]
+    assert [v for _, v in grid.nearest(37.5, 127.0, 10, accept=lambda v: v != "a")] == ["b", "c"]
+    assert grid.nearest(37.5, 127.0, 0) == []
+    assert grid.nearest(37.5, 127.0, 5, accept=lambda v: False) == []
+
+
+def test_empty_index():
+    grid = GridIndex([])
+
+    assert grid.size == 0
+    assert grid.within(37.5, 127.0, 10.0) == []
+    assert grid.nearest(37.5, 127.0, 5) == []
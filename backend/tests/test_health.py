@@ -0,0 +1,23 @@
+"""Public health check and token-protected details"""
+
+from app.core.config import settings
+
+
+def test_health_is_minimal(client):
+    response = client.get("/api/health")
+
+    assert response.status_code == 200
+    assert response.json() == {"ok": True, "status": "ok", "message": "Backend running successfully"}
+
+
+def test_details_require_metrics_token(client, monkeypatch):
+    assert client.get("/api/health/details").status_code == 403
+
+    monkeypatch.setattr(settings, "metrics_token", "scrape-token")
+    assert client.get("/api/health/details").status_code == 401
+    assert client.get("/api/health/details", headers={"Authorization": "Bearer wrong"}).status_code == 403
+
+    response = client.get("/api/health/details", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert {"upstream", "replicas", "catalog_snapshot"} <= response.json().keys()
+    assert "quota" in response.json()["upstream"]["kopis"]
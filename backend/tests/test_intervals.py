@@ -0,0 +1,81 @@
+"""IntervalTree against brute-force scans"""
+
+import random
+
+import pytest
+
+from app.services.intervals import IntervalTree
+
+
+def brute_stab(intervals, point):
+    return sorted(value for start, end, value in intervals if start <= point <= end)
+
+
+def brute_overlapping(intervals, lo, hi):
+    return sum(1 for start, end, _ in intervals if start <= hi and end >= lo)
+
+
+def random_intervals(rng, size, span=400, max_length=90):
+    intervals = []
+    for i in range(size):
+        start = rng.randrange(span)
+        # A third are single-day runs
+        length = 0 if rng.random() < 0.33 else rng.randrange(max_length)
+        intervals.append((start, start + length, i))
+    return intervals
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    intervals = random_intervals(rng, 300)
+    tree = IntervalTree(intervals)
+
+    for point in range(-5, 500):
+        assert sorted(tree.stab(point)) == brute_stab(intervals, point)
+        assert tree.count(point) == len(brute_stab(intervals, point))
+
+    for _ in range(500):
+        lo = rng.randrange(-20, 500)
+        hi = lo + rng.randrange(60)
+        assert tree.overlapping(lo, hi) == brute_overlapping(intervals, lo, hi)
+
+
+def test_point_on_node_centers():
+    rng = random.Random(42)
+    intervals = random_intervals(rng, 200)
+    tree = IntervalTree(intervals)
+
+    centers = []
+    nodes = [tree._root]
+    while nodes:
+        node = nodes.pop()
+        if node is not None:
+            centers.append(node.center)
+            nodes += [node.left, node.right]
+    assert len(centers) > 1
+    for center in centers:
+        assert sorted(tree.stab(center)) == brute_stab(intervals, center)
+        assert tree.count(center) == len(brute_stab(intervals, center))
+
+
+def test_single_day_runs():
+    intervals = [(10, 10, "a"), (10, 10, "b"), (11, 11, "c"), (9, 12, "d")]
+    tree = IntervalTree(intervals)
+
+    assert sorted(tree.stab(10)) == ["a", "b", "d"]
+    assert sorted(tree.stab(11)) == ["c", "d"]
+    assert tree.stab(13) == []
+    assert tree.count(10) == 3
+    assert tree.overlapping(10, 10) == 3
+    assert tree.overlapping(11, 20) == 2
+    assert tree.overlapping(13, 20) == 0
+
+
+def test_empty_tree():
+    tree = IntervalTree([])
+
+    assert tree.size == 0
+    assert tree.stab(0) == []
+    assert tree.count(0) == 0
+    assert tree.overlapping(-10, 10) == 0
@@ -0,0 +1,58 @@
+"""Per-thread metric shards"""
+
+import threading
+
+from app.core.metrics import Counter, Histogram, Registry
+
+
+def run_threads(count, target):
+    for _ in range(count):
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+
+
+def test_shards_bounded_as_threads_come_and_go(monkeypatch):
+    monkeypatch.setattr("app.core.metrics.registry", Registry())
+    counter = Counter("test_total", "test", ("route",))
+    histogram = Histogram("test_seconds", "test", buckets=(0.1, 1.0))
+
+    def record():
+        counter.inc("/a")
+        histogram.observe(0.5)
+
+    run_threads(500, record)
+
+    assert len(counter._shards) == 0
+    assert len(histogram._shards) == 0
+    # Totals from exited threads are kept
+    assert counter.value("/a") == 500
+    assert 'test_seconds_bucket{le="1"} 500' in histogram.collect()
+
+
+def test_live_and_retired_shards_are_summed(monkeypatch):
+    monkeypatch.setattr("app.core.metrics.registry", Registry())
+    counter = Counter("test_total", "test", ("route",))
+    release = threading.Event()
+    recorded = threading.Event()
+
+    def hold():
+        counter.inc("/a", amount=2)
+        recorded.set()
+        release.wait()
+
+    live = threading.Thread(target=hold)
+    live.start()
+    recorded.wait()
+    # Same values as the live shard; retiring must not remove the wrong one
+    run_threads(3, lambda: counter.inc("/a", amount=2))
+    counter.inc("/b")
+
+    assert len(counter._shards) == 2
+    assert counter.value("/a") == 8
+    assert counter.value("/b") == 1
+
+    release.set()
+    live.join()
+    assert len(counter._shards) == 1
+    assert counter.value("/a") == 8
@@ -0,0 +1,85 @@
+"""Analytics partition names, retention cutoffs and chunked deletes"""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from app.db import database, partitions
+from app.db.models import Analytics
+from app.db.partitions import (
+    add_months, apply_retention, delete_before, expired_partitions, partition_name, retention_cutoff,
+)
+
+
+def test_add_months_crosses_years():
+    assert add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 3, 1), -15) == date(2024, 12, 1)
+    assert add_months(date(2025, 10, 1), 0) == date(2025, 10, 1)
+
+
+def test_partition_name():
+    assert partition_name(date(2025, 3, 1)) == "analytics_y2025m03"
+    assert partition_name(add_months(date(2025, 12, 1), 1)) == "analytics_y2026m01"
+    assert partitions.PARTITION_PATTERN.match(partition_name(date(2025, 3, 1)))
+
+
+def test_retention_cutoff_keeps_whole_months():
+    # Mid-month: the current month plus 13 whole months before it
+    assert retention_cutoff(13, today=date(2026, 10, 19)) == date(2025, 9, 1)
+    assert retention_cutoff(1, today=date(2026, 1, 31)) == date(2025, 12, 1)
+
+
+def test_expired_partitions():
+    names = [
+        "analytics_default",
+        "analytics_y2025m07",
+        "analytics_y2025m08",
+        "analytics_y2025m09",
+        "analytics_y2025m10",
+        "analytics_archive",
+    ]
+    cutoff = retention_cutoff(13, today=date(2026, 10, 19))
+
+    # September 2025 starts at the cutoff and is kept; the default partition never matches
+    assert expired_partitions(names, cutoff) == ["analytics_y2025m07", "analytics_y2025m08"]
+    assert expired_partitions(names, date(2025, 1, 1)) == []
+
+
+def add_events(session, days):
+    for day in days:
+        session.add(Analytics(event_type="view", concert_id="PF1", created_at=datetime(2025, 1, 1) + timedelta(days=day)))
+    session.commit()
+
+
+def count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f'SELECT count(*) FROM "{table}"')).scalar_one()
+
+
+def test_delete_before_in_chunks(db, monkeypatch):
+    monkeypatch.setattr(partitions, "DELETE_CHUNK", 3)
+    with db() as session:
+        add_events(session, range(10))
+
+    # Days 0-6 are before the cutoff: chunks of 3, 3 and 1
+    assert delete_before(database.engine, date(2025, 1, 8)) == 7
+    assert count(database.engine, "analytics") == 3
+
+
+def test_retention_prunes_default_partition(db, monkeypatch):
+    engine = database.engine
+    with db() as session:
+        add_events(session, range(0, 400, 40))
+    # Stand-in for the PostgreSQL default partition
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE analytics_default AS SELECT * FROM analytics"))
+    monkeypatch.setattr(partitions, "is_partitioned", lambda engine: True)
+    monkeypatch.setattr(partitions, "list_partitions", lambda engine: ["analytics_default", "analytics_y2026m01"])
+
+    removed = apply_retention(engine, 6, today=date(2026, 1, 15))
+
+    # Cutoff 2025-07-01: events on days 0-160 (through June) are deleted
+    assert removed == []
+    assert count(engine, "analytics_default") == 5
+    assert count(engine, "analytics") == 10
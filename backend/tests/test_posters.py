@@ -0,0 +1,143 @@
+"""Poster proxy: fetch, resize, disk cache and invalid upstream images"""
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.kopis import kopis_service
+from app.services.posters import PosterStore, poster_service
+
+WEBP = {"Accept": "image/webp,image/*"}
+
+
+def png(width, height, color=(200, 30, 30)):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, "PNG")
+    return out.getvalue()
+
+
+class ImageServer:
+    """Serves fixed bodies by path and counts requests"""
+
+    def __init__(self):
+        self.bodies = {}
+        self.calls = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server.calls += 1
+                body = server.bodies.get(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def add(self, mt20id, body):
+        self.bodies[f"/{mt20id}.png"] = body
+        return f"{self.base_url}/{mt20id}.png"
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    server = ImageServer()
+    # Posters are only fetched from the KOPIS host
+    monkeypatch.setattr(settings, "kopis_base_url", server.base_url)
+    monkeypatch.setattr(poster_service, "store", PosterStore(str(tmp_path / "posters"), 10 * 1024 * 1024))
+    # Resize in threads: same code path without starting processes
+    pool = ThreadPoolExecutor(1)
+    monkeypatch.setattr(poster_service, "_pool", pool)
+    yield server
+    pool.shutdown()
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+
+def register(monkeypatch, upstream, mt20id, body):
+    monkeypatch.setitem(kopis_service.posters, mt20id, upstream.add(mt20id, body))
+
+
+def test_resize_and_cache(client, upstream, monkeypatch):
+    register(monkeypatch, upstream, "PF1", png(1000, 1400))
+
+    response = client.get("/api/posters/PF1?size=sm", headers=WEBP)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["vary"] == "Accept"
+    with Image.open(io.BytesIO(response.content)) as img:
+        assert img.format == "WEBP"
+        assert img.size == (240, 336)
+
+    # Another size and format reuse the cached original
+    jpeg = client.get("/api/posters/PF1?size=md")
+    assert jpeg.headers["content-type"] == "image/jpeg"
+    with Image.open(io.BytesIO(jpeg.content)) as img:
+        assert img.size == (480, 672)
+    assert jpeg.headers["etag"] != response.headers["etag"]
+    assert upstream.calls == 1
+
+    # Cached variant, then revalidation
+    again = client.get("/api/posters/PF1?size=sm", headers=WEBP)
+    assert again.content == response.content
+    etag = response.headers["etag"]
+    assert client.get("/api/posters/PF1?size=sm", headers={**WEBP, "If-None-Match": etag}).status_code == 304
+    assert upstream.calls == 1
+
+
+def test_small_poster_not_upscaled(client, upstream, monkeypatch):
+    register(monkeypatch, upstream, "PF2", png(200, 300))
+
+    response = client.get("/api/posters/PF2?size=lg")
+    with Image.open(io.BytesIO(response.content)) as img:
+        assert img.size == (200, 300)
+
+
+def test_invalid_upstream_image(client, upstream, monkeypatch):
+    register(monkeypatch, upstream, "PF3", b"<html>not an image</html>")
+
+    response = client.get("/api/posters/PF3?size=sm")
+    assert response.status_code == 502
+    # Nothing half-written is served later
+    assert list((poster_service.store.root / "objects").glob("*/*_240.*")) == []
+
+
+def test_upstream_errors(client, upstream, monkeypatch):
+    monkeypatch.setitem(kopis_service.posters, "PF4", f"{upstream.base_url}/missing.png")
+    assert client.get("/api/posters/PF4").status_code == 502
+
+    # Other hosts are never fetched, whatever the listing said
+    monkeypatch.setitem(kopis_service.posters, "PF5", "http://example.com/PF5.png")
+    assert client.get("/api/posters/PF5").status_code == 404
+    assert client.get("/api/posters/unknown").status_code == 404
+    assert client.get("/api/posters/PF-1").status_code == 404
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = PosterStore(str(tmp_path), max_bytes=3500)
+    old = store.put_variant("a" * 64, 240, "webp", b"x" * 1000)
+    new = store.put_variant("b" * 64, 240, "webp", b"x" * 1000)
+    os.utime(old, (1, 1))
+    os.utime(new, (2, 2))
+    assert store.variant("a" * 64, 240, "webp") == old  # a hit makes it recent again
+
+    store.put_variant("c" * 64, 240, "webp", b"x" * 1000)
+    store.put_variant("d" * 64, 240, "webp", b"x" * 1000)
+
+    assert store.variant("b" * 64, 240, "webp") is None
+    assert store.variant("a" * 64, 240, "webp") is not None
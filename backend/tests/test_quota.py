@@ -0,0 +1,139 @@
+"""KOPIS quota accounting: QuotaManager over the local and Redis stores"""
+
+import os
+import threading
+import uuid
+
+import pytest
+
+from app.services.quota import (
+    LocalQuotaStore, Priority, QuotaManager, RedisQuotaStore, key_label, quota_day,
+)
+
+
+def manager(keys=("key-a",), limit=10, store=None):
+    return QuotaManager(api_keys=list(keys), daily_limit=limit, store=store or LocalQuotaStore())
+
+
+def spend(quota, priority=Priority.USER):
+    calls = []
+    while True:
+        key = quota.acquire(priority)
+        if key is None:
+            return calls
+        calls.append(key)
+
+
+def test_priority_shares():
+    quota = manager(limit=10)
+
+    # Prefetch stops at half the quota, sync at 80%, users get the rest
+    assert len(spend(quota, Priority.PREFETCH)) == 5
+    assert len(spend(quota, Priority.SYNC)) == 3
+    assert len(spend(quota, Priority.USER)) == 2
+    assert quota.usage() == {key_label("key-a"): 10}
+    assert quota.snapshot()["allowed"] == {Priority.USER: False, Priority.SYNC: False, Priority.PREFETCH: False}
+
+
+def test_fractional_share_rounds_up():
+    assert len(spend(manager(limit=15), Priority.PREFETCH)) == 8
+
+
+def test_least_used_key_first():
+    quota = manager(keys=("key-a", "key-b"), limit=4)
+
+    calls = spend(quota)
+    assert len(calls) == 8
+    assert calls[:2] in (["key-a", "key-b"], ["key-b", "key-a"])
+    assert quota.snapshot()["remaining"] == 0
+
+
+def test_unlimited():
+    quota = manager(limit=0)
+    for _ in range(100):
+        assert quota.acquire(Priority.PREFETCH) == "key-a"
+
+
+def test_store_failure_fails_open():
+    class BrokenStore:
+        def get(self, label, day):
+            raise ConnectionError("down")
+
+    quota = manager(store=BrokenStore())
+    assert quota.acquire() == "key-a"
+    assert quota.usage() == {}
+
+
+def test_concurrent_charges_are_exact():
+    quota = manager(keys=("key-a", "key-b"), limit=500)
+    granted = []
+
+    def worker():
+        granted.extend(spend(quota))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(granted) == 1000
+    assert quota.usage() == {key_label("key-a"): 500, key_label("key-b"): 500}
+
+
+def test_split_across_workers():
+    quota = manager(limit=10)
+    quota.split(4)
+    assert quota.daily_limit == 2
+    assert len(spend(quota)) == 2
+
+    # Never rounds down to 0 (= unlimited)
+    small = manager(limit=3)
+    small.split(8)
+    assert small.daily_limit == 1
+
+
+def test_local_store_drops_old_days():
+    store = LocalQuotaStore()
+    assert store.charge("a", "20251001", 5)
+    assert store.charge("a", "20251002", 5)
+    assert store.get("a", "20251001") == 0
+    assert store.get("a", "20251002") == 1
+
+
+@pytest.fixture
+def redis_store():
+    pytest.importorskip("redis")
+    store = RedisQuotaStore(os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15"))
+    try:
+        store.client.ping()
+    except Exception:
+        pytest.skip("no Redis server")
+    return store
+
+
+def test_redis_store_charges_atomically(redis_store):
+    label, day = uuid.uuid4().hex[:8], quota_day()
+    results = []
+
+    def worker():
+        results.extend(redis_store.charge(label, day, 50) for _ in range(20))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert results.count(True) == 50
+        assert redis_store.get(label, day) == 50
+        assert redis_store.client.ttl(redis_store._key(label, day)) > 0
+    finally:
+        redis_store.client.delete(redis_store._key(label, day))
+
+
+def test_split_keeps_shared_limit(redis_store):
+    quota = manager(limit=10, store=redis_store)
+    quota.split(4)
+    assert quota.daily_limit == 10
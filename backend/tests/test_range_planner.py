@@ -0,0 +1,57 @@
+"""Canonical segment planning, stitching and pagination"""
+
+from datetime import date
+
+import pytest
+
+from app.services.range_planner import MAX_SEGMENTS, RangeTooLong, Segment, paginate, plan_segments, stitch
+
+
+def item(mt20id, start, end):
+    return {"mt20id": mt20id, "prfpdfrom": start, "prfpdto": end}
+
+
+def test_month_segments():
+    assert plan_segments("20251015", "20251203") == [
+        Segment(date(2025, 10, 1), date(2025, 10, 31)),
+        Segment(date(2025, 11, 1), date(2025, 11, 30)),
+        Segment(date(2025, 12, 1), date(2025, 12, 31)),
+    ]
+    # A single day still fetches its whole month
+    assert plan_segments("20240229", "20240229") == [Segment(date(2024, 2, 1), date(2024, 2, 29))]
+
+
+def test_week_segments():
+    segments = plan_segments("20251001", "20251031", "week")
+
+    assert segments[0] == Segment(date(2025, 9, 29), date(2025, 10, 5))
+    assert segments[-1] == Segment(date(2025, 10, 27), date(2025, 11, 2))
+    # A whole month fits in either unit
+    assert len(segments) <= MAX_SEGMENTS["week"]
+
+
+@pytest.mark.parametrize("unit, eddate", [("month", "20260201"), ("week", "20251110")])
+def test_range_too_long(unit, eddate):
+    with pytest.raises(RangeTooLong):
+        plan_segments("20251001", eddate, unit)
+
+
+@pytest.mark.parametrize("stdate, eddate", [("20251032", "20251031"), ("2025-10-01", "20251031"), ("20251031", "20251001")])
+def test_invalid_range(stdate, eddate):
+    with pytest.raises(ValueError) as e:
+        plan_segments(stdate, eddate)
+    assert not isinstance(e.value, RangeTooLong)
+
+
+def test_stitch_dedupes_and_filters():
+    october = [item("a", "2025.09.20", "2025.10.02"), item("b", "2025.10.30", "2025.11.02")]
+    november = [item("b", "2025.10.30", "2025.11.02"), item("c", "2025.11.10", "2025.11.10")]
+
+    assert [i["mt20id"] for i in stitch([october, november], "20251001", "20251130")] == ["a", "b", "c"]
+    assert [i["mt20id"] for i in stitch([october, november], "20251015", "20251105")] == ["b"]
+
+
+def test_paginate():
+    assert paginate(list(range(25)), 3, 10) == [20, 21, 22, 23, 24]
+    assert paginate(list(range(25)), 4, 10) == []
+    assert paginate(list(range(5)), 0, 2) == [0, 1]
@@ -0,0 +1,165 @@
+"""Circuit breaker, AIMD limiter and backoff, alone and inside KopisService._request"""
+
+import random
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services.kopis import kopis_service
+from app.services.resilience import AIMDLimiter, CircuitBreaker, backoff_delay
+
+
+def open_breaker(reset_timeout=0.05):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() > 0
+
+
+def test_half_open_allows_one_probe():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_release_frees_the_probe():
+    breaker = open_breaker()
+    time.sleep(0.06)
+
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_limiter_slot_times_out():
+    limiter = AIMDLimiter(initial=1, max_limit=1)
+    with limiter.slot(timeout=1) as first:
+        assert first
+        start = time.monotonic()
+        with limiter.slot(timeout=0.05) as second:
+            assert not second
+        assert time.monotonic() - start < 0.5
+    assert limiter.inflight == 0
+
+
+def test_limiter_slot_waits_for_release():
+    limiter = AIMDLimiter(initial=1, max_limit=1)
+    held = threading.Event()
+
+    def hold():
+        with limiter.slot(timeout=1):
+            held.set()
+            time.sleep(0.05)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    with limiter.slot(timeout=1) as acquired:
+        assert acquired
+    thread.join()
+
+
+def test_limiter_aimd():
+    limiter = AIMDLimiter(initial=4, min_limit=1, max_limit=5, latency_target=1.0, backoff=0.5)
+    limiter.on_result(0.1, ok=True)
+    assert limiter.limit == pytest.approx(4.25)
+    limiter.on_result(2.0, ok=True)  # too slow
+    assert limiter.limit == pytest.approx(2.125)
+    for _ in range(5):
+        limiter.on_result(0.1, ok=False)
+    assert limiter.limit == 1
+    for _ in range(100):
+        limiter.on_result(0.1, ok=True)
+    assert limiter.limit == 5
+
+
+def test_backoff_delay_bounds():
+    rng = random.Random(0)
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=0.2, cap=2.0, rng=rng)
+        assert 0 <= delay <= min(2.0, 0.2 * 2 ** attempt)
+
+
+def test_saturated_limiter_fails_fast(kopis, monkeypatch):
+    monkeypatch.setattr(kopis_service, "limiter", AIMDLimiter(initial=1, max_limit=1))
+    monkeypatch.setattr(settings, "kopis_slot_timeout", 0.05)
+
+    with kopis_service.limiter.slot(timeout=1):
+        start = time.monotonic()
+        with pytest.raises(HTTPException) as e:
+            kopis_service._request("pblprfr", {"stdate": "20251001", "eddate": "20251031"})
+        assert time.monotonic() - start < 1
+    assert e.value.status_code == 503
+    assert kopis.calls == 0
+    # Not an upstream failure: the circuit stays closed
+    assert kopis_service.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_unexpected_error_releases_probe(kopis, monkeypatch):
+    breaker = open_breaker()
+    monkeypatch.setattr(kopis_service, "breaker", breaker)
+    time.sleep(0.06)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(kopis_service.http, "get", broken)
+    with pytest.raises(RuntimeError):
+        kopis_service._request("pblprfr", {})
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_upstream_errors_open_circuit(kopis, monkeypatch):
+    monkeypatch.setattr(kopis_service, "breaker", CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    kopis.error_rate = 1.0
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as e:
+            kopis_service._request("pblprfr", {})
+        assert e.value.status_code == 502
+    calls = kopis.calls
+
+    with pytest.raises(HTTPException) as e:
+        kopis_service._request("pblprfr", {})
+    assert e.value.status_code == 503
+    assert "Retry-After" in e.value.headers
+    assert kopis.calls == calls
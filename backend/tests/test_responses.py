@@ -0,0 +1,43 @@
+"""dumps and FastJSONResponse render what JSONResponse(jsonable_encoder(...)) did"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import responses
+from app.core.responses import FastJSONResponse, dumps
+
+KST = timezone(timedelta(hours=9))
+
+CASES = [
+    {"created_at": datetime(2025, 10, 1, 12, 30, 5, 123456), "day": date(2025, 10, 1), "at": time(19, 30)},
+    {"aware": datetime(2025, 10, 1, 9, tzinfo=KST), "utc": datetime(2025, 10, 1, tzinfo=timezone.utc)},
+    {"price": Decimal("55000"), "rating": Decimal("4.50"), "scaled": Decimal("1E+2"), "tiny": Decimal("0.1")},
+    {1: "one", 2: {3: [Decimal("2.5")]}},
+    {"name": "뮤지컬 <레미제라블>", "nested": [{"count": 0, "ok": None, "flags": [True, False]}], "empty": {}},
+]
+
+
+def old_body(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(responses, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("content", CASES)
+def test_same_bytes_as_json_response(serializer, content):
+    assert dumps(content) == old_body(content)
+    assert FastJSONResponse(content).body == old_body(content)
+
+
+def test_unsupported_type_still_fails(serializer):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,103 @@
+"""Catalog snapshot round trip, checked against a brute-force filter"""
+
+import random
+from collections import Counter
+from datetime import date, timedelta
+
+import pytest
+
+from app.db.models import Concert
+from app.services.snapshot import CatalogSnapshot, SnapshotManager, write_snapshot
+
+COVERS = (date(2025, 1, 1), date(2026, 12, 31))
+GENRES = ["연극", "뮤지컬", "대중음악", None]
+AREAS = ["서울특별시", "부산광역시", "경기도"]
+
+
+def make_concerts(count=400, seed=7):
+    rng = random.Random(seed)
+    concerts = []
+    for i in range(count):
+        start = COVERS[0] + timedelta(days=rng.randrange(700))
+        # Some runs end before they start (bad upstream data): stored as one day
+        end = start + timedelta(days=rng.choice([-3, 0, 1, 7, 30, 90, 365]))
+        concerts.append(Concert(
+            mt20id=f"PF{i:06d}", prfnm=f"공연 {i}", prfpdfrom=start, prfpdto=end,
+            fcltynm=f"공연장 {i % 17}", poster=None, genrenm=rng.choice(GENRES),
+            area=rng.choice(AREAS), openrun=i % 5 == 0,
+        ))
+    # Rows without a start date are skipped by the writer
+    concerts.append(Concert(mt20id="PFNODATE", prfnm="미정", prfpdfrom=None))
+    return concerts
+
+
+def brute_force(concerts, lo, hi):
+    matched = []
+    for c in concerts:
+        if c.prfpdfrom is None:
+            continue
+        end = c.prfpdto if c.prfpdto >= c.prfpdfrom else c.prfpdfrom
+        if c.prfpdfrom <= hi and end >= lo:
+            matched.append(c)
+    return sorted(matched, key=lambda c: (c.prfpdfrom, c.mt20id))
+
+
+@pytest.fixture
+def concerts():
+    return make_concerts()
+
+
+@pytest.fixture
+def snapshot(tmp_path, concerts):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, concerts, COVERS)
+    return CatalogSnapshot(path)
+
+
+def test_overlap_and_facets_match_brute_force(snapshot, concerts):
+    rng = random.Random(11)
+    # Early ranges scan the start column, late ranges the by_end permutation
+    ranges = [(date(2025, 1, 1), date(2025, 1, 31)), (date(2026, 11, 1), date(2026, 12, 31)),
+              (date(2025, 6, 15), date(2025, 6, 15)), COVERS]
+    for _ in range(50):
+        lo = COVERS[0] + timedelta(days=rng.randrange(730))
+        ranges.append((lo, lo + timedelta(days=rng.randrange(120))))
+
+    for lo, hi in ranges:
+        rows = snapshot.overlapping(lo.toordinal(), hi.toordinal())
+        expected = brute_force(concerts, lo, hi)
+
+        assert [snapshot.item(row)["mt20id"] for row in rows] == [c.mt20id for c in expected]
+        facets = snapshot.facets(rows)
+        assert facets["genrenm"] == dict(Counter(c.genrenm or "" for c in expected))
+        assert facets["area"] == dict(Counter(c.area for c in expected))
+
+
+def test_item_fields(snapshot, concerts):
+    concert = concerts[5]
+    item = snapshot.find(concert.mt20id)
+
+    assert item["prfnm"] == concert.prfnm
+    assert item["prfpdfrom"] == concert.prfpdfrom.strftime("%Y.%m.%d")
+    assert item["genrenm"] == concert.genrenm
+    assert item["poster"] is None
+    assert item["openrun"] == "Y"
+    assert snapshot.find("PFNODATE") is None
+    assert snapshot.size == len(concerts) - 1
+
+
+def test_manager_pages_and_coverage(tmp_path, concerts):
+    path = str(tmp_path / "catalog.snap")
+    write_snapshot(path, concerts, COVERS)
+    manager = SnapshotManager(path)
+    expected = brute_force(concerts, date(2025, 10, 1), date(2025, 10, 31))
+
+    entry = manager.get_concerts_entry("20251001", "20251031", cpage=2, rows=12)
+    meta = entry.payload["meta"]
+    assert meta["total"] == len(expected)
+    assert [item["mt20id"] for item in entry.payload["items"]] == [c.mt20id for c in expected[12:24]]
+    assert manager.facets("20251001", "20251031")["total"] == len(expected)
+
+    # Outside the synced range: the caller falls back to KOPIS
+    assert manager.get_concerts_entry("20241201", "20250110") is None
+    assert manager.facets("20270101", "20270131") is None
@@ -0,0 +1,158 @@
+"""Request traces: span context, request IDs, slow logs and the sampling profiler"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.tracing import SamplingProfiler, Trace, TracingMiddleware, current_trace, span
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def handler(request):
+    trace = current_trace()
+    with span("sql", statement="SELECT 1"):
+        pass
+    with span("kopis", endpoint="pblprfr"):
+        time.sleep(float(request.query_params.get("sleep", "0")))
+    if request.query_params.get("busy"):
+        busy_wait(0.1)
+    return PlainTextResponse(trace.request_id)
+
+
+@pytest.fixture
+def traced():
+    app = Starlette(routes=[Route("/work", handler)])
+    app.add_middleware(TracingMiddleware)
+    return TestClient(app)
+
+
+def test_span_without_trace_is_noop():
+    with span("sql") as current:
+        assert current is None
+    assert current_trace() is None
+
+
+def test_spans_follow_the_context_into_threads():
+    def query():
+        with span("sql", rows=3):
+            pass
+
+    async def request():
+        trace = Trace("req-1", "GET", "/work")
+        token = tracing._current_trace.set(trace)
+        try:
+            with span("route"):
+                # Sync routes run in the threadpool with a copy of the context
+                await asyncio.to_thread(query)
+        finally:
+            tracing._current_trace.reset(token)
+        return trace
+
+    trace = asyncio.run(request())
+
+    assert [(s.name, s.attrs) for s in trace.spans] == [("sql", {"rows": 3}), ("route", {})]
+    assert len(trace.threads) == 2
+    assert current_trace() is None
+
+
+def test_concurrent_requests_keep_separate_traces():
+    async def request(name):
+        trace = Trace(name, "GET", "/")
+        tracing._current_trace.set(trace)
+        for _ in range(3):
+            with span(name):
+                await asyncio.sleep(0)
+        return trace
+
+    async def both():
+        return await asyncio.gather(asyncio.create_task(request("a")), asyncio.create_task(request("b")))
+
+    first, second = asyncio.run(both())
+    assert [s.name for s in first.spans] == ["a"] * 3
+    assert [s.name for s in second.spans] == ["b"] * 3
+
+
+def test_span_cap(monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_SPANS", 3)
+    trace = Trace("req", "GET", "/")
+    token = tracing._current_trace.set(trace)
+    try:
+        for _ in range(5):
+            with span("sql"):
+                pass
+    finally:
+        tracing._current_trace.reset(token)
+    assert len(trace.spans) == 3
+    assert trace.dropped == 2
+
+
+def test_request_id(traced):
+    response = traced.get("/work", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["x-request-id"] == "abc-123" == response.text
+
+    # Oversized or unsafe IDs are replaced
+    for bad in ("a" * 65, "bad id", "../../etc"):
+        response = traced.get("/work", headers={"X-Request-ID": bad})
+        assert response.headers["x-request-id"] != bad
+        assert len(response.headers["x-request-id"]) == 32
+
+
+def test_slow_log_lists_offending_spans(traced, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "slow_span_ms", 50)
+    monkeypatch.setattr(settings, "slow_request_ms", 10000)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.tracing"):
+        traced.get("/work")
+        assert not caplog.records
+        traced.get("/work?sleep=0.06", headers={"X-Request-ID": "slow-1"})
+
+    entry = json.loads(caplog.records[-1].getMessage())
+    assert entry["request_id"] == "slow-1"
+    assert entry["span_count"] == 2
+    assert [s["name"] for s in entry["spans"]] == ["kopis"]
+    assert entry["spans"][0]["endpoint"] == "pblprfr"
+
+
+def test_profiler_samples_only_traced_threads():
+    trace = Trace("req", "GET", "/")
+    worker = threading.Thread(target=busy_wait, args=(0.1,))
+    bystander = threading.Thread(target=time.sleep, args=(0.1,))
+    profiler = SamplingProfiler(trace, interval=0.002)
+    worker.start()
+    bystander.start()
+    trace.threads = {worker.ident}
+    profiler.start()
+    worker.join()
+    bystander.join()
+    profiler.stop()
+
+    assert profiler.stacks
+    assert all("busy_wait" in stack for stack in profiler.stacks)
+
+
+def test_profile_header(traced, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", "let-me-profile")
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+
+    traced.get("/work?busy=1", headers={"X-Profile": "wrong"})
+    assert list(tmp_path.iterdir()) == []
+
+    traced.get("/work?busy=1", headers={"X-Profile": "let-me-profile", "X-Request-ID": "../../etc"})
+    (profile,) = tmp_path.iterdir()
+    assert profile.suffix == ".folded"
+    assert "busy_wait" in profile.read_text()
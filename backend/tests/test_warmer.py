@@ -0,0 +1,28 @@
+"""WARMER_QUERIES parsing"""
+
+from datetime import date
+
+import pytest
+
+from app.core.config import settings
+from app.services.warmer import parse_queries, validate_queries
+
+
+def test_parse_queries():
+    today = date(2026, 2, 18)  # a Wednesday
+
+    assert parse_queries("20251001-20251031:12, this-week, next-month:5,", today) == [
+        ("20251001", "20251031", 12),
+        ("20260216", "20260222", 20),
+        ("20260301", "20260331", 5),
+    ]
+
+
+def test_default_includes_frontend_landing_query():
+    assert ("20251001", "20251031", 12) in parse_queries(settings.warmer_queries, date(2026, 10, 19))
+
+
+@pytest.mark.parametrize("spec", ["this-month:ten", "this-month:0", "20251001-2025:12", "last-month", "20251001"])
+def test_invalid_queries(spec):
+    with pytest.raises(ValueError, match="WARMER_QUERIES"):
+        validate_queries(spec)
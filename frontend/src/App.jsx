@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import { fetchPopConcerts } from "./lib/api";
+import { API_BASE, fetchPopConcerts } from "./lib/api";
 
 export default function App() {
   const [items, setItems] = useState([]);
@@ -54,8 +54,9 @@ return (
           }}>
             {it.poster && (
               <img
-                src={it.poster}
+                src={`${API_BASE}/api/posters/${it.mt20id}?size=md`}
                 alt={it.prfnm}
+                loading="lazy"
                 style={{
                   width: "100%",
                   borderRadius: 8,